@@ -1,11 +1,22 @@
 # coding:utf-8
 
 from .utils import __version__
+from .utils import bintokey
+from .utils import keytobin
+from .utils import metrics
+from .utils import pattern
+from .utils import profile
 from .utils import seqtokey
+from .utils import seqtokey_many
 from .utils import testakey
 
+from .store import recorder
+
 from .trie import ctrie
+from .trie import frozen_radix
 from .trie import htrie
 from .trie import radix
+from .trie import sindex
+from .trie import testbin
 from .trie import testhex
 from .trie import testalnum
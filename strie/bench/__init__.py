@@ -0,0 +1,27 @@
+# coding:utf-8
+
+from .history import compare
+from .history import environment
+from .history import load
+from .history import save
+from .keys import ACCESS
+from .keys import SHAPES
+from .keys import keyspace
+from .replay import preload
+from .replay import replay
+from .runner import MIXES
+from .runner import READONLY
+from .runner import dumps
+from .runner import execute
+from .runner import latency
+from .runner import rss
+from .runner import run
+from .runner import run_store
+from .runner import suite
+from .startup import CRASHES
+from .startup import build
+from .startup import crash
+from .startup import measure
+from .startup import startup
+from .target import TARGETS
+from .target import target
@@ -0,0 +1,105 @@
+# coding:utf-8
+
+from datetime import datetime
+import json
+import os
+import platform
+import sys
+from typing import Any
+from typing import Dict
+from typing import Iterable
+from typing import List
+from typing import Tuple
+
+from ..utils import __version__
+
+MAX_DROP = 0.10  # throughput
+MAX_RISE = 0.20  # p99 latency
+
+
+def environment() -> Dict[str, Any]:
+    """Metadata to tell apart results from different hosts and versions
+    """
+    return {
+        "time": datetime.now().isoformat(timespec="seconds"),
+        "version": __version__,
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "processor": platform.processor(),
+        "cpus": os.cpu_count(),
+        "argv": sys.argv,
+    }
+
+
+def save(path: str, results: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+    """Write results with environment metadata, replacing atomically
+    """
+    data: Dict[str, Any] = {"env": environment(), "results": list(results)}
+    temp: str = f"{path}.tmp"
+    with open(temp, "w") as hdl:
+        json.dump(data, hdl, indent=2)
+    os.replace(temp, path)
+    return data
+
+
+def load(path: str) -> Dict[str, Any]:
+    with open(path) as hdl:
+        data: Dict[str, Any] = json.load(hdl)
+    assert isinstance(data.get("results"), list), f"'{path}' has no results"
+    return data
+
+
+def identify(result: Dict[str, Any]) -> Tuple:
+    """Configuration of a result, results compare only if they match
+    """
+    return tuple(
+        tuple(v) if isinstance(v, list) else v
+        for v in (result.get(k) for k in ("target", "mix", "shape", "access",
+                                          "word", "cachemax", "records",
+                                          "path", "fragmentation", "crash",
+                                          "readonly", "trace", "speed")))
+
+
+def compare(results: Iterable[Dict[str, Any]],
+            baseline: Iterable[Dict[str, Any]],
+            max_drop: float = MAX_DROP,
+            max_rise: float = MAX_RISE) -> List[str]:
+    """Regressions against matching baseline results: throughput dropped
+    by more than max_drop, an operation p99 or a restart time rose by more
+    than max_rise
+    """
+    bases: Dict[Tuple, Dict[str, Any]] = {identify(b): b for b in baseline}
+    regressions: List[str] = []
+    for result in results:
+        base = bases.get(identify(result))
+        if base is None:
+            continue
+        name: str = "/".join(
+            str(v) for v in identify(result) if v is not None)
+        if "run" not in result:
+            for phase in ("restart", "recovery"):
+                for time in ("first_read", "full_warm"):
+                    if phase not in result or phase not in base:
+                        continue
+                    curr, prev = result[phase][time], base[phase][time]
+                    if prev > 0 and curr > prev * (1.0 + max_rise):
+                        regressions.append(
+                            f"{name}: {phase} {time} {curr:.6f}s > "
+                            f"{prev:.6f}s by {curr / prev - 1.0:.1%}")
+            continue
+        curr: float = result["run"]["throughput"]
+        prev: float = base["run"]["throughput"]
+        if prev > 0 and curr < prev * (1.0 - max_drop):
+            regressions.append(f"{name}: throughput {curr:.1f} < "
+                               f"{prev:.1f} by {1.0 - curr / prev:.1%}")
+        for op, stats in result["run"]["latency"].items():
+            prev_stats = base["run"]["latency"].get(op)
+            if prev_stats is None or prev_stats["p99"] <= 0:
+                continue
+            curr, prev = stats["p99"], prev_stats["p99"]
+            if curr > prev * (1.0 + max_rise):
+                regressions.append(f"{name}: {op} p99 {curr:.6f}s > "
+                                   f"{prev:.6f}s by {curr / prev - 1.0:.1%}")
+    return regressions
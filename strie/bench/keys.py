@@ -0,0 +1,129 @@
+# coding:utf-8
+
+from bisect import bisect_left
+import hashlib
+from itertools import accumulate
+from random import Random
+from typing import Iterable
+from typing import List
+from typing import Optional
+from typing import Union
+
+SHAPES = ("hash", "sequential", "prefix")
+ACCESS = ("uniform", "zipfian", "sequential")
+
+
+class keyspace:
+    """Live keys of a benchmark and the distribution they are accessed by
+
+    Shapes, all keys are 32 hex digits:
+    - hash: md5 digests of the key number, as test/generate.py
+    - sequential: the key number itself
+    - prefix: 16 shared prefixes of 24 digits, the rest varies
+
+    Access is uniform, zipfian (scrambled, so hot keys are not neighbours)
+    or sequential (round robin) over the live keys.
+    """
+
+    ZIPF_ALPHA = 0.99
+    PREFIXES = 16
+
+    def __init__(self,
+                 shape: str = "hash",
+                 access: str = "uniform",
+                 seed: int = 0,
+                 alpha: float = ZIPF_ALPHA):
+        assert shape in SHAPES, f"unknown key shape '{shape}'"
+        assert access in ACCESS, f"unknown access '{access}'"
+        self.__shape: str = shape
+        self.__access: str = access
+        self.__alpha: float = alpha
+        self.__rand: Random = Random(seed)
+        self.__live: List[str] = []
+        self.__next: int = 0  # number of the next new key
+        self.__turn: int = 0  # cursor of sequential access
+        self.__weights: List[float] = []
+        self.__order: List[int] = []
+        self.__prefixes: List[str] = [
+            f"{self.__rand.getrandbits(96):024x}"
+            for _ in range(self.PREFIXES)
+        ]
+
+    @property
+    def shape(self) -> str:
+        return self.__shape
+
+    @property
+    def access(self) -> str:
+        return self.__access
+
+    def __len__(self) -> int:
+        return len(self.__live)
+
+    def __make(self, number: int) -> str:
+        if self.__shape == "hash":
+            return hashlib.md5(number.to_bytes(8, "little")).hexdigest()
+        if self.__shape == "sequential":
+            return f"{number:032x}"
+        prefix: str = self.__prefixes[number % self.PREFIXES]
+        return f"{prefix}{number // self.PREFIXES:08x}"
+
+    def load(self, count: int) -> List[str]:
+        """Add count new keys, zipfian ranks are fixed over them
+        """
+        keys: List[str] = [self.insert() for _ in range(count)]
+        self.__rank()
+        return keys
+
+    def adopt(self, keys: Iterable[Union[str, bytes]]):
+        """Access existing keys, in the order given, instead of new ones
+        """
+        self.__live.extend(keys)
+        self.__rank()
+
+    def __rank(self):
+        self.__weights = list(
+            accumulate(1.0 / (i + 1)**self.__alpha
+                       for i in range(len(self.__live))))
+        self.__order = list(range(len(self.__live)))
+        self.__rand.shuffle(self.__order)
+
+    def __index(self) -> int:
+        if self.__access == "uniform":
+            return self.__rand.randrange(len(self.__live))
+        if self.__access == "sequential":
+            self.__turn = (self.__turn + 1) % len(self.__live)
+            return self.__turn
+        if len(self.__weights) == 0:
+            return self.__rand.randrange(len(self.__live))
+        rank: int = bisect_left(self.__weights,
+                                self.__rand.random() * self.__weights[-1])
+        return self.__order[rank] % len(self.__live)
+
+    def choose(self) -> Optional[str]:
+        """A live key to read or update, None if there is none
+        """
+        return self.__live[self.__index()] if len(self.__live) > 0 else None
+
+    def insert(self) -> str:
+        key: str = self.__make(self.__next)
+        self.__next += 1
+        self.__live.append(key)
+        return key
+
+    def delete(self) -> Optional[str]:
+        """Remove and return a live key, None if there is none
+        """
+        if len(self.__live) == 0:
+            return None
+        index: int = self.__index()
+        key: str = self.__live[index]
+        self.__live[index] = self.__live[-1]
+        self.__live.pop()
+        return key
+
+    def value(self, size: int) -> bytes:
+        return self.__rand.getrandbits(8 * size).to_bytes(size, "little")
+
+    def random(self) -> float:
+        return self.__rand.random()
@@ -0,0 +1,109 @@
+# coding:utf-8
+
+import os
+from tempfile import TemporaryDirectory
+from time import perf_counter
+from time import sleep
+from typing import Any
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Sequence
+from typing import Set
+
+from ..store import recorder
+from ..trie import ctrie
+from ..trie import testbin
+from ..utils import testakey
+from .runner import latency
+
+
+def preload(trace: str) -> Dict[str, int]:
+    """Keys found before the trace wrote them, with their value sizes
+    """
+    keys: Dict[str, int] = {}
+    written: Set[str] = set()
+    for op, key, size, _ in recorder.load(trace):
+        if op in ("set", "pop"):
+            written.add(key)
+        elif key not in written and key not in keys and size >= 0:
+            keys[key] = size
+    return keys
+
+
+def replay(trace: str,
+           path: Optional[str] = None,
+           speed: float = 0.0,
+           word: Sequence[int] = (2, ),
+           cachemax: int = 10**6,
+           cachebytes: int = 0) -> Dict[str, Any]:
+    """Replay a recorded trace against a new store at path, or a scratch
+    directory removed afterwards
+
+    Keys the trace found before writing them are loaded first, then the
+    store is reopened with empty caches. Speed 0 replays as fast as
+    possible, otherwise at that multiple of the recorded pace. Values are
+    zero bytes of the recorded sizes.
+    """
+    assert speed >= 0.0, f"speed {speed} error"
+    if path is None:
+        with TemporaryDirectory() as temp:
+            return replay(trace=trace, path=os.path.join(temp, "replay"),
+                          speed=speed, word=word, cachemax=cachemax,
+                          cachebytes=cachebytes)
+    keys: Dict[str, int] = preload(trace)
+    if recorder.binary(trace):
+        test: testakey = testbin
+    else:
+        chars: Set[str] = set()
+        for _, key, _, _ in recorder.load(trace):
+            chars.update(key)
+        test = testakey(allowed_char=chars)
+    root: ctrie = ctrie(path=path, word=word, test=test, readonly=False)
+    for key, size in keys.items():
+        root[key] = bytes(size)
+    del root
+    root = ctrie(path=path,
+                 cachemax=cachemax,
+                 cachebytes=cachebytes,
+                 readonly=False)
+    samples: Dict[str, List[float]] = {op: [] for op in recorder.OPS}
+    misses: int = 0
+    begin: float = perf_counter()
+    for op, key, size, seconds in recorder.load(trace):
+        if speed > 0.0:
+            delay: float = seconds / speed - (perf_counter() - begin)
+            if delay > 0.0:
+                sleep(delay)
+        start: float = perf_counter()
+        try:
+            if op == "get":
+                root[key]
+            elif op == "set":
+                root[key] = bytes(size)
+            elif op == "pop":
+                del root[key]
+            elif key not in root:
+                misses += 1
+        except KeyError:
+            misses += 1
+        samples[op].append(perf_counter() - start)
+    elapsed: float = perf_counter() - begin
+    operations: int = sum(len(v) for v in samples.values())
+    stats: Dict[str, Any] = root.stats()
+    return {
+        "target": "replay",
+        "trace": trace,
+        "speed": speed,
+        "word": list(word),
+        "cachemax": cachemax if cachebytes <= 0 else cachebytes,
+        "records": len(keys),
+        "misses": misses,
+        "run": {
+            "operations": operations,
+            "seconds": elapsed,
+            "throughput": operations / elapsed if elapsed > 0 else 0.0,
+            "latency": {op: latency(v) for op, v in samples.items() if v},
+        },
+        "caches": {name: stats[name] for name in ("icache", "dcache")},
+    }
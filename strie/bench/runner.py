@@ -0,0 +1,259 @@
+# coding:utf-8
+
+from itertools import islice
+import json
+import os
+from tempfile import TemporaryDirectory
+from time import perf_counter
+from typing import Any
+from typing import Dict
+from typing import Iterable
+from typing import Iterator
+from typing import List
+from typing import Optional
+from typing import Sequence
+
+from ..trie import ctrie
+from .keys import ACCESS
+from .keys import SHAPES
+from .keys import keyspace
+from .target import TARGETS
+from .target import target
+
+# YCSB-like mixes, proportions of each operation
+MIXES: Dict[str, Dict[str, float]] = {
+    "read-heavy": {
+        "read": 0.95,
+        "update": 0.05
+    },
+    "write-heavy": {
+        "read": 0.50,
+        "update": 0.25,
+        "insert": 0.25
+    },
+    "scan": {
+        "scan": 0.95,
+        "insert": 0.05
+    },
+    "delete-churn": {
+        "read": 0.50,
+        "insert": 0.25,
+        "delete": 0.25
+    },
+    "read-only": {
+        "read": 1.0
+    },
+}
+READONLY = ("read-only", "scan")  # mixes whose writes can be skipped
+
+VALUE_SIZE = 100  # bytes
+SCAN_LENGTH = 100  # keys
+SCAN_PREFIX = 3  # hex digits of a key starting a scan
+
+
+def rss() -> int:
+    """Resident set size in bytes, peak size where current is unknown
+    """
+    try:
+        with open("/proc/self/statm") as hdl:
+            return int(hdl.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+    except ImportError:
+        return 0
+
+
+def latency(samples: List[float]) -> Dict[str, float]:
+    """Count, p50, p99 and max of latency samples in seconds
+    """
+    samples = sorted(samples)
+    count: int = len(samples)
+    if count == 0:
+        return {"count": 0, "p50": 0.0, "p99": 0.0, "max": 0.0}
+    return {
+        "count": count,
+        "p50": samples[min(count - 1, int(count * 0.50))],
+        "p99": samples[min(count - 1, int(count * 0.99))],
+        "max": samples[-1],
+    }
+
+
+def execute(tgt: target,
+            keys: keyspace,
+            mix: Dict[str, float],
+            operations: int,
+            value_size: int = VALUE_SIZE,
+            scan_length: int = SCAN_LENGTH,
+            readonly: bool = False) -> Dict[str, Any]:
+    """Run operations drawn from mix, with readonly the writes are drawn
+    but skipped
+    """
+    assert abs(sum(mix.values()) - 1.0) < 1e-6, f"mix {mix} not sum to 1"
+    bounds: List[float] = []
+    names: List[str] = []
+    total: float = 0.0
+    for name, ratio in mix.items():
+        assert name in ("read", "update", "insert", "delete", "scan"), \
+            f"unknown operation '{name}'"
+        total += ratio
+        names.append(name)
+        bounds.append(total)
+    samples: Dict[str, List[float]] = {name: [] for name in names}
+    value: bytes = keys.value(value_size)
+    begin: float = perf_counter()
+    for _ in range(operations):
+        draw: float = keys.random() * total
+        name: str = names[-1]
+        for op, bound in zip(names, bounds):
+            if draw < bound:
+                name = op
+                break
+        if readonly and name in ("update", "insert", "delete"):
+            continue
+        if name == "insert":
+            key: Optional[str] = keys.insert()
+        elif name == "delete":
+            key = keys.delete()
+        else:
+            key = keys.choose()
+        if key is None:
+            continue
+        start: float = perf_counter()
+        if name == "read":
+            tgt.get(key)
+        elif name == "scan":
+            tgt.scan(key[:SCAN_PREFIX], scan_length)
+        elif name == "delete":
+            tgt.delete(key)
+        else:
+            tgt.put(key, value)
+        samples[name].append(perf_counter() - start)
+    seconds: float = perf_counter() - begin
+    return {
+        "operations": operations,
+        "seconds": seconds,
+        "throughput": operations / seconds if seconds > 0 else 0.0,
+        "latency": {name: latency(samples[name]) for name in names},
+    }
+
+
+def run(kind: str = "ctrie",
+        mix: str = "read-heavy",
+        shape: str = "hash",
+        access: str = "uniform",
+        records: int = 10000,
+        operations: int = 10000,
+        path: Optional[str] = None,
+        word: Sequence[int] = (2, ),
+        cachemax: int = 10**6,
+        value_size: int = VALUE_SIZE,
+        seed: int = 0) -> Dict[str, Any]:
+    """Load records then run operations against a new object, stores are
+    created under path, or a scratch directory removed afterwards
+    """
+    assert kind in TARGETS, f"unknown target '{kind}'"
+    assert mix in MIXES, f"unknown mix '{mix}'"
+    if path is None:
+        with TemporaryDirectory() as temp:
+            return run(kind=kind, mix=mix, shape=shape, access=access,
+                       records=records, operations=operations,
+                       path=os.path.join(temp, kind), word=word,
+                       cachemax=cachemax, value_size=value_size, seed=seed)
+    keys: keyspace = keyspace(shape=shape, access=access, seed=seed)
+    base: int = rss()
+    tgt: target = TARGETS[kind](path, word, cachemax)
+    value: bytes = keys.value(value_size)
+    begin: float = perf_counter()
+    for key in keys.load(records):
+        tgt.put(key, value)
+    seconds: float = perf_counter() - begin
+    result: Dict[str, Any] = {
+        "target": kind,
+        "mix": mix,
+        "shape": shape,
+        "access": access,
+        "word": list(word),
+        "cachemax": cachemax,
+        "records": records,
+        "value_size": value_size,
+        "load": {
+            "seconds": seconds,
+            "throughput": records / seconds if seconds > 0 else 0.0,
+        },
+    }
+    result["run"] = execute(tgt, keys, MIXES[mix], operations, value_size)
+    result["rss"] = rss()
+    result["rss_delta"] = max(result["rss"] - base, 0)
+    tgt.close()
+    result["disk"] = tgt.disk
+    return result
+
+
+def run_store(path: str,
+              mix: str = "read-only",
+              access: str = "uniform",
+              records: int = 10000,
+              operations: int = 10000,
+              cachemax: int = 10**6,
+              seed: int = 0) -> Dict[str, Any]:
+    """Run a mix read-only against an existing ctrie, accessing the first
+    records keys in order
+    """
+    assert mix in READONLY, f"mix '{mix}' writes, use one of {READONLY}"
+    root: ctrie = ctrie(path=path, cachemax=cachemax, readonly=True)
+    assert mix != "scan" or not root.binary, "cannot scan binary keys"
+    keys: keyspace = keyspace(access=access, seed=seed)
+    base: int = rss()
+    begin: float = perf_counter()
+    keys.adopt(islice(root.scan(), records))
+    seconds: float = perf_counter() - begin
+    result: Dict[str, Any] = {
+        "target": "ctrie",
+        "mix": mix,
+        "shape": "store",
+        "access": access,
+        "path": path,
+        "cachemax": cachemax,
+        "records": len(keys),
+        "load": {
+            "seconds": seconds,
+            "throughput": len(keys) / seconds if seconds > 0 else 0.0,
+        },
+    }
+    result["run"] = execute(target(root, path=path), keys, MIXES[mix],
+                            operations, readonly=True)
+    result["rss"] = rss()
+    result["rss_delta"] = max(result["rss"] - base, 0)
+    result["disk"] = target(None, path=path).disk
+    return result
+
+
+def suite(kinds: Iterable[str] = tuple(TARGETS),
+          mixes: Iterable[str] = tuple(MIXES),
+          shapes: Iterable[str] = SHAPES,
+          accesses: Iterable[str] = ACCESS,
+          words: Iterable[Sequence[int]] = ((2, ), ),
+          caches: Iterable[int] = (10**6, ),
+          records: int = 10000,
+          operations: int = 10000,
+          seed: int = 0) -> Iterator[Dict[str, Any]]:
+    """Run every combination, words and caches only vary for ctrie
+    """
+    for kind in kinds:
+        for mix in mixes:
+            for shape in shapes:
+                for access in accesses:
+                    for word in words if kind == "ctrie" else ((2, ), ):
+                        for cachemax in caches if kind == "ctrie" else \
+                                (10**6, ):
+                            yield run(kind=kind, mix=mix, shape=shape,
+                                      access=access, records=records,
+                                      operations=operations, word=word,
+                                      cachemax=cachemax, seed=seed)
+
+
+def dumps(results: Iterable[Dict[str, Any]]) -> str:
+    return json.dumps(list(results), indent=2)
@@ -0,0 +1,143 @@
+# coding:utf-8
+
+import os
+from random import Random
+import shutil
+from tempfile import TemporaryDirectory
+from time import perf_counter
+from typing import Any
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Sequence
+
+from ..store import mhdl
+from ..trie import ctrie
+from ..trie import testhex
+from ..utils import profile
+from .keys import keyspace
+from .target import target
+
+CRASHES = ("backup", "rename")
+
+
+def build(path: str,
+          records: int = 100000,
+          word: Sequence[int] = (2, ),
+          fragmentation: float = 0.0,
+          value_size: int = 100,
+          seed: int = 0) -> Dict[str, str]:
+    """Create a store of hash keys, then overwrite a fragmentation ratio
+    of them so logs hold dead records, return a key of every shard
+    """
+    assert 0.0 <= fragmentation, f"fragmentation {fragmentation} error"
+    keys: keyspace = keyspace(shape="hash", access="uniform", seed=seed)
+    root: ctrie = ctrie(path=path, word=word, test=testhex, readonly=False)
+    length: int = sum(word)
+    samples: Dict[str, str] = {}
+    for key in keys.load(records):
+        root[key] = keys.value(value_size)
+        samples.setdefault(key[:length], key)
+    for _ in range(int(records * fragmentation)):
+        key = keys.choose()
+        assert key is not None
+        root[key] = keys.value(value_size)
+    del root
+    return samples
+
+
+def crash(path: str, ratio: float = 0.1, mode: str = "backup",
+          seed: int = 0) -> int:
+    """Leave shards as a crash in the middle of gc would, return the
+    number of shards changed
+
+    - backup: index and datas moved to backups, nothing renamed back
+    - rename: the new index renamed in place, datas still backed up
+    """
+    assert mode in CRASHES, f"unknown crash mode '{mode}'"
+    paths: List[str] = sorted(
+        os.path.join(d, f[:-4]) for d, _, files in os.walk(path)
+        for f in files if f.endswith(".idx"))
+    rand: Random = Random(seed)
+    count: int = 0
+    for base in rand.sample(paths, int(len(paths) * ratio)):
+        ipath: str = f"{base}.idx"
+        dpath: str = f"{base}.dat"
+        if not os.path.isfile(dpath):
+            continue
+        shutil.move(ipath, mhdl.get_bakpath(ipath))
+        shutil.move(dpath, mhdl.get_bakpath(dpath))
+        if mode == "rename":
+            shutil.copyfile(mhdl.get_bakpath(ipath), ipath)
+        count += 1
+    return count
+
+
+def measure(path: str, samples: Dict[str, str],
+            readonly: bool = False) -> Dict[str, Any]:
+    """Restart the store and read a key of every shard
+
+    Times are seconds since the restart began: open (names loaded), first
+    read and full warm (every shard opened). Stage totals of opening the
+    shards come from the tracing spans. The OS page cache is not dropped,
+    so files are warm.
+    """
+    with profile() as prof:
+        begin: float = perf_counter()
+        root: ctrie = ctrie(path=path, readonly=readonly)
+        opened: float = perf_counter() - begin
+        first: Optional[float] = None
+        for key in samples.values():
+            assert isinstance(root[key], bytes)
+            if first is None:
+                first = perf_counter() - begin
+        warm: float = perf_counter() - begin
+    stages: Dict[str, Dict[str, float]] = prof.report()
+    result: Dict[str, Any] = {
+        "open": opened,
+        "first_read": first or opened,
+        "full_warm": warm,
+        "stages": {
+            stage: stages.get(f"get/route/{stage}", {}).get("total", 0.0)
+            for stage in ("restore", "open", "replay", "gc")
+        },
+    }
+    return result
+
+
+def startup(records: int = 100000,
+            word: Sequence[int] = (2, ),
+            fragmentation: float = 0.0,
+            crashed: float = 0.0,
+            mode: str = "backup",
+            readonly: bool = False,
+            path: Optional[str] = None,
+            seed: int = 0) -> Dict[str, Any]:
+    """Build a store, time a clean restart, then leave a crashed ratio of
+    shards mid-gc and time the recovering restart
+    """
+    if path is None:
+        with TemporaryDirectory() as temp:
+            return startup(records=records, word=word,
+                           fragmentation=fragmentation, crashed=crashed,
+                           mode=mode, readonly=readonly,
+                           path=os.path.join(temp, "startup"), seed=seed)
+    begin: float = perf_counter()
+    samples: Dict[str, str] = build(path, records=records, word=word,
+                                    fragmentation=fragmentation, seed=seed)
+    result: Dict[str, Any] = {
+        "target": "startup",
+        "word": list(word),
+        "records": records,
+        "shards": len(samples),
+        "fragmentation": fragmentation,
+        "readonly": readonly,
+        "build": perf_counter() - begin,
+        "disk": target(None, path=path).disk,
+        "restart": measure(path, samples, readonly=readonly),
+    }
+    if crashed > 0.0:
+        result["crash"] = mode
+        result["crashed"] = crash(path, ratio=crashed, mode=mode, seed=seed)
+        result["recovery"] = measure(path, samples, readonly=readonly)
+    return result
@@ -0,0 +1,99 @@
+# coding:utf-8
+
+import gc
+import os
+from typing import Any
+from typing import Callable
+from typing import Dict
+from typing import Optional
+from typing import Sequence
+
+from ..trie import ctrie
+from ..trie import htrie
+from ..trie import radix
+from ..trie import testhex
+from ..trie.ctree import store
+
+
+class target:
+    """Uniform operations over a benchmarked object
+    """
+
+    def __init__(self, root: Any, path: Optional[str] = None):
+        self.__root: Any = root
+        self.__path: Optional[str] = path
+
+    @property
+    def root(self) -> Any:
+        return self.__root
+
+    def get(self, key: str) -> bytes:
+        return self.__root[key]
+
+    def put(self, key: str, value: bytes):
+        self.__root[key] = value
+
+    def delete(self, key: str):
+        del self.__root[key]
+
+    def scan(self, prefix: str, limit: int) -> int:
+        """Read up to limit keys starting with prefix
+        """
+        count: int = 0
+        for _ in self.__root.match(f"{prefix}*"):
+            count += 1
+            if count >= limit:
+                break
+        return count
+
+    def close(self):
+        """Drop the object, flushing persistent ones
+        """
+        self.__root = None
+        gc.collect()
+
+    @property
+    def disk(self) -> int:
+        """Bytes of all files under the path, 0 for memory objects
+        """
+        if self.__path is None:
+            return 0
+        return sum(
+            os.path.getsize(os.path.join(d, f))
+            for d, _, files in os.walk(self.__path) for f in files)
+
+
+def open_radix(path: str, word: Sequence[int], cachemax: int) -> target:
+    return target(radix(test=testhex))
+
+
+def open_htrie(path: str, word: Sequence[int], cachemax: int) -> target:
+    return target(htrie())
+
+
+def open_store(path: str, word: Sequence[int], cachemax: int) -> target:
+    os.makedirs(path, exist_ok=True)
+    return target(store(name="",
+                        ipath=os.path.join(path, "bench.idx"),
+                        dpath=os.path.join(path, "bench.dat"),
+                        test=testhex,
+                        readonly=False),
+                  path=path)
+
+
+def open_ctrie(path: str, word: Sequence[int], cachemax: int) -> target:
+    return target(ctrie(path=path,
+                        word=word,
+                        test=testhex,
+                        cachemax=cachemax,
+                        readonly=False),
+                  path=path)
+
+
+# word and cachemax only apply to ctrie
+TARGETS: Dict[str, Callable[[str, Sequence[int], int], target]] = {
+    "radix": open_radix,
+    "htrie": open_htrie,
+    "store": open_store,
+    "ctrie": open_ctrie,
+}
@@ -11,6 +11,7 @@ from xarg import run_command
 from ..utils import __prog__
 from ..utils import __url_home__
 from ..utils import __version__
+from .bench import add_cmd as add_cmd_bench
 from .get import add_cmd as add_cmd_get
 from .init import add_cmd as add_cmd_init
 from .list import add_cmd as add_cmd_list
@@ -24,7 +25,7 @@ def add_cmd(_arg: argp):
 
 
 @run_command(add_cmd, add_cmd_init, add_cmd_list, add_cmd_set, add_cmd_get,
-             add_cmd_del)
+             add_cmd_del, add_cmd_bench)
 def run_cmd(cmds: commands) -> int:
     return 0
 
@@ -1,7 +1,11 @@
 # coding:utf-8
 
+from typing import Union
+
 from xarg import argp
 
+from ..trie import ctrie
+
 
 def add_path(_arg: argp):
     _arg.add_argument("-p",
@@ -18,6 +22,16 @@ def add_keys(_arg: argp):
     _arg.add_pos("keys", type=str, nargs="+", metavar="KEY")
 
 
+def parse_key(root: ctrie, key: str) -> Union[str, bytes]:
+    """Keys of binary stores are given in hex on the command line
+    """
+    return bytes.fromhex(key) if root.binary else key
+
+
+def print_key(key: Union[str, bytes]) -> str:
+    return key.hex() if isinstance(key, bytes) else key
+
+
 def add_decode(_arg: argp):
     _arg.add_argument("--decode",
                       type=str,
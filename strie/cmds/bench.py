@@ -0,0 +1,213 @@
+# coding:utf-8
+
+import json
+import os
+from typing import Any
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Sequence
+
+from xarg import add_command
+from xarg import argp
+from xarg import commands
+from xarg import run_command
+
+from ..bench import ACCESS
+from ..bench import CRASHES
+from ..bench import MIXES
+from ..bench import READONLY
+from ..bench import SHAPES
+from ..bench import TARGETS
+from ..bench import compare
+from ..bench import load
+from ..bench import replay
+from ..bench import run_store
+from ..bench import save
+from ..bench import startup
+from ..bench import suite
+from ..bench.history import MAX_DROP
+from ..bench.history import MAX_RISE
+from ..utils import __prog_bench__
+from ..utils import __url_home__
+from ..utils import __version__
+
+
+@add_command("bench")
+def add_cmd(_arg: argp):
+    _arg.add_argument("--store",
+                      type=str,
+                      nargs="?",
+                      const=".",
+                      default=None,
+                      metavar="DIR",
+                      help="Run read-only against an existing store, "
+                      "default is new objects in a scratch directory")
+    _arg.add_argument("--target",
+                      type=str,
+                      nargs="+",
+                      default=["ctrie"],
+                      choices=list(TARGETS),
+                      help="Benchmarked objects, default is ctrie")
+    _arg.add_argument("--mix",
+                      type=str,
+                      nargs="+",
+                      default=None,
+                      choices=list(MIXES),
+                      help="Workload mixes, default is all that apply")
+    _arg.add_argument("--shape",
+                      type=str,
+                      nargs="+",
+                      default=["hash"],
+                      choices=list(SHAPES),
+                      help="Key shapes, default is hash")
+    _arg.add_argument("--access",
+                      type=str,
+                      nargs="+",
+                      default=["zipfian"],
+                      choices=list(ACCESS),
+                      help="Key access distributions, default is zipfian")
+    _arg.add_argument("-w",
+                      "--word",
+                      type=int,
+                      nargs="+",
+                      default=[2],
+                      metavar="LEN",
+                      help="ctrie character split length, default is 2")
+    _arg.add_argument("--cachesize",
+                      type=int,
+                      nargs="+",
+                      default=[10**6],
+                      metavar="SIZE",
+                      help="ctrie cache max sizes, default is 1000000")
+    _arg.add_argument("--records",
+                      type=int,
+                      default=10000,
+                      metavar="N",
+                      help="Keys loaded before running, default is 10000")
+    _arg.add_argument("--operations",
+                      type=int,
+                      default=10000,
+                      metavar="N",
+                      help="Operations per workload, default is 10000")
+    group = _arg.argument_group("startup and recovery")
+    group.add_argument("--startup",
+                       action="store_true",
+                       help="Time restarts of a new store instead")
+    group.add_argument("--fragmentation",
+                       type=float,
+                       default=0.0,
+                       metavar="RATIO",
+                       help="Ratio of records overwritten after loading")
+    group.add_argument("--crash",
+                       type=float,
+                       default=0.0,
+                       metavar="RATIO",
+                       help="Ratio of shards left mid-gc before recovery")
+    group.add_argument("--crash-mode",
+                       type=str,
+                       default=CRASHES[0],
+                       choices=list(CRASHES),
+                       help=f"Where gc stopped, default is {CRASHES[0]}")
+    group = _arg.argument_group("trace replay")
+    group.add_argument("--replay",
+                       type=str,
+                       default=None,
+                       metavar="TRACE",
+                       help="Replay a recorded trace against a new store")
+    group.add_argument("--speed",
+                       type=float,
+                       default=0.0,
+                       metavar="X",
+                       help="Multiple of the recorded pace, default 0 "
+                       "is as fast as possible")
+    _arg.add_argument("--save",
+                      type=str,
+                      default=None,
+                      metavar="FILE",
+                      help="Save results with environment metadata")
+    _arg.add_argument("--baseline",
+                      type=str,
+                      default=None,
+                      metavar="FILE",
+                      help="Compare against saved results, exit 1 if any "
+                      "regression")
+    _arg.add_argument("--max-drop",
+                      type=float,
+                      default=MAX_DROP * 100,
+                      metavar="PCT",
+                      help="Allowed throughput drop, default is "
+                      f"{MAX_DROP:.0%}")
+    _arg.add_argument("--max-rise",
+                      type=float,
+                      default=MAX_RISE * 100,
+                      metavar="PCT",
+                      help=f"Allowed p99 rise, default is {MAX_RISE:.0%}")
+
+
+@run_command(add_cmd)
+def run_cmd(cmds: commands) -> int:
+    results: List[Dict[str, Any]] = []
+    if cmds.args.replay is not None:
+        for cachemax in cmds.args.cachesize:
+            results.append(
+                replay(trace=cmds.args.replay,
+                       speed=cmds.args.speed,
+                       word=cmds.args.word,
+                       cachemax=cachemax))
+    elif cmds.args.startup:
+        results.append(
+            startup(records=cmds.args.records,
+                    word=cmds.args.word,
+                    fragmentation=cmds.args.fragmentation,
+                    crashed=cmds.args.crash,
+                    mode=cmds.args.crash_mode))
+    elif cmds.args.store is not None:
+        assert os.path.isdir(cmds.args.store), \
+            f"Non-existent dir {cmds.args.store}"
+        for mix in cmds.args.mix or ["read-only"]:
+            assert mix in READONLY, f"mix '{mix}' writes, use {READONLY}"
+            for access in cmds.args.access:
+                for cachemax in cmds.args.cachesize:
+                    results.append(
+                        run_store(path=cmds.args.store,
+                                  mix=mix,
+                                  access=access,
+                                  records=cmds.args.records,
+                                  operations=cmds.args.operations,
+                                  cachemax=cachemax))
+    else:
+        results.extend(
+            suite(kinds=cmds.args.target,
+                  mixes=cmds.args.mix or [m for m in MIXES
+                                          if m != "read-only"],
+                  shapes=cmds.args.shape,
+                  accesses=cmds.args.access,
+                  words=[cmds.args.word],
+                  caches=cmds.args.cachesize,
+                  records=cmds.args.records,
+                  operations=cmds.args.operations))
+    cmds.stdout(json.dumps(results, indent=2))
+    if cmds.args.save is not None:
+        save(cmds.args.save, results)
+    if cmds.args.baseline is not None:
+        regressions: List[str] = compare(
+            results,
+            load(cmds.args.baseline)["results"],
+            max_drop=cmds.args.max_drop / 100,
+            max_rise=cmds.args.max_rise / 100)
+        for regression in regressions:
+            cmds.stderr(f"regression {regression}")
+        if len(regressions) > 0:
+            return 1
+    return 0
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    cmds = commands()
+    cmds.version = __version__
+    return cmds.run(root=add_cmd,
+                    argv=argv,
+                    prog=__prog_bench__,
+                    description="String trie command line.",
+                    epilog=f"For more, please visit {__url_home__}.")
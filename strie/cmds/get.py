@@ -16,6 +16,7 @@ from ..utils import __version__
 from .arg import add_decode
 from .arg import add_keys
 from .arg import add_path
+from .arg import parse_key
 
 
 @add_command("get")
@@ -29,12 +30,12 @@ def add_cmd(_arg: argp):
 def run_cmd(cmds: commands) -> int:
     assert os.path.isdir(cmds.args.path), f"Non-existent dir {cmds.args.path}"
     root = ctrie(path=cmds.args.path, readonly=True)
-    for key in cmds.args.keys:
-        value: bytes = root[key]
+    keys = [parse_key(root, key) for key in cmds.args.keys]
+    for value in root.get_many(keys):
         if cmds.args.decode is not None:
             cmds.stdout(value.decode(cmds.args.decode))
         else:
-            cmds.stdout(str(root[key]))
+            cmds.stdout(str(value))
     return 0
 
 
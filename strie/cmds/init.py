@@ -42,6 +42,11 @@ def add_cmd(_arg: argp):
         const=testakey.alnum,
         action="store_const",
         help="alpha-numeric keys allowed characters: 0-9, A-Z, a-z")
+    mgroup.add_argument("--bin",
+                        dest="keys",
+                        const=testakey.bin,
+                        action="store_const",
+                        help="binary keys, given in hex on the command line")
     mgroup.add_argument("-k",
                         "--key",
                         type=str,
@@ -4,6 +4,7 @@ import os
 from typing import List
 from typing import Optional
 from typing import Sequence
+from typing import Union
 
 from xarg import add_command
 from xarg import argp
@@ -14,8 +15,10 @@ from ..trie import ctrie
 from ..utils import __prog_list__
 from ..utils import __url_home__
 from ..utils import __version__
+from ..utils import keytobin
 from .arg import add_decode
 from .arg import add_path
+from .arg import print_key
 
 
 @add_command("list")
@@ -31,6 +34,11 @@ def add_cmd(_arg: argp):
                       help=f"Specify cache max size, default is {def_csize}")
     _arg.add_opt_on("--value", help="Output key and value, default only key")
     _arg.add_opt_on("--count", help="Output count starting from 1")
+    _arg.add_argument("--match",
+                      type=str,
+                      default=None,
+                      metavar="GLOB",
+                      help="Only output keys matching the glob pattern")
     add_decode(_arg)
 
 
@@ -42,19 +50,42 @@ def run_cmd(cmds: commands) -> int:
                  cachemax=cmds.args.cachesize,
                  readonly=True)
 
+    def fetch(keys: List[Union[str, bytes]]):
+        # values of matched keys read per shard with coalesced reads
+        if not cmds.args.value:
+            yield from keys
+        elif len(keys) > 0:
+            yield from zip(keys, root.get_many(keys))
+
+    def scan():
+        # scan without evicting the caches, values read in offset order
+        if cmds.args.match is None:
+            yield from root.scan(values=cmds.args.value,
+                                 readahead=root.SCAN_READAHEAD)
+            return
+        keys: List[Union[str, bytes]] = []
+        for key in root.match(cmds.args.match):
+            keys.append(keytobin(key) if root.binary else key)
+            if len(keys) >= 1024:
+                yield from fetch(keys)
+                keys = []
+        yield from fetch(keys)
+
     count: int = 0
-    for key in root:
+    for item in scan():
         count += 1
         items: List[str] = []
         if cmds.args.count:
             items.append(str(count))
-        items.append(key)
         if cmds.args.value:
-            value: bytes = root[key]
+            key, value = item
+            items.append(print_key(key))
             if cmds.args.decode is not None:
                 items.append(value.decode(cmds.args.decode))
             else:
-                items.append(str(root[key]))
+                items.append(str(value))
+        else:
+            items.append(print_key(item))
         cmds.stdout(" ".join(items))
 
     return 0
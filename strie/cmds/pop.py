@@ -15,6 +15,7 @@ from ..utils import __url_home__
 from ..utils import __version__
 from .arg import add_keys
 from .arg import add_path
+from .arg import parse_key
 
 
 @add_command("pop")
@@ -28,13 +29,15 @@ def run_cmd(cmds: commands) -> int:
     assert os.path.isdir(cmds.args.path), f"Non-existent dir {cmds.args.path}"
     root = ctrie(path=cmds.args.path, readonly=False)
     for key in cmds.args.keys:
-        if key in root:
-            # value = root[key]
-            del root[key]
+        item = parse_key(root, key)
+        if item in root:
+            # value = root[item]
+            del root[item]
             cmds.stdout(f"Deleted {key}.")
         else:
             cmds.stderr(f"Non-existent {key}.")
-        assert key not in root, f"pop key '{key}' error"
+        assert item not in root, f"pop key '{key}' error"
+    root.close()
     return 0
 
 
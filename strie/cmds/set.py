@@ -15,6 +15,7 @@ from ..utils import __url_home__
 from ..utils import __version__
 from .arg import add_encode
 from .arg import add_path
+from .arg import parse_key
 
 
 @add_command("set")
@@ -33,7 +34,8 @@ def run_cmd(cmds: commands) -> int:
     val: str = cmds.args.val[0]
     assert isinstance(key, str), f"unexpected type: {type(key)}"
     assert isinstance(val, str), f"unexpected type: {type(val)}"
-    root[key] = val.encode(cmds.args.encode)
+    root[parse_key(root, key)] = val.encode(cmds.args.encode)
+    root.close()
     return 0
 
 
@@ -1,7 +1,10 @@
 # coding:utf-8
 
+from .bfile import bloom
 from .dfile import dhdl
 from .dfile import didx
+from .dfile import idxcodec
 from .dfile import ihdl
 from .mfile import mhdl
 from .nfile import nhdl
+from .tfile import recorder
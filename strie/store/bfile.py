@@ -0,0 +1,224 @@
+# coding:utf-8
+
+from ctypes import Structure
+from ctypes import addressof
+from ctypes import c_char
+from ctypes import c_double
+from ctypes import c_uint8
+from ctypes import c_uint64
+from ctypes import memmove
+from ctypes import sizeof
+import hashlib
+import math
+import os
+from typing import Iterable
+from typing import Iterator
+from typing import Optional
+from typing import Tuple
+
+from ..utils import keytobin
+
+uint8_t = c_uint8
+uint64_t = c_uint64
+double_t = c_double
+
+
+class bloom:
+    """Bloom filter of keys, with an optional filter of key prefixes
+
+    Keys can only be added, deleted keys stay as false positives until the
+    filter is reset. The file stores a stamp of the index file (size and
+    modification time) when it was dumped, a filter whose stamp no longer
+    matches is stale.
+    """
+
+    MAGIC = b"\x3a\x42\xc5\x4c\x6f\x5c\x6d\xa3"
+    SIZE_MAGIC = len(MAGIC)
+    MIN_CAPACITY = 1024
+    FPR = 0.01
+
+    class head(Structure):
+
+        _fields_ = [
+            ("stamp", uint64_t),
+            ("count", uint64_t),
+            ("capacity", uint64_t),
+            ("fpr", double_t),
+            ("prefix", uint8_t),
+        ]
+
+    SIZE_HEAD = sizeof(head)
+
+    def __init__(self,
+                 path: str,
+                 capacity: int = MIN_CAPACITY,
+                 fpr: float = FPR,
+                 prefix: int = 0):
+        assert isinstance(path, str), f"unexpected type: {type(path)}"
+        assert isinstance(capacity, int), f"unexpected type: {type(capacity)}"
+        assert 0.0 < fpr < 1.0, f"false positive rate {fpr} error"
+        assert 0 <= prefix < 256, f"prefix length {prefix} not in [0, 256)"
+        self.__path: str = path
+        self.__fpr: float = fpr
+        self.__prefix: int = prefix
+        self.__modify: bool = False
+        self.__alloc(capacity)
+
+    def __alloc(self, capacity: int):
+        capacity = max(capacity, self.MIN_CAPACITY)
+        nbits: int = math.ceil(-capacity * math.log(self.__fpr) /
+                               math.log(2)**2)
+        self.__capacity: int = capacity
+        self.__count: int = 0
+        self.__nbits: int = (nbits + 7) // 8 * 8
+        self.__hashes: int = max(1, round(nbits / capacity * math.log(2)))
+        self.__keys: bytearray = bytearray(self.__nbits // 8)
+        self.__pres: bytearray = bytearray(
+            self.__nbits // 8 if self.__prefix > 0 else 0)
+
+    @property
+    def path(self) -> str:
+        return self.__path
+
+    @property
+    def fpr(self) -> float:
+        return self.__fpr
+
+    @property
+    def prefix(self) -> int:
+        return self.__prefix
+
+    @property
+    def capacity(self) -> int:
+        return self.__capacity
+
+    @property
+    def modify(self) -> bool:
+        return self.__modify
+
+    def __len__(self) -> int:
+        return self.__count
+
+    def __bits(self, key: str) -> Iterator[int]:
+        digest: bytes = hashlib.blake2b(keytobin(key), digest_size=16).digest()
+        h1: int = int.from_bytes(digest[:8], "little")
+        h2: int = int.from_bytes(digest[8:], "little") | 1
+        for i in range(self.__hashes):
+            yield (h1 + i * h2) % self.__nbits
+
+    def __test(self, bits: bytearray, key: str) -> bool:
+        for i in self.__bits(key):
+            if not bits[i >> 3] & (1 << (i & 7)):
+                return False
+        return True
+
+    def __set(self, bits: bytearray, key: str):
+        for i in self.__bits(key):
+            bits[i >> 3] |= 1 << (i & 7)
+
+    def __contains__(self, key: str) -> bool:
+        if self.__prefix > 0 and len(key) >= self.__prefix and \
+                not self.__test(self.__pres, key[:self.__prefix]):
+            return False
+        return self.__test(self.__keys, key)
+
+    def may_prefix(self, prefix: str) -> bool:
+        """False only if no key starts with prefix, which must be at least
+        as long as the prefix filter
+        """
+        assert len(prefix) >= self.__prefix > 0, \
+            f"prefix '{prefix}' shorter than {self.__prefix}"
+        return self.__test(self.__pres, prefix[:self.__prefix])
+
+    def add(self, key: str):
+        assert isinstance(key, str), f"unexpected type: {type(key)}"
+        self.__set(self.__keys, key)
+        if self.__prefix > 0 and len(key) >= self.__prefix:
+            self.__set(self.__pres, key[:self.__prefix])
+        self.__count += 1
+        self.__modify = True
+
+    @property
+    def full(self) -> bool:
+        return self.__count > self.__capacity
+
+    def reset(self, keys: Iterable[str], capacity: int):
+        """Rebuild from keys in place, drop deleted keys and resize
+        """
+        self.__alloc(capacity)
+        for key in keys:
+            self.add(key)
+        self.__modify = True
+
+    @classmethod
+    def stamp(cls, path: str) -> int:
+        """Stamp of a file, 0 if missing
+        """
+        if not os.path.isfile(path):
+            return 0
+        stat = os.stat(path)
+        return hash((stat.st_size, stat.st_mtime_ns)) & (2**64 - 1) or 1
+
+    def dump(self, stamp: int) -> bool:
+        """Write the filter, replacing the file atomically
+        """
+        assert isinstance(stamp, int), f"unexpected type: {type(stamp)}"
+        head = self.head()
+        head.stamp = stamp
+        head.count = self.__count
+        head.capacity = self.__capacity
+        head.fpr = self.__fpr
+        head.prefix = self.__prefix
+        temp: str = f"{self.path}.tmp"
+        with open(temp, "wb") as hdl:
+            hdl.write(self.MAGIC + bytes(head) + bytes(self.__keys) +
+                      bytes(self.__pres))
+        os.replace(temp, self.path)
+        self.__modify = False
+        return True
+
+    @classmethod
+    def __read_head(cls, path: str) -> Optional[Tuple["bloom.head", int]]:
+        if not os.path.isfile(path):
+            return None
+        with open(path, "rb") as hdl:
+            ctx: bytes = hdl.read(cls.SIZE_MAGIC + cls.SIZE_HEAD)
+        if len(ctx) != cls.SIZE_MAGIC + cls.SIZE_HEAD or \
+                ctx[:cls.SIZE_MAGIC] != cls.MAGIC:
+            return None
+        head = cls.head()
+        ptr = (c_char * cls.SIZE_HEAD).from_buffer(
+            bytearray(ctx[cls.SIZE_MAGIC:]))
+        memmove(addressof(head), ptr, cls.SIZE_HEAD)
+        return head, len(ctx)
+
+    @classmethod
+    def load(cls,
+             path: str,
+             stamp: int,
+             fpr: float = FPR,
+             prefix: int = 0) -> Optional["bloom"]:
+        """Load a filter, None if missing, stale or built differently
+        """
+        res = cls.__read_head(path)
+        if res is None:
+            return None
+        head, begin = res
+        if stamp == 0 or head.stamp != stamp or head.fpr != fpr or \
+                head.prefix != prefix:
+            return None
+        obj: bloom = bloom(path=path,
+                           capacity=head.capacity,
+                           fpr=fpr,
+                           prefix=prefix)
+        size: int = len(obj.__keys)
+        with open(path, "rb") as hdl:
+            hdl.seek(begin)
+            keys: bytes = hdl.read(size)
+            pres: bytes = hdl.read(len(obj.__pres))
+        if len(keys) != size or len(pres) != len(obj.__pres):
+            return None
+        obj.__keys[:] = keys
+        obj.__pres[:] = pres
+        obj.__count = head.count
+        return obj
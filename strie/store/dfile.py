@@ -10,9 +10,14 @@ from ctypes import c_uint32
 from ctypes import c_uint64
 from ctypes import memmove
 from ctypes import sizeof
+from typing import List
 from typing import Optional
+from typing import Sequence
 from typing import Tuple
 
+from ..utils import bintokey
+from ..utils import codec
+from ..utils import keytobin
 from .mfile import mhdl
 
 uint8_t = c_uint8
@@ -27,6 +32,8 @@ class dhdl(mhdl):
 
     MAGIC = b"\x3a\x2c\xc5\xe2\x68\x5c\x12\xa3"
     SIZE_MAGIC = len(MAGIC)
+    READ_GAP = 4 * 1024  # bytes, merge ranges closer than 4k
+    READ_MAX = 1024**2  # bytes, 1m
 
     def __init__(self, path: str, readonly: bool = True):
         super().__init__(path=path, magic=self.MAGIC, readonly=readonly)
@@ -48,6 +55,34 @@ class dhdl(mhdl):
         assert self.tell() == offset, f"{self.tell()} != {offset}"
         return self.read(length)
 
+    def load_many(self, ranges: Sequence[Tuple[int, int]]) -> List[bytes]:
+        """Load (offset, length) ranges, aligned to input
+
+        Ranges are sorted by offset, neighbouring or overlapping ones are
+        merged into a single read and split back out afterwards.
+        """
+        order: List[int] = sorted(range(len(ranges)),
+                                  key=lambda i: ranges[i][0])
+        res: List[bytes] = [b""] * len(ranges)
+        index: int = 0
+        while index < len(order):
+            begin: int = ranges[order[index]][0]
+            end: int = begin + ranges[order[index]][1]
+            group: int = index + 1
+            while group < len(order):
+                offset, length = ranges[order[group]]
+                if offset > end + self.READ_GAP or \
+                        max(end, offset + length) - begin > self.READ_MAX:
+                    break
+                end = max(end, offset + length)
+                group += 1
+            view: memoryview = memoryview(self.load(begin, end - begin))
+            for i in order[index:group]:
+                offset, length = ranges[i]
+                res[i] = bytes(view[offset - begin:offset - begin + length])
+            index = group
+        return res
+
     def dump(self, value: bytes) -> int:
         length: int = len(value)
         assert self.write(value) == length, f"'{self.path}' write error"
@@ -126,6 +161,25 @@ class didx:
     def new(cls, offset: int, value: bytes) -> "didx":
         return didx(offset=offset, length=len(value), chksum=cls.calc(value))
 
+    def __reduce__(self):
+        return (didx, (self.offset, self.length, self.chksum))
+
+
+class idxcodec(codec[didx]):
+    """Datas index packed as 16 bytes
+    """
+
+    IDENT = 16
+
+    def encode(self, value: didx) -> bytes:
+        assert isinstance(value, didx), f"unexpected type: {type(value)}"
+        return value.dump()
+
+    def decode(self, datas: bytes) -> didx:
+        value: Optional[didx] = didx.load(datas)
+        assert isinstance(value, didx), f"unexpected type: {type(value)}"
+        return value
+
 
 class ihdl(mhdl):
     """Datas index file handle
@@ -164,7 +218,7 @@ class ihdl(mhdl):
         if length <= 0:
             return None, None
         assert length > 0, f"length {length} error"
-        key: str = self.read(length).decode()
+        key: str = bintokey(self.read(length))
         if res.delkey:
             return key, None
         idx = didx.load(self.read(didx.SIZE_DATA))
@@ -178,7 +232,7 @@ class ihdl(mhdl):
         res: ihdl.head = self.head()
         res.keylen = len(key)
         res.delkey = delete
-        dat: bytes = key.encode()
+        dat: bytes = keytobin(key)
         ctx: bytes = bytes(res) + dat
         num: int = self.SIZE_HEAD + len(dat)
         if not delete:
@@ -54,6 +54,10 @@ class mhdl:
         if self.__handle is not None and not self.readonly:
             os.fsync(self.__handle)
 
+    def flush(self):
+        if self.__handle is not None and not self.readonly:
+            self.__handle.flush()
+
     def clear(self) -> bool:
         assert not self.readonly, f"'{self.path}' is readonly"
         assert self.close(), f"close '{self.path}' failed"
@@ -15,6 +15,8 @@ from typing import List
 from typing import Sequence
 
 from ..utils import __prog__
+from ..utils import bintokey
+from ..utils import keytobin
 from ..utils import testakey
 from .mfile import mhdl
 
@@ -69,6 +71,9 @@ class nhdl(mhdl):
     def length(self) -> int:
         return self.__length
 
+    def __len__(self) -> int:
+        return len(self.__names)
+
     def __iter__(self):
         return iter(self.__names)
 
@@ -100,7 +105,11 @@ class nhdl(mhdl):
                 os.mkdir(path)
             assert os.path.isdir(path), \
                 f"'{path}' is not an existing directory"
-            path = os.path.join(path, name[:i])
+            # binary names are not valid file names, use hex
+            part: str = name[:i]
+            if self.test.binary:
+                part = keytobin(part).hex()
+            path = os.path.join(path, part)
             name = name[i:]
         return path
 
@@ -122,7 +131,9 @@ class nhdl(mhdl):
         if os.path.exists(file):
             return False
 
-        chrs: List[int] = [ord(i) for i in test.characters]
+        # no characters stored for binary keys, charn 0 stands for all 256
+        chrs: List[int] = [] if test.binary else \
+            [ord(i) for i in test.characters]
         numc: int = len(chrs)
         numw: int = len(word)
 
@@ -221,7 +232,8 @@ class nhdl(mhdl):
 
         head = read_head()
         sb = read_superblock(numc=head.charn, numw=head.wordn)
-        test: testakey = testakey(allowed_char={chr(c) for c in sb.chars})
+        test: testakey = testakey(allowed_char={chr(c) for c in sb.chars}
+                                  if head.charn > 0 else testakey.bin)
         word: Sequence[int] = tuple(w for w in sb.words)
         return nhdl(path=path, word=word, test=test, readonly=readonly)
 
@@ -231,7 +243,7 @@ class nhdl(mhdl):
             assert self.seek(self.SIZE_SUPER) == self.SIZE_SUPER
             # read all names
             while self.tell() < self.endpos:
-                name: str = self.read(self.length).decode()
+                name: str = bintokey(self.read(self.length))
                 assert self.read(self.SIZE_MAGIC) == self.MAGIC
                 self.__names[name] = self.get_path(name)
         return True
@@ -239,7 +251,7 @@ class nhdl(mhdl):
     def __dump(self, name: str) -> int:
         assert isinstance(name, str), f"unexpected type: {type(name)}"
         assert name not in self.__names, f"dump {name} error"
-        data: bytes = name.encode() + self.MAGIC
+        data: bytes = keytobin(name) + self.MAGIC
         length: int = len(data)
         assert length > self.SIZE_MAGIC, \
             f"length {length} less then {self.SIZE_MAGIC}"
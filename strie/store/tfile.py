@@ -0,0 +1,129 @@
+# coding:utf-8
+
+from ctypes import Structure
+from ctypes import addressof
+from ctypes import c_char
+from ctypes import c_double
+from ctypes import c_uint8
+from ctypes import memmove
+from ctypes import sizeof
+import struct
+from time import perf_counter
+from time import time
+from typing import BinaryIO
+from typing import Iterator
+from typing import Optional
+from typing import Tuple
+
+uint8_t = c_uint8
+double_t = c_double
+
+
+class recorder:
+    """Append-only trace of ctrie operations
+
+    Each record is an operation code, seconds since the trace began, the
+    value size (-1 if the key was missing) and the key. Records are packed
+    into a buffer and written in blocks, the trace is complete once closed.
+    Not thread-safe, like the ctrie it records.
+    """
+
+    MAGIC = b"\x3a\x54\xc5\x52\x63\x5c\x01\xa3"
+    SIZE_MAGIC = len(MAGIC)
+    GET = 0
+    SET = 1
+    POP = 2
+    CONTAINS = 3
+    OPS = ("get", "set", "pop", "contains")
+    MISSING = -1
+    RECORD = struct.Struct("<BdiI")  # op, time, size, key length
+    BLOCK = 64 * 1024  # bytes
+
+    class head(Structure):
+
+        _fields_ = [
+            ("begin", double_t),
+            ("binary", uint8_t),
+        ]
+
+    SIZE_HEAD = sizeof(head)
+
+    def __init__(self, path: str, binary: bool = False):
+        assert isinstance(path, str), f"unexpected type: {type(path)}"
+        head = self.head()
+        head.begin = time()
+        head.binary = binary
+        self.__path: str = path
+        self.__hdl: Optional[BinaryIO] = open(path, "wb")
+        self.__hdl.write(self.MAGIC + bytes(head))
+        self.__buffer: bytearray = bytearray()
+        self.__begin: float = perf_counter()
+        self.__count: int = 0
+
+    def __del__(self):
+        self.close()
+
+    def __len__(self) -> int:
+        return self.__count
+
+    @property
+    def path(self) -> str:
+        return self.__path
+
+    def add(self, op: int, key: str, size: int = MISSING):
+        assert self.__hdl is not None, f"trace {self.path} closed"
+        raw: bytes = key.encode("utf-8")
+        self.__buffer += self.RECORD.pack(op, perf_counter() - self.__begin,
+                                          size, len(raw))
+        self.__buffer += raw
+        self.__count += 1
+        if len(self.__buffer) >= self.BLOCK:
+            self.flush()
+
+    def flush(self):
+        if self.__hdl is not None and len(self.__buffer) > 0:
+            self.__hdl.write(self.__buffer)
+            self.__hdl.flush()
+            self.__buffer = bytearray()
+
+    def close(self):
+        if self.__hdl is not None:
+            self.flush()
+            self.__hdl.close()
+            self.__hdl = None
+
+    @classmethod
+    def open(cls, path: str) -> Tuple["recorder.head", BinaryIO]:
+        hdl: BinaryIO = open(path, "rb")
+        ctx: bytes = hdl.read(cls.SIZE_MAGIC + cls.SIZE_HEAD)
+        if len(ctx) != cls.SIZE_MAGIC + cls.SIZE_HEAD or \
+                ctx[:cls.SIZE_MAGIC] != cls.MAGIC:
+            hdl.close()
+            raise ValueError(f"'{path}' is not a trace")
+        head = cls.head()
+        ptr = (c_char * cls.SIZE_HEAD).from_buffer(
+            bytearray(ctx[cls.SIZE_MAGIC:]))
+        memmove(addressof(head), ptr, cls.SIZE_HEAD)
+        return head, hdl
+
+    @classmethod
+    def binary(cls, path: str) -> bool:
+        head, hdl = cls.open(path)
+        hdl.close()
+        return bool(head.binary)
+
+    @classmethod
+    def load(cls, path: str) -> Iterator[Tuple[str, str, int, float]]:
+        """Records as (op, key, size, seconds), a truncated tail is dropped
+        """
+        _, hdl = cls.open(path)
+        with hdl:
+            while True:
+                ctx: bytes = hdl.read(cls.RECORD.size)
+                if len(ctx) < cls.RECORD.size:
+                    break
+                op, seconds, size, length = cls.RECORD.unpack(ctx)
+                raw: bytes = hdl.read(length)
+                if len(raw) < length:
+                    break
+                yield cls.OPS[op], raw.decode("utf-8"), size, seconds
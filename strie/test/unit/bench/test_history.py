@@ -0,0 +1,76 @@
+# coding:utf-8
+
+import copy
+import os
+from tempfile import TemporaryDirectory
+import unittest
+
+from strie import ctrie
+from strie import testhex
+from strie.bench import compare
+from strie.bench import load
+from strie.bench import run
+from strie.bench import run_store
+from strie.bench import save
+
+
+class test_history(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.result = run(kind="radix", mix="read-heavy", records=100,
+                         operations=100)
+
+    @classmethod
+    def tearDownClass(cls):
+        pass
+
+    def setUp(self):
+        self.temp = TemporaryDirectory()
+
+    def tearDown(self):
+        self.temp.cleanup()
+
+    def test_save_load(self):
+        path = os.path.join(self.temp.name, "bench.json")
+        data = save(path, [self.result])
+        self.assertEqual(load(path), data)
+        self.assertEqual(data["results"][0]["target"], "radix")
+        for key in ("time", "version", "python", "platform", "cpus"):
+            self.assertIn(key, data["env"])
+        self.assertEqual(os.listdir(self.temp.name), ["bench.json"])
+
+    def test_compare(self):
+        self.assertEqual(compare([self.result], [self.result]), [])
+        slow = copy.deepcopy(self.result)
+        slow["run"]["throughput"] *= 0.5
+        slow["run"]["latency"]["read"]["p99"] *= 2
+        regressions = compare([slow], [self.result])
+        self.assertEqual(len(regressions), 2)
+        self.assertIn("throughput", regressions[0])
+        self.assertIn("read p99", regressions[1])
+        self.assertEqual(
+            compare([slow], [self.result], max_drop=0.6, max_rise=1.5), [])
+        other = copy.deepcopy(slow)
+        other["records"] = 1000
+        self.assertEqual(compare([other], [self.result]), [])
+
+    def test_run_store(self):
+        path = os.path.join(self.temp.name, "store")
+        run(kind="ctrie", records=100, operations=0, path=path, word=(1, ))
+        root = ctrie(path, readonly=True)
+        self.assertEqual(root.binary, False)
+        self.assertIs(testhex.check(next(iter(root.scan()))), True)
+        del root
+        res = run_store(path, records=50, operations=100)
+        self.assertEqual(res["records"], 50)
+        self.assertEqual(set(res["run"]["latency"]), {"read"})
+        self.assertEqual(res["run"]["latency"]["read"]["count"], 100)
+        res = run_store(path, mix="scan", operations=10)
+        self.assertEqual(res["run"]["latency"]["scan"]["count"], 10)
+        self.assertEqual(res["run"]["latency"]["insert"]["count"], 0)
+        self.assertRaises(AssertionError, run_store, path, mix="write-heavy")
+
+
+if __name__ == "__main__":
+    unittest.main()
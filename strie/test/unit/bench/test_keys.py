@@ -0,0 +1,74 @@
+# coding:utf-8
+
+from collections import Counter
+import unittest
+
+from strie.bench import ACCESS
+from strie.bench import SHAPES
+from strie.bench import keyspace
+from strie.trie import testhex
+
+
+class test_keyspace(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        pass
+
+    @classmethod
+    def tearDownClass(cls):
+        pass
+
+    def setUp(self):
+        pass
+
+    def tearDown(self):
+        pass
+
+    def test_shapes(self):
+        for shape in SHAPES:
+            keys = keyspace(shape=shape).load(1000)
+            self.assertEqual(len(set(keys)), 1000)
+            for key in keys:
+                self.assertEqual(len(key), 32)
+                self.assertTrue(testhex.check(key))
+        keys = keyspace(shape="sequential").load(3)
+        self.assertEqual(keys, [f"{i:032x}" for i in range(3)])
+        keys = keyspace(shape="prefix").load(1000)
+        self.assertEqual(len({key[:24] for key in keys}), keyspace.PREFIXES)
+
+    def test_deterministic(self):
+        for access in ACCESS:
+            a = keyspace(access=access, seed=1)
+            b = keyspace(access=access, seed=1)
+            self.assertEqual(a.load(100), b.load(100))
+            self.assertEqual([a.choose() for _ in range(100)],
+                             [b.choose() for _ in range(100)])
+
+    def test_zipfian(self):
+        keys = keyspace(access="zipfian")
+        keys.load(1000)
+        hits = Counter(keys.choose() for _ in range(10000))
+        top = sum(count for _, count in hits.most_common(10))
+        self.assertGreater(top, 10000 * 0.25)
+        keys = keyspace(access="uniform")
+        keys.load(1000)
+        hits = Counter(keys.choose() for _ in range(10000))
+        top = sum(count for _, count in hits.most_common(10))
+        self.assertLess(top, 10000 * 0.05)
+
+    def test_insert_delete(self):
+        keys = keyspace(access="sequential")
+        loaded = keys.load(10)
+        self.assertEqual(len(keys), 10)
+        self.assertNotIn(keys.insert(), loaded)
+        self.assertEqual(len(keys), 11)
+        deleted = {keys.delete() for _ in range(11)}
+        self.assertEqual(len(deleted), 11)
+        self.assertEqual(len(keys), 0)
+        self.assertIsNone(keys.delete())
+        self.assertIsNone(keys.choose())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,86 @@
+# coding:utf-8
+
+import os
+from tempfile import TemporaryDirectory
+import unittest
+
+from strie import ctrie
+from strie import recorder
+from strie import testhex
+from strie.bench import compare
+from strie.bench import preload
+from strie.bench import replay
+
+
+class test_replay(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        pass
+
+    @classmethod
+    def tearDownClass(cls):
+        pass
+
+    def setUp(self):
+        self.temp = TemporaryDirectory()
+        self.trace = os.path.join(self.temp.name, "ops.trc")
+        path = os.path.join(self.temp.name, "live")
+        root = ctrie(path, word=(1, ), test=testhex, readonly=False)
+        for i in range(100):
+            root[f"{i:08x}"] = bytes(i + 1)
+        del root
+        rec = recorder(self.trace)
+        root = ctrie(path, readonly=False, trace=rec)
+        for i in range(0, 100, 2):
+            self.assertEqual(len(root[f"{i:08x}"]), i + 1)
+        root.get_many([f"{i:08x}" for i in range(1, 9, 2)])
+        self.assertRaises(KeyError, root.__getitem__, "ffffffff")
+        self.assertIn("00000001", root)
+        self.assertNotIn("fffffff0", root)
+        root["abcdef00"] = b"new"
+        root["abcdef00"]
+        del root["00000002"]
+        rec.close()
+
+    def tearDown(self):
+        self.temp.cleanup()
+
+    def test_record(self):
+        records = list(recorder.load(self.trace))
+        self.assertEqual(len(records), 50 + 4 + 1 + 2 + 3)
+        self.assertEqual(records[0][:3], ("get", "00000000", 1))
+        self.assertEqual(records[50][:3], ("get", "00000001", 2))
+        self.assertEqual(records[54][:3], ("get", "ffffffff", -1))
+        self.assertEqual(records[55][:3], ("contains", "00000001", 0))
+        self.assertEqual(records[56][:3], ("contains", "fffffff0", -1))
+        self.assertEqual([r[:3] for r in records[57:]],
+                         [("set", "abcdef00", 3), ("get", "abcdef00", 3),
+                          ("pop", "00000002", -1)])
+
+    def test_preload(self):
+        keys = preload(self.trace)
+        self.assertEqual(len(keys), 50 + 4)
+        self.assertEqual(keys["00000007"], 8)
+        self.assertNotIn("ffffffff", keys)
+        self.assertNotIn("abcdef00", keys)
+
+    def test_replay(self):
+        res = replay(self.trace, word=(1, ))
+        self.assertEqual(res["records"], 54)
+        self.assertEqual(res["misses"], 2)
+        self.assertEqual(res["run"]["operations"], 60)
+        self.assertEqual(res["run"]["latency"]["get"]["count"], 56)
+        self.assertEqual(res["run"]["latency"]["pop"]["count"], 1)
+        self.assertGreater(res["caches"]["dcache"]["entries"], 0)
+        self.assertEqual(compare([res], [res]), [])
+        path = os.path.join(self.temp.name, "replay")
+        res = replay(self.trace, path=path, speed=1000.0, cachemax=10)
+        self.assertEqual(res["misses"], 2)
+        root = ctrie(path)
+        self.assertEqual(root["abcdef00"], bytes(3))
+        self.assertNotIn("00000002", root)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,76 @@
+# coding:utf-8
+
+import json
+import os
+from tempfile import TemporaryDirectory
+import unittest
+
+from strie.bench import MIXES
+from strie.bench import TARGETS
+from strie.bench import dumps
+from strie.bench import latency
+from strie.bench import run
+from strie.bench import suite
+
+
+class test_runner(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        pass
+
+    @classmethod
+    def tearDownClass(cls):
+        pass
+
+    def setUp(self):
+        pass
+
+    def tearDown(self):
+        pass
+
+    def test_latency(self):
+        self.assertEqual(latency([])["count"], 0)
+        stats = latency([i / 100 for i in range(100, 0, -1)])
+        self.assertEqual(stats["count"], 100)
+        self.assertEqual(stats["p50"], 0.51)
+        self.assertEqual(stats["p99"], 1.0)
+        self.assertEqual(stats["max"], 1.0)
+
+    def test_run(self):
+        for kind in TARGETS:
+            for mix in MIXES:
+                res = run(kind=kind, mix=mix, records=200, operations=200,
+                          word=(1, ))
+                self.assertEqual(res["target"], kind)
+                self.assertEqual(res["run"]["operations"], 200)
+                self.assertGreater(res["run"]["throughput"], 0)
+                self.assertEqual(set(res["run"]["latency"]), set(MIXES[mix]))
+                self.assertGreater(res["rss"], 0)
+                if kind in ("store", "ctrie"):
+                    self.assertGreater(res["disk"], 200 * 100)
+                else:
+                    self.assertEqual(res["disk"], 0)
+
+    def test_path(self):
+        with TemporaryDirectory() as temp:
+            path = os.path.join(temp, "bench")
+            res = run(kind="ctrie", records=100, operations=100, path=path)
+            self.assertTrue(os.path.isdir(path))
+            self.assertEqual(res["word"], [2])
+
+    def test_suite(self):
+        results = list(suite(kinds=("radix", "ctrie"),
+                             mixes=("read-heavy", ),
+                             shapes=("hash", ),
+                             accesses=("uniform", "zipfian"),
+                             words=((1, ), (2, )),
+                             caches=(10, 10**6),
+                             records=100,
+                             operations=100))
+        self.assertEqual(len(results), 2 + 2 * 2 * 2)
+        self.assertEqual(json.loads(dumps(results))[0]["target"], "radix")
+
+
+if __name__ == "__main__":
+    unittest.main()
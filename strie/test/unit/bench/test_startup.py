@@ -0,0 +1,75 @@
+# coding:utf-8
+
+import copy
+import os
+from tempfile import TemporaryDirectory
+from typing import List
+import unittest
+
+from strie.bench import build
+from strie.bench import compare
+from strie.bench import crash
+from strie.bench import measure
+from strie.bench import startup
+
+
+class test_startup(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        pass
+
+    @classmethod
+    def tearDownClass(cls):
+        pass
+
+    def setUp(self):
+        self.temp = TemporaryDirectory()
+        self.path = os.path.join(self.temp.name, "startup")
+
+    def tearDown(self):
+        self.temp.cleanup()
+
+    def files(self, suffix: str) -> List[str]:
+        return [f for _, _, fs in os.walk(self.path) for f in fs
+                if f.endswith(suffix)]
+
+    def test_crash(self):
+        samples = build(self.path, records=500, word=(1, ),
+                        fragmentation=0.5)
+        self.assertEqual(len(samples), 16)
+        self.assertEqual(len(self.files(".idx")), 16)
+        self.assertEqual(crash(self.path, ratio=0.5, mode="backup"), 8)
+        self.assertEqual(len(self.files(".idx")), 8)
+        self.assertEqual(len(self.files(".bak")), 16)
+        res = measure(self.path, samples)
+        self.assertGreater(res["stages"]["restore"], 0)
+        self.assertEqual(len(self.files(".idx")), 16)
+        self.assertEqual(self.files(".bak"), [])
+        self.assertEqual(crash(self.path, ratio=0.25, mode="rename", seed=1),
+                         4)
+        self.assertEqual(len(self.files(".idx")), 16)
+        self.assertEqual(len(self.files(".bak")), 8)
+        measure(self.path, samples, readonly=True)
+        self.assertEqual(self.files(".bak"), [])
+
+    def test_startup(self):
+        res = startup(records=300, word=(1, ), fragmentation=0.2,
+                      crashed=0.5)
+        self.assertEqual(res["shards"], 16)
+        self.assertEqual(res["crashed"], 8)
+        self.assertGreater(res["disk"], 300 * 100)
+        for phase in ("restart", "recovery"):
+            self.assertLessEqual(res[phase]["open"], res[phase]["first_read"])
+            self.assertLessEqual(res[phase]["first_read"],
+                                 res[phase]["full_warm"])
+            self.assertGreater(res[phase]["stages"]["replay"], 0)
+        self.assertNotIn("recovery", startup(records=100, word=(1, )))
+        self.assertEqual(compare([res], [res]), [])
+        slow = copy.deepcopy(res)
+        slow["recovery"]["full_warm"] *= 2
+        self.assertEqual(len(compare([slow], [res])), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,76 @@
+# coding:utf-8
+
+import os
+from tempfile import TemporaryDirectory
+import unittest
+
+from strie.store.bfile import bloom
+
+
+class test_bloom(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.keys = [f"key{i}" for i in range(2000)]
+
+    @classmethod
+    def tearDownClass(cls):
+        pass
+
+    def setUp(self):
+        self.temp = TemporaryDirectory()
+        self.path = os.path.join(self.temp.name, "test.blm")
+        self.stamp = os.path.join(self.temp.name, "test.idx")
+
+    def tearDown(self):
+        pass
+
+    def test_fpr(self):
+        filt = bloom(self.path, capacity=len(self.keys), fpr=0.01)
+        for key in self.keys:
+            filt.add(key)
+        self.assertEqual(len(filt), len(self.keys))
+        self.assertTrue(all(key in filt for key in self.keys))
+        miss = sum(f"miss{i}" in filt for i in range(10000))
+        self.assertLess(miss, 300)
+
+    def test_prefix(self):
+        filt = bloom(self.path, fpr=0.01, prefix=4)
+        for key in self.keys:
+            filt.add(key)
+        self.assertTrue(filt.may_prefix("key1"))
+        self.assertFalse(filt.may_prefix("none"))
+        self.assertNotIn("nonexistent", filt)
+        self.assertRaises(AssertionError, filt.may_prefix, "k")
+
+    def test_reset(self):
+        filt = bloom(self.path, capacity=1024)
+        for key in self.keys:
+            filt.add(key)
+        self.assertTrue(filt.full)
+        filt.reset(self.keys[:10], capacity=4096)
+        self.assertFalse(filt.full)
+        self.assertEqual(len(filt), 10)
+        self.assertEqual(filt.capacity, 4096)
+
+    def test_dump_load(self):
+        filt = bloom(self.path, prefix=3)
+        for key in self.keys[:100]:
+            filt.add(key)
+        self.assertEqual(bloom.stamp(self.stamp), 0)
+        with open(self.stamp, "wb") as hdl:
+            hdl.write(b"index")
+        stamp = bloom.stamp(self.stamp)
+        self.assertTrue(filt.dump(stamp))
+        self.assertFalse(filt.modify)
+        load = bloom.load(self.path, stamp, prefix=3)
+        self.assertIsInstance(load, bloom)
+        self.assertEqual(len(load), 100)
+        self.assertTrue(all(key in load for key in self.keys[:100]))
+        self.assertIsNone(bloom.load(self.path, stamp, prefix=0))
+        self.assertIsNone(bloom.load(self.path, stamp, fpr=0.1, prefix=3))
+        with open(self.stamp, "ab") as hdl:
+            hdl.write(b"more")
+        self.assertIsNone(bloom.load(self.path, bloom.stamp(self.stamp),
+                                     prefix=3))
+        self.assertIsNone(bloom.load(self.stamp, stamp))
@@ -1,5 +1,7 @@
 # coding:utf-8
 
+import os
+from tempfile import TemporaryDirectory
 import unittest
 
 from mock import PropertyMock
@@ -42,3 +44,26 @@ class test_didx(unittest.TestCase):
         with patch.object(didx, "chksum", mock_chksum):
             index = didx.new(self.offset, "test".encode())
             self.assertFalse(index.check())
+
+
+class test_dhdl(unittest.TestCase):
+
+    def setUp(self):
+        self.temp = TemporaryDirectory()
+        self.dhdl = dhdl(os.path.join(self.temp.name, "test.dat"),
+                         readonly=False)
+
+    def tearDown(self):
+        self.dhdl.close()
+
+    def test_load_many(self):
+        values = [str(i).encode() * (i + 1) for i in range(100)]
+        offsets = [self.dhdl.dump(value) for value in values]
+        big = self.dhdl.dump(bytes(dhdl.READ_MAX))
+        ranges = [(o, len(v)) for o, v in zip(offsets, values)][::-1]
+        ranges += [(big, dhdl.READ_MAX), ranges[0], (offsets[1], 1)]
+        with patch.object(self.dhdl, "load", wraps=self.dhdl.load) as load:
+            datas = self.dhdl.load_many(ranges)
+            self.assertEqual(load.call_count, 2)
+        self.assertEqual(datas, [self.dhdl.load(o, n) for o, n in ranges])
+        self.assertEqual(self.dhdl.load_many([]), [])
@@ -0,0 +1,72 @@
+# coding:utf-8
+
+import os
+from tempfile import TemporaryDirectory
+import unittest
+
+from strie.store.tfile import recorder
+
+
+class test_recorder(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        pass
+
+    @classmethod
+    def tearDownClass(cls):
+        pass
+
+    def setUp(self):
+        self.temp = TemporaryDirectory()
+        self.path = os.path.join(self.temp.name, "test.trc")
+
+    def tearDown(self):
+        self.temp.cleanup()
+
+    def test_record(self):
+        rec = recorder(self.path)
+        rec.add(recorder.SET, "key", 10)
+        rec.add(recorder.GET, "key", 10)
+        rec.add(recorder.GET, "\xff\x00测试")
+        rec.add(recorder.POP, "key")
+        rec.add(recorder.CONTAINS, "key")
+        self.assertEqual(len(rec), 5)
+        rec.close()
+        records = list(recorder.load(self.path))
+        self.assertEqual([r[:3] for r in records], [
+            ("set", "key", 10),
+            ("get", "key", 10),
+            ("get", "\xff\x00测试", -1),
+            ("pop", "key", -1),
+            ("contains", "key", -1),
+        ])
+        times = [r[3] for r in records]
+        self.assertEqual(times, sorted(times))
+        self.assertFalse(recorder.binary(self.path))
+        self.assertRaises(AssertionError, rec.add, recorder.GET, "key")
+
+    def test_block(self):
+        rec = recorder(self.path, binary=True)
+        size = os.path.getsize(self.path)
+        rec.add(recorder.GET, "key", 1)
+        self.assertEqual(os.path.getsize(self.path), size)
+        for _ in range(recorder.BLOCK // recorder.RECORD.size):
+            rec.add(recorder.GET, "key", 1)
+        self.assertGreater(os.path.getsize(self.path), size)
+        del rec
+        self.assertTrue(recorder.binary(self.path))
+        count = 1 + recorder.BLOCK // recorder.RECORD.size
+        self.assertEqual(len(list(recorder.load(self.path))), count)
+        with open(self.path, "ab") as hdl:
+            hdl.write(recorder.RECORD.pack(0, 0.0, 0, 100) + b"key")
+        self.assertEqual(len(list(recorder.load(self.path))), count)
+
+    def test_bad_file(self):
+        with open(self.path, "wb") as hdl:
+            hdl.write(b"not a trace")
+        self.assertRaises(ValueError, recorder.binary, self.path)
+
+
+if __name__ == "__main__":
+    unittest.main()
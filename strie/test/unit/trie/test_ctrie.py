@@ -1,6 +1,7 @@
 # coding:utf-8
 
 import os
+import threading
 from random import randint
 import shutil
 from tempfile import TemporaryDirectory
@@ -10,16 +11,25 @@ from typing import Set
 import unittest
 import uuid
 
+from mock import patch
+
 from strie import ctrie
+from strie import profile
 from strie import radix
+from strie import sindex
 from strie import testhex
+from strie.store.bfile import bloom
 from strie.store.dfile import dhdl
 from strie.store.dfile import didx
 from strie.store.dfile import ihdl
 from strie.store.mfile import mhdl
 from strie.store.nfile import nhdl
+from strie.store.tfile import recorder
 from strie.trie.ctree import cache
+from strie.trie.ctree import sketch
 from strie.trie.ctree import store
+from strie.utils import metrics
+from strie.utils.trace import TRACER
 
 
 def fake_gc_index(src: str, dst: str):
@@ -41,6 +51,14 @@ def fake_bad_datas(path: str):
     os.rename(src=f"{path}.bad", dst=path)
 
 
+def count_items(items) -> int:
+    return sum(1 for _ in items)
+
+
+def collect_items(items) -> Dict[str, bytes]:
+    return dict(items)
+
+
 class test_cache(unittest.TestCase):
 
     @classmethod
@@ -96,6 +114,73 @@ class test_cache(unittest.TestCase):
             if k in self.root:
                 assert self.root[k] == i
 
+    def test_scan_resistant(self):
+        hot: List[str] = [f"hot{i}" for i in range(self.size)]
+        for k in hot:
+            self.root[k] = 1
+            self.assertEqual(self.root[k], 1)
+        hot = [k for k in hot if k in self.root]
+        self.assertGreater(len(hot), 0)
+        for i in range(self.loop):
+            self.assertFalse(self.root.admit(f"scan{i}", i))
+            self.assertIsNone(self.root.peek(f"scan{i}"))
+        self.assertTrue(all(k in self.root for k in hot))
+        self.assertEqual(self.root.peek(hot[0]), 1)
+        self.assertTrue(self.root.admit(hot[0], 2))
+        self.assertEqual(self.root[hot[0]], 1)
+        empty: cache[str, int] = cache(self.size)
+        self.assertTrue(empty.admit("scan", 0))
+        self.assertEqual(empty.peek("scan"), 0)
+
+    def test_byte_budget(self):
+        root: cache[str, bytes] = cache(10000, sizeof=len)
+        for i in range(100):
+            root[str(i)] = bytes(500)
+            self.assertLessEqual(root.currsize, root.maxsize)
+        self.assertLessEqual(len(root), 20)
+        root["big"] = bytes(root.maxsize)
+        self.assertNotIn("big", root)
+        key: str = next(k for k in map(str, range(100)) if k in root)
+        root[key] = bytes(10)
+        self.assertEqual(root[key], bytes(10))
+        self.assertLessEqual(root.currsize, root.maxsize)
+        root.clear()
+        self.assertEqual((len(root), root.currsize), (0, 0))
+
+    def test_hottest(self):
+        root: cache[str, int] = cache(cache.MINIMUM)
+        for i in range(cache.MINIMUM):
+            root[str(i)] = i
+        root["50"]
+        root["10"]
+        self.assertEqual(root.hottest(2), ["10", "50"])
+        self.assertEqual(len(root.hottest()), len(root))
+        self.assertEqual(set(root.hottest()), {str(i) for i in range(100)})
+
+    def test_frequency(self):
+        hot: List[str] = [f"hot{i}" for i in range(self.size // 2)]
+        for _ in range(5):
+            for k in hot:
+                self.root[k] = 1
+                self.assertEqual(self.root[k], 1)
+        for i in range(self.loop):
+            self.root[f"once{i}"] = i
+        self.assertGreater(sum(k in self.root for k in hot), len(hot) * 0.9)
+        self.assertLessEqual(self.root.currsize, self.size)
+
+    def test_sketch(self):
+        freq = sketch(64)
+        for i in range(10):
+            for _ in range(i):
+                freq.increment(i)
+        for i in range(10):
+            self.assertGreaterEqual(freq.estimate(i), i)
+        for _ in range(10 * 64 * 2):
+            freq.increment("aging")
+        self.assertLess(freq.estimate(9), 9)
+        freq.clear()
+        self.assertEqual(freq.estimate("aging"), 0)
+
 
 class test_store(unittest.TestCase):
 
@@ -126,6 +211,18 @@ class test_store(unittest.TestCase):
     def tearDown(self):
         pass
 
+    def test_lazy_datas(self):
+        root = ctrie(self.path.name, word=self.word, readonly=True)
+        with patch("strie.trie.ctree.dhdl", wraps=dhdl) as opened:
+            keys: List[str] = list(root)
+            self.assertTrue(all(key in root for key in keys))
+            self.assertEqual(list(root.scan(readahead=0)), keys)
+            opened.assert_not_called()
+            self.assertEqual(len(root[keys[0]]), 16)
+            self.assertEqual(opened.call_count, 1)
+            root[keys[0]]
+            self.assertEqual(opened.call_count, 1)
+
     def test_gc(self):
         hdl = nhdl(self.path.name, word=self.word, test=testhex, readonly=True)
 
@@ -390,3 +487,408 @@ class test_ctrie(unittest.TestCase):
             self.assertIn(key, root)
             value = root[key]
             self.assertIsInstance(value, bytes)
+
+    def test_fuzzy(self):
+        root = ctrie(self.path.name,
+                     word=self.word,
+                     test=testhex,
+                     readonly=True)
+        keys: List[str] = [key for key in root]
+        for key in keys[:10]:
+            self.assertEqual(dict(root.fuzzy(key, 0)), {key: 0})
+            typo = key[:-1] + ("0" if key[-1] != "0" else "1")
+            self.assertIn(key, dict(root.fuzzy(typo, 1)))
+            self.assertEqual(dict(root.fuzzy(typo, 1))[key], 1)
+
+    def test_match(self):
+        root = ctrie(self.path.name,
+                     word=self.word,
+                     test=testhex,
+                     readonly=True)
+        keys: List[str] = [key for key in root]
+        for key in keys[:10]:
+            self.assertEqual(list(root.match(key)), [key])
+            expect = {k for k in keys if k[:2] == key[:2] and k[-1] == key[-1]}
+            self.assertEqual(set(root.match(f"{key[:2]}*{key[-1]}")), expect)
+        root[keys[0]]  # one hot shard
+        stats = root.stats()
+        self.assertEqual(sorted(root.match("*")), sorted(keys))
+        self.assertIn(keys[0], dict(root.fuzzy(keys[0], 2)))
+        for name in ("icache", "scache"):  # a full pass admits nothing
+            self.assertEqual(root.stats()[name]["entries"],
+                             stats[name]["entries"])
+
+    def test_find_suffix(self):
+        root = ctrie(self.path.name,
+                     word=self.word,
+                     test=testhex,
+                     readonly=False)
+        keys: List[str] = [key for key in root]
+        for key in keys[:10]:
+            expect = {k for k in keys if k[-3:] == key[-3:]}
+            self.assertEqual(set(root.find_suffix(key[-3:])), expect)
+            expect = {k for k in keys if key[10:14] in k}
+            self.assertEqual(set(root.find_substring(key[10:14])), expect)
+        key = keys[0]
+        del root[key]
+        self.assertNotIn(key, set(root.find_suffix(key[-8:])))
+        root[key] = b"value"
+        self.assertIn(key, set(root.find_substring(key[-8:])))
+
+    def test_sindex_file(self):
+        root = ctrie(self.path.name,
+                     word=self.word,
+                     test=testhex,
+                     readonly=True)
+        keys: List[str] = [key for key in root]
+        key: str = keys[0]
+        expect: Set[str] = {k for k in keys if k[-3:] == key[-3:]}
+        self.assertEqual(set(root.find_suffix(key[-3:])), expect)
+        self.assertEqual(root.stats()["scache"]["entries"], 0)
+        files: List[str] = [
+            f for _, _, names in os.walk(self.path.name) for f in names
+            if f.endswith(".six")
+        ]
+        self.assertEqual(len(files), root.stats()["shards"])
+        with patch.object(sindex, "build") as build:
+            self.assertEqual(set(root.find_suffix(key[-3:])), expect)
+            build.assert_not_called()
+        root = ctrie(self.path.name,
+                     word=self.word,
+                     test=testhex,
+                     readonly=False)
+        self.assertIn(key, set(root.find_substring(key[-8:])))
+        del root[key]
+        self.assertNotIn(key, set(root.find_substring(key[-8:])))
+        root.close()
+        root = ctrie(self.path.name,
+                     word=self.word,
+                     test=testhex,
+                     readonly=True)
+        with patch.object(sindex, "build") as build:
+            self.assertNotIn(key, set(root.find_substring(key[-8:])))
+            build.assert_not_called()
+
+    def test_get_many(self):
+        root = ctrie(self.path.name,
+                     word=self.word,
+                     test=testhex,
+                     readonly=True)
+        keys: List[str] = [key for key in root]
+        probe: List[str] = keys[::-1] + keys[:5]
+        expect: List[bytes] = [root[key] for key in probe]
+        root = ctrie(self.path.name, readonly=True)
+        self.assertEqual(root.get_many(probe), expect)
+        self.assertEqual(root.get_many(probe, workers=1), expect)
+        self.assertEqual(root.get_many([]), [])
+        self.assertRaises(KeyError, root.get_many,
+                          keys[:3] + [keys[0][:4] + "0" * 28])
+        trace: str = os.path.join(self.path.name, "trace")
+        rec: recorder = recorder(trace)
+        root = ctrie(self.path.name, readonly=True, bloom_fpr=0.0,
+                     trace=rec)
+        miss: str = keys[0][:-1] + ("0" if keys[0][-1] != "0" else "1")
+        with self.assertRaises(KeyError) as error:
+            root.get_many([keys[0], miss], workers=2)
+        self.assertEqual(error.exception.args, (miss, ))
+        rec.close()
+        op, key, size, _ = list(recorder.load(trace))[-1]
+        self.assertEqual((op, key, size), ("get", miss, recorder.MISSING))
+
+    def test_cachebytes(self):
+        for cachebytes in (10**4, 10**6):
+            root = ctrie(self.path.name,
+                         word=self.word,
+                         test=testhex,
+                         readonly=False,
+                         cachebytes=cachebytes)
+            items: Dict[str, bytes] = {
+                uuid.uuid4().hex: os.urandom(20000) for _ in range(100)
+            }
+            for key, value in items.items():
+                root[key] = value
+            # values too large for the main segment or turned down by
+            # admission are not cached, but are still returned
+            for key, value in list(items.items()) * 2:
+                self.assertEqual(root[key], value)
+            self.assertEqual(root.get_many(list(items)), list(items.values()))
+
+    def test_bloom(self):
+        root = ctrie(self.path.name,
+                     word=self.word,
+                     test=testhex,
+                     readonly=False)
+        keys: List[str] = [key for key in root]
+        for key in keys:
+            root[key] = b"put"  # put only, filters created on write
+        root.close()
+
+        def sidecars():
+            files: List[str] = [os.path.join(d, f) for d, _, fs in
+                                os.walk(self.path.name) for f in fs]
+            idxs: Set[str] = {f[:-4] for f in files if f.endswith(".idx")}
+            blms: Set[str] = {f[:-4] for f in files if f.endswith(".blm")}
+            return idxs, blms
+
+        idxs, blms = sidecars()
+        self.assertGreater(len(idxs), 0)
+        self.assertEqual(idxs, blms)
+        for name in blms:
+            os.remove(f"{name}.blm")
+        root = ctrie(self.path.name, readonly=True)
+        self.assertTrue(all(key in root for key in keys))
+        self.assertEqual(sidecars(), (idxs, idxs))  # rebuilt and written
+        with patch.object(bloom, "__contains__") as maybe:
+            self.assertTrue(all(key in root for key in keys))
+            maybe.assert_not_called()  # hits on cached shards
+        root = ctrie(self.path.name, readonly=True)
+        miss: List[str] = [key[:4] + uuid.uuid4().hex[4:] for key in keys]
+        with patch.object(store, "__contains__", return_value=False) as hit:
+            self.assertFalse(any(key in root for key in miss))
+            self.assertLess(hit.call_count, len(miss) / 10)
+        self.assertNotIn("ffffffff", root)
+        self.assertRaises(KeyError, root.__getitem__, "ffffffff")
+        self.assertRaises(KeyError, root.__getitem__, miss[0])
+        self.assertTrue(all(key in root for key in keys))
+        root = ctrie(self.path.name, readonly=True, bloom_fpr=0.0)
+        with patch.object(store, "__contains__", return_value=False) as hit:
+            self.assertFalse(any(key in root for key in miss))
+            self.assertEqual(hit.call_count, len(miss))
+        root = ctrie(self.path.name, readonly=True)
+        self.assertFalse(any(key in root for key in miss))  # filters kept
+        writer = ctrie(self.path.name, readonly=False)
+        writer[miss[0]] = b"later"
+        writer.close()
+        self.assertIn(miss[0], root)  # written by another owner
+        self.assertEqual(root[miss[0]], b"later")
+
+    def test_scan(self):
+        root = ctrie(self.path.name,
+                     word=self.word,
+                     test=testhex,
+                     readonly=True)
+        keys: List[str] = sorted(root)
+        self.assertEqual(list(root.scan()), keys)
+        items = list(root.scan(values=True, batch=7))
+        self.assertEqual([k for k, _ in items], keys)
+        with patch.object(cache, "__setitem__") as admit:
+            self.assertEqual(list(root.scan(values=True)), items)
+            self.assertEqual(sorted(root), keys)
+            admit.assert_not_called()
+        self.assertEqual(dict(items), {k: root[k] for k in keys})
+
+    def test_scan_readahead(self):
+        root = ctrie(self.path.name,
+                     word=self.word,
+                     test=testhex,
+                     readonly=True)
+        items = list(root.scan(values=True, readahead=0))
+        self.assertEqual(list(root.scan(values=True, batch=3,
+                                        readahead=root.SCAN_READAHEAD)),
+                         items)
+        self.assertEqual(list(root.scan(readahead=1)), [k for k, _ in items])
+        half: int = len(items) // 2
+        root[items[half][0]]  # one shard cached, read inline
+        self.assertEqual(list(root.scan(values=True, readahead=2)), items)
+        scan = root.scan(values=True, batch=1, readahead=1)
+        self.assertEqual(next(scan), items[0])
+        scan.close()
+        self.assertNotIn("strie-scan", [t.name for t in threading.enumerate()])
+        for scan in (iter(root), root.scan(values=True, batch=1)):
+            next(scan)  # synchronous unless readahead is asked
+            self.assertNotIn("strie-scan",
+                             [t.name for t in threading.enumerate()])
+        with patch.object(store, "get_many", side_effect=OSError("broken")):
+            self.assertRaises(OSError, list,
+                              root.scan(values=True, readahead=1))
+
+    def test_stats(self):
+        hook = metrics()
+        root = ctrie(self.path.name,
+                     word=self.word,
+                     test=testhex,
+                     readonly=True,
+                     hook=hook)
+        keys: List[str] = sorted(root.scan())
+        for key in keys[:10] * 2:
+            self.assertIsInstance(root[key], bytes)
+        stats = root.stats()
+        self.assertEqual(stats["dcache"]["hits"], 10)
+        self.assertEqual(stats["dcache"]["entries"], 10)
+        self.assertGreater(stats["shards"], 0)
+        snap = stats["metrics"]
+        self.assertEqual(snap['strie_op_seconds{op="get"}']["count"], 20)
+        self.assertEqual(snap['strie_cache_hits_total{cache="dcache"}'], 10)
+        self.assertGreater(hook.counter("strie_read_bytes_total", file="dat"),
+                           0)
+        self.assertIn("# TYPE strie_op_seconds histogram", hook.prometheus())
+        self.assertNotIn("metrics", ctrie(self.path.name).stats())
+
+    def test_slowlog(self):
+        root = ctrie(self.path.name,
+                     word=self.word,
+                     test=testhex,
+                     readonly=True,
+                     slowlog=1e-9)
+        key: str = next(iter(root.scan()))
+        with self.assertLogs("strie", level="WARNING") as logs:
+            self.assertIsInstance(root[key], bytes)
+        self.assertIn("slow get", logs.output[0])
+        self.assertIn("route", logs.output[0])
+        self.assertIn("replay", logs.output[0])
+        self.assertIn("disk", logs.output[0])
+
+    def test_profile(self):
+        root = ctrie(self.path.name,
+                     word=self.word,
+                     test=testhex,
+                     readonly=True)
+        keys: List[str] = sorted(root.scan())
+        with patch.object(TRACER, "span") as span:
+            self.assertIn(keys[0], root)
+            self.assertIsInstance(root[keys[0]], bytes)
+            # nothing to feed, operations take the straight path
+            self.assertFalse(any(c.kwargs.get("root") for c in
+                                 span.call_args_list))
+        with profile() as prof:
+            for key in keys[:10]:
+                self.assertIn(key, root)
+                self.assertIsInstance(root[key], bytes)
+        report = prof.report()
+        self.assertEqual(report["get"]["count"], 10)
+        self.assertEqual(report["contains"]["count"], 10)
+        self.assertIn("contains/route/restore", report)
+        self.assertIn("get/disk", report)
+        root[keys[0]]
+        self.assertEqual(prof.report(), report)
+
+    def test_prefetch(self):
+        root = ctrie(self.path.name,
+                     word=self.word,
+                     test=testhex,
+                     readonly=False)
+        keys: List[str] = sorted(root.scan())
+        hot: List[str] = keys[:20]
+        values: Dict[str, bytes] = {key: root[key] for key in hot * 3}
+        self.assertEqual(root.save_hot(), 20)
+        del root
+        root = ctrie(self.path.name, readonly=True, prefetch=10**6)
+        self.assertTrue(root.wait_prefetch(timeout=10))
+        stats = root.stats()
+        self.assertGreater(stats["icache"]["entries"], 0)
+        self.assertEqual(stats["dcache"]["entries"], 20)
+        with patch.object(store, "get") as get:
+            for key in hot:
+                self.assertIsInstance(root[key], bytes)
+            get.assert_not_called()
+        root = ctrie(self.path.name, readonly=True, prefetch=1)
+        self.assertTrue(root.wait_prefetch(timeout=10))
+        self.assertEqual(root.stats()["dcache"]["entries"], 1)
+        root = ctrie(self.path.name, readonly=False, prefetch=10**6)
+        root[hot[0]] = b"write"
+        self.assertTrue(root.wait_prefetch(timeout=10))
+        values[hot[0]] = b"write"
+        self.assertEqual({key: root[key] for key in hot}, values)
+        del root
+        root = ctrie(self.path.name, readonly=True, prefetch=10**6)
+        self.assertTrue(root.wait_prefetch(timeout=10))
+        self.assertEqual({key: root[key] for key in hot}, values)
+
+    def test_hotsave(self):
+        root = ctrie(self.path.name, readonly=True)
+        self.assertFalse(os.path.exists(root.hotfile))
+        root = ctrie(self.path.name, readonly=True, prefetch=10**6)
+        self.assertTrue(root.wait_prefetch(timeout=0))
+        root = ctrie(self.path.name,
+                     word=self.word,
+                     test=testhex,
+                     readonly=True,
+                     hotsave=1e-9)
+        key: str = next(iter(root.scan()))
+        for _ in range(ctrie.HOT_CHECK - 1):
+            root[key]
+        self.assertFalse(os.path.exists(root.hotfile))
+        root[key]
+        self.assertTrue(os.path.exists(root.hotfile))
+        with open(root.hotfile, "w") as hdl:
+            hdl.write("broken")
+        del root
+        with open(os.path.join(self.path.name, "strie.hot")) as hdl:
+            self.assertIn(key, hdl.read())
+
+    def test_warm(self):
+        root = ctrie(self.path.name,
+                     word=self.word,
+                     test=testhex,
+                     readonly=True)
+        items: Dict[str, bytes] = dict(root.scan(values=True))
+        names: Set[str] = {key[:4] for key in items}
+        self.assertEqual(root.warm(workers=2), len(names))
+        self.assertEqual(root.warm(workers=2), 0)
+        with patch.object(store, "_store__load_index") as load:
+            self.assertEqual({k: root[k] for k in items}, items)
+            load.assert_not_called()
+        root = ctrie(self.path.name, readonly=True)
+        prefix: str = sorted(names)[0]
+        self.assertEqual(root.warm(prefixes=[prefix[0]], workers=1),
+                         len([n for n in names if n[0] == prefix[0]]))
+        self.assertEqual(root.warm(prefixes=[prefix], workers=1), 0)
+        root = ctrie(self.path.name, readonly=True)
+        self.assertEqual(root.warm(prefixes=[prefix + "0"], workers=1), 1)
+        root = ctrie(self.path.name, readonly=False, preload=True)
+        self.assertEqual(root.stats()["icache"]["entries"], len(names))
+        key: str = next(iter(items))
+        root[key] = b"preload"
+        del root
+        root = ctrie(self.path.name, readonly=True)
+        self.assertEqual(root[key], b"preload")
+        ipath: str = next(os.path.join(d, f) for d, _, fs in
+                          os.walk(self.path.name) for f in fs
+                          if f.endswith(".idx"))
+        with open(mhdl.get_bakpath(ipath), "wb"):
+            pass  # interrupted gc, left to the owner
+        root = ctrie(self.path.name, readonly=True)
+        self.assertEqual(root.warm(workers=2), len(names) - 1)
+
+    def test_parallel_scan(self):
+        root = ctrie(self.path.name,
+                     word=self.word,
+                     test=testhex,
+                     readonly=True)
+        items: Dict[str, bytes] = dict(root.scan(values=True))
+        for workers in (1, 2):
+            self.assertEqual(
+                root.parallel_scan(count_items, workers=workers,
+                                   values=False), len(items))
+            self.assertEqual(
+                root.parallel_scan(collect_items,
+                                   reduce=lambda a, b: {**a, **b},
+                                   workers=workers), items)
+        parts: List[int] = list(root.parallel_map(count_items, workers=2))
+        self.assertEqual(len(parts), len({key[:4] for key in items}))
+        self.assertEqual(sum(parts), len(items))
+        self.assertEqual(root.parallel_scan(count_items, initial=1),
+                         len(items) + 1)
+
+    def test_hextobin(self):
+        dst = os.path.join(self.path.name, "bin")
+        src = ctrie(self.path.name, readonly=True)
+        self.assertFalse(src.binary)
+        self.assertEqual(ctrie.hextobin(self.path.name, dst), self.loop)
+        root = ctrie(dst, readonly=False)
+        self.assertTrue(root.binary)
+        for key in root:
+            self.assertIsInstance(key, bytes)
+            self.assertEqual(len(key), 16)
+            self.assertEqual(root[key], src[key.hex()])
+        self.assertEqual(len(list(root)), self.loop)
+        names = {os.path.splitext(i)[0] for i in os.listdir(dst)}
+        self.assertEqual(names - {nhdl.file(dst).split(os.sep)[-1]},
+                         {key[:1].hex() for key in root})
+        key = bytes(range(256))
+        root[key] = b"binary"
+        self.assertIn(key, root)
+        root = ctrie(dst, readonly=True)
+        self.assertEqual(root[key], b"binary")
+        self.assertRaises(AssertionError, src.__getitem__, key)
+        self.assertRaises(AssertionError, ctrie.hextobin, self.path.name, dst)
@@ -0,0 +1,70 @@
+# coding:utf-8
+
+import os
+from tempfile import TemporaryDirectory
+import unittest
+
+from strie import frozen_radix
+from strie import radix
+
+
+class test_frozen_radix(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.loop = 1000
+        cls.keys = {"str", "strie", "strip", "string", "stream", "sorry"}
+        for i in range(cls.loop):
+            cls.keys.add(f"230922{i:04x}")
+
+    @classmethod
+    def tearDownClass(cls):
+        pass
+
+    def setUp(self):
+        self.temp = TemporaryDirectory()
+        self.root = radix()
+        for key in self.keys:
+            self.root[key] = key.encode()
+
+    def tearDown(self):
+        pass
+
+    def check(self, frozen: frozen_radix):
+        order = sorted(self.keys)
+        self.assertEqual(len(frozen), len(order))
+        self.assertEqual(list(frozen), order)
+        for i, key in enumerate(order):
+            self.assertIn(key, frozen)
+            self.assertEqual(frozen[key], key.encode())
+            self.assertEqual(frozen.rank(key), i)
+            self.assertEqual(frozen.key(i), key)
+        self.assertNotIn("stri", frozen)
+        self.assertIsNone(frozen.get("zzz"))
+        self.assertRaises(KeyError, frozen.__getitem__, "st")
+        self.assertEqual(frozen.rank("strin"), order.index("string"))
+        self.assertEqual(list(frozen.prefix("stri")),
+                         ["strie", "string", "strip"])
+        self.assertEqual(len(list(frozen.prefix("23092200"))), 256)
+        self.assertEqual(list(frozen.prefix("x")), [])
+
+    def test_freeze(self):
+        self.check(self.root.freeze())
+
+    def test_load(self):
+        path = os.path.join(self.temp.name, "frozen")
+        frozen = self.root.freeze()
+        self.assertEqual(frozen.dump(path), frozen.nbytes)
+        loaded = frozen_radix.load(path)
+        self.check(loaded)
+        loaded.close()
+
+    def test_keyset(self):
+        root = radix()
+        for key in self.keys:
+            root[key] = None
+        frozen = root.freeze()
+        self.assertIn("strie", frozen)
+        self.assertRaises(KeyError, frozen.__getitem__, "strie")
+        raw = sum(len(k) for k in self.keys)
+        self.assertLess(frozen.nbytes, raw + 4 * len(self.keys) + 64)
@@ -8,7 +8,11 @@ import unittest
 
 from strie import htrie
 from strie import radix
+from strie import bintokey
+from strie import testbin
 from strie import testhex
+from strie.store import didx
+from strie.store import idxcodec
 from strie.trie.htree import checkhkey
 
 
@@ -173,3 +177,31 @@ class test_htrie(unittest.TestCase):
     def test_prefix(self):
         for i in range(256):
             self.assertIsInstance(htrie(prefix=f"{i:02x}"), radix)
+
+    def test_binary(self):
+        root = htrie(binary=True)
+        self.assertEqual(len(root.child), 256)
+        self.assertTrue(testbin.check(bintokey(bytes(range(256)))))
+        for code in self.vals:
+            key: str = bintokey(bytes.fromhex(code))
+            self.assertEqual(len(key), len(code) // 2)
+            root[key] = code
+        self.assertEqual(len(root), len(self.vals))
+        for key in root:
+            self.assertEqual(root[key], key.encode("latin-1").hex())
+        datas = root.dumps()
+        self.assertEqual(list(radix.loads(datas, test=testbin)), list(root))
+        for code in self.vals:
+            self.root[code] = code
+        self.assertLess(len(datas), len(self.root.dumps()))
+
+    def test_dump_load(self):
+        for i, code in enumerate(self.vals):
+            self.root[code] = didx(offset=didx.SIZE_DATA, length=i + 1)
+        datas = self.root.dumps(idxcodec())
+        root = radix.loads(datas, test=testhex, codec=idxcodec())
+        self.assertEqual(len(root.child), 256)
+        self.assertEqual(list(root), list(self.root))
+        for key in self.vals:
+            self.assertEqual(root[key].length, self.root[key].length)
+        self.assertRaises(AssertionError, radix.loads, datas)
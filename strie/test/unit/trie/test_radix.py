@@ -1,15 +1,30 @@
 # coding:utf-8
 
+from fnmatch import fnmatchcase
 import hashlib
+from io import BytesIO
+import pickle
 from random import randint
 from typing import List
 from typing import Set
 import unittest
 
+from strie import pattern
 from strie import radix
+from strie import testakey
 from strie import testalnum
 
 
+def levenshtein(a: str, b: str) -> int:
+    row = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        prev, row = row, [i]
+        for j, cb in enumerate(b, 1):
+            row.append(min(row[j - 1] + 1, prev[j] + 1,
+                           prev[j - 1] + (ca != cb)))
+    return row[-1]
+
+
 class test_radix(unittest.TestCase):
 
     @classmethod
@@ -262,3 +277,134 @@ class test_radix(unittest.TestCase):
         for i in range(256):
             self.assertIsInstance(radix(prefix=f"{i:02x}", test=testalnum),
                                   radix)
+
+    def test_fuzzy(self):
+        self.prepare_trim()
+        for word in ("strin", "stret", "sorry", "230922ff", "xyz"):
+            for dist in range(3):
+                expect = {k: levenshtein(word, k) for k in self.root}
+                expect = {k: d for k, d in expect.items() if d <= dist}
+                found = dict(self.root.fuzzy(word, dist))
+                self.assertEqual(found, expect)
+        self.assertEqual(dict(self.root.fuzzy("string", 0)), {"string": 0})
+
+    def test_match(self):
+        self.prepare_trim()
+        for expr in ("str*", "st?i[cn]*", "2309220[0-9]?", "*ee*", "[!2]*"):
+            expect = {k for k in self.root if fnmatchcase(k, expr)}
+            self.assertEqual(set(self.root.match(expr)), expect)
+        expect = {k for k in self.root if k[:3] == "str" and len(k) == 6}
+        self.assertEqual(set(self.root.match(pattern.regex("str..."))),
+                         expect)
+
+    def test_many(self):
+        keys: List[str] = list(self.vals)
+        self.assertTrue(self.root.put_many([(k, k) for k in keys[::-1]]))
+        self.assertEqual(len(self.root), len(keys))
+        self.assertEqual(self.root.get_many(keys), keys)
+        self.assertTrue(self.root.put_many([(k, i) for i, k in
+                                            enumerate(keys)]))
+        for i, k in enumerate(keys):
+            self.assertEqual(self.root[k], i)
+        probe: List[str] = keys[:100] + ["ffff", "0"] + keys[:10]
+        self.assertEqual(self.root.contains_many(probe),
+                         [k in self.root for k in probe])
+        self.assertRaises(KeyError, self.root.get_many, probe)
+        self.assertEqual(self.root.pop_many(probe),
+                         [True] * 100 + [False] * 12)
+        self.assertEqual(len(self.root), len(keys) - 100)
+        self.assertEqual(self.root.get_many(keys[100:]),
+                         list(range(100, len(keys))))
+        self.assertEqual(self.root.pop_many(keys), [False] * 100 +
+                         [True] * (len(keys) - 100))
+        self.assertEqual(len(self.root), 0)
+        self.assertEqual(len(self.root.child), 0)
+        self.assertRaises(AssertionError, self.root.put_many, [("a-b", 1)])
+
+    def test_top_k(self):
+        self.prepare_trim()
+        self.assertEqual(self.root.top_k("stri", 2), [("strick", 0.0),
+                                                      ("strict", 0.0)])
+        weights = {}
+        for key in sorted(self.root):
+            weights[key] = float(randint(0, self.loop))
+            self.root.put(key, key, weight=weights[key])
+        for prefix in ("", "st", "230922", "2309220", "0", "zz"):
+            expect = sorted([(k, w) for k, w in weights.items()
+                             if k[:len(prefix)] == prefix],
+                            key=lambda t: (-t[1], t[0]))[:10]
+            self.assertEqual(self.root.top_k(prefix, 10), expect)
+        best, _ = self.root.top_k("", 1)[0]
+        self.root.put(best, best, weight=-1.0)
+        weights[best] = -1.0
+        self.assertEqual(self.root.weight(best), -1.0)
+        self.assertNotEqual(self.root.top_k("", 1)[0][0], best)
+        for key in list(weights)[:self.loop]:
+            del self.root[key]
+            del weights[key]
+        expect = sorted(weights.items(), key=lambda t: (-t[1], t[0]))[:10]
+        self.assertEqual(self.root.top_k("", 10), expect)
+
+    def test_snapshot(self):
+        self.prepare_trim()
+        items = {k: self.root[k] for k in self.root}
+        order = list(self.root)
+        view = self.root.snapshot()
+        self.assertEqual(list(view), order)
+        for i, key in enumerate(order):
+            if i % 2 == 0:
+                del self.root[key]
+            else:
+                self.root[key] = i
+        for i in range(self.loop):
+            self.root[f"230922110351{i:04x}"] = i
+        self.assertGreater(self.root.trim("st"), 0)
+        self.assertEqual(len(view), len(items))
+        self.assertEqual(list(view), order)
+        for key, value in items.items():
+            self.assertIn(key, view)
+            self.assertEqual(view[key], value)
+        self.assertNotIn("230922110351ffff", view)
+        self.assertRaises(KeyError, view.get, "230922110351ffff")
+
+    def test_dump_load(self):
+        self.prepare_trim()
+        for i, key in enumerate(sorted(self.root)[:100]):
+            self.root.put(key, key, weight=float(i))
+        buffer = BytesIO()
+        size = self.root.dump(buffer)
+        self.assertEqual(size, len(buffer.getvalue()))
+        buffer.seek(0)
+        root = radix.load(buffer)
+        self.assertEqual(len(root), len(self.root))
+        self.assertEqual(list(root), list(self.root))
+        for key in self.root:
+            self.assertEqual(root[key], self.root[key])
+        self.assertEqual(root.top_k("", 5), self.root.top_k("", 5))
+        for key in list(root)[:self.loop]:
+            del root[key]
+        self.assertEqual(len(root), len(self.root) - self.loop)
+        self.assertEqual(len(list(root)), len(root))
+        self.assertGreater(2**(radix.nodehead.prefix.size * 8),
+                           testakey.MAX_CHARACTERS)
+
+    def test_pickle(self):
+        self.prepare_trim()
+        root = pickle.loads(pickle.dumps(self.root))
+        self.assertIsInstance(root, radix)
+        self.assertEqual(list(root), list(self.root))
+        self.assertRaises(AssertionError, radix.loads, b"\x00" * 64)
+
+    def test_dump_long_prefix(self):
+        prefix: str = "a" * 1200
+        for i in range(300):
+            self.root.put(f"{prefix}{i:04d}", i)
+        datas: bytes = self.root.dumps()
+        root = radix.loads(datas)
+        self.assertEqual(list(root), list(self.root))
+        self.assertEqual(root.dumps(), datas)  # same thresholds
+        self.assertEqual(pickle.loads(pickle.dumps(root)).dumps(), datas)
+        for key in list(root)[:290]:
+            del root[key]
+            del self.root[key]
+        self.assertEqual(root.dumps(), self.root.dumps())
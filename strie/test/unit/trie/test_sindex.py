@@ -0,0 +1,73 @@
+# coding:utf-8
+
+import os
+from tempfile import TemporaryDirectory
+from typing import Set
+import unittest
+
+from strie import sindex
+from strie import testalnum
+
+
+class test_sindex(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.keys: Set[str] = {
+            "str", "strie", "strip", "strict", "stride", "string", "stream",
+            "street", "sorry", "still", "a", "ie", "testpy", "mainpy"
+        }
+
+    @classmethod
+    def tearDownClass(cls):
+        pass
+
+    def setUp(self):
+        self.index = sindex(test=testalnum).build(self.keys)
+
+    def tearDown(self):
+        pass
+
+    def test_suffix(self):
+        for suffix in ("py", "ie", "e", "t", "ing", "xyz", "strie"):
+            expect = {k for k in self.keys if k.endswith(suffix)}
+            self.assertEqual(set(self.index.find_suffix(suffix)), expect)
+
+    def test_substring(self):
+        for text in ("tri", "re", "i", "ee", "strea", "py", "zz", "a"):
+            expect = {k for k in self.keys if text in k}
+            self.assertEqual(set(self.index.find_substring(text)), expect)
+
+    def test_discard(self):
+        self.assertEqual(len(self.index), len(self.keys))
+        self.assertFalse(self.index.add("strie"))
+        self.assertTrue(self.index.discard("strie"))
+        self.assertFalse(self.index.discard("strie"))
+        self.assertNotIn("strie", self.index)
+        self.assertEqual(set(self.index.find_suffix("ie")), {"ie"})
+        self.assertEqual(set(self.index.find_substring("rie")), set())
+        self.assertTrue(self.index.discard("a"))
+        self.assertEqual(set(self.index.find_substring("a")),
+                         {"stream", "mainpy"})
+
+    def test_dump(self):
+        with TemporaryDirectory() as tempdir:
+            path: str = os.path.join(tempdir, "test.six")
+            self.assertIsNone(sindex.load(path, 1, test=testalnum))
+            self.assertTrue(self.index.dump(path, 1))
+            self.assertIsNone(sindex.load(path, 2, test=testalnum))
+            self.assertIsNone(sindex.load(path, 1, test=testalnum, gram=2))
+            index = sindex.load(path, 1, test=testalnum)
+            assert index is not None
+            self.assertEqual(len(index), len(self.keys))
+            for text in ("tri", "re", "a", "py"):
+                self.assertEqual(set(index.find_substring(text)),
+                                 set(self.index.find_substring(text)))
+                self.assertEqual(set(index.find_suffix(text)),
+                                 set(self.index.find_suffix(text)))
+            self.assertTrue(index.discard("a"))
+            self.assertTrue(index.add("abc"))
+            self.assertEqual(set(index.find_substring("bc")), {"abc"})
+            with open(path, "r+b") as hdl:
+                hdl.truncate(os.path.getsize(path) - 1)
+            self.assertIsNone(sindex.load(path, 1, test=testalnum))
@@ -0,0 +1,98 @@
+# coding:utf-8
+
+import os
+from tempfile import TemporaryDirectory
+import unittest
+
+from strie.utils import NOTIMER
+from strie.utils import histogram
+from strie.utils import metrics
+
+
+class test_metric(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        pass
+
+    @classmethod
+    def tearDownClass(cls):
+        pass
+
+    def setUp(self):
+        pass
+
+    def tearDown(self):
+        pass
+
+    def test_histogram(self):
+        hist = histogram(buckets=(1.0, 2.0, 3.0))
+        self.assertEqual(hist.quantile(0.5), 0.0)
+        for value in (0.5, 1.5, 1.5, 2.5, 10.0):
+            hist.observe(value)
+        self.assertEqual(hist.count, 5)
+        self.assertEqual(hist.sum, 16.0)
+        self.assertEqual(hist.buckets(), [(1.0, 1), (2.0, 3), (3.0, 4),
+                                          (float("inf"), 5)])
+        self.assertEqual(hist.quantile(0.5), 2.0)
+        self.assertEqual(hist.quantile(1.0), float("inf"))
+
+    def test_metrics(self):
+        hook = metrics()
+        hook.inc("ops_total", op="get")
+        hook.inc("ops_total", 2, op="get")
+        hook.set("size", 7)
+        with hook.timer("op_seconds", op="get"):
+            pass
+        with NOTIMER:
+            pass
+        self.assertEqual(hook.counter("ops_total", op="get"), 3)
+        self.assertEqual(hook.counter("ops_total", op="set"), 0)
+        self.assertEqual(hook.gauge("size"), 7)
+        self.assertIsNone(hook.gauge("none"))
+        self.assertEqual(hook.histogram("op_seconds", op="get").count, 1)
+        snap = hook.snapshot()
+        self.assertEqual(snap['ops_total{op="get"}'], 3)
+        self.assertEqual(snap["size"], 7)
+        self.assertEqual(snap['op_seconds{op="get"}']["count"], 1)
+        text = hook.prometheus()
+        self.assertIn("# TYPE ops_total counter", text)
+        self.assertIn("# TYPE size gauge", text)
+        self.assertIn('op_seconds_bucket{op="get",le="+Inf"} 1', text)
+        self.assertIn('op_seconds_count{op="get"} 1', text)
+
+    def test_collect(self):
+
+        class fake:
+
+            def __init__(self):
+                self.value = 0
+
+            def collect(self, hook: metrics):
+                self.value += 1
+                hook.set("value", self.value)
+
+        hook = metrics()
+        obj = fake()
+        hook.register(obj.collect)
+        self.assertEqual(hook.snapshot()["value"], 1)
+        self.assertEqual(hook.snapshot()["value"], 2)
+        del obj
+        self.assertEqual(hook.snapshot()["value"], 2)
+
+    def test_export(self):
+        hook = metrics()
+        hook.inc("ops_total")
+        texts = []
+        self.assertTrue(hook.export(texts.append))
+        self.assertEqual(texts, ["# TYPE ops_total counter\nops_total 1\n"])
+        with TemporaryDirectory() as temp:
+            path = os.path.join(temp, "strie.prom")
+            self.assertTrue(hook.export(path))
+            with open(path) as hdl:
+                self.assertEqual(hdl.read(), texts[0])
+            self.assertEqual(os.listdir(temp), ["strie.prom"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,45 @@
+# coding:utf-8
+
+from fnmatch import fnmatchcase
+import re
+import unittest
+
+from strie.utils import pattern
+
+
+class test_pattern(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.keys = ["", "a", "ab", "abc", "abxc", "abbbc", "ab_x", "b1", "zz"]
+
+    @classmethod
+    def tearDownClass(cls):
+        pass
+
+    def setUp(self):
+        pass
+
+    def tearDown(self):
+        pass
+
+    def test_glob(self):
+        for expr in ("ab?c*", "a*", "*c", "[ab]*", "[!a]?", "*", "ab*x",
+                     "[a-c][a-c]", "a\\*"):
+            obj = pattern.glob(expr)
+            for key in self.keys:
+                self.assertEqual(obj.match(key), fnmatchcase(key, expr),
+                                 f"{expr} {key}")
+
+    def test_regex(self):
+        for expr in ("ab+c", "a.*", "ab?", "[a-b]+[0-9]?", "^z*$", ".x?"):
+            obj = pattern.regex(expr)
+            for key in self.keys:
+                self.assertEqual(obj.match(key),
+                                 re.fullmatch(expr, key) is not None,
+                                 f"{expr} {key}")
+
+    def test_regex_unsupported(self):
+        self.assertRaises(AssertionError, pattern.regex, "(ab)")
+        self.assertRaises(AssertionError, pattern.regex, "*a")
+        self.assertRaises(AssertionError, pattern.glob, "[ab")
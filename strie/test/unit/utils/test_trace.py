@@ -0,0 +1,81 @@
+# coding:utf-8
+
+import unittest
+
+from strie.utils import NOTIMER
+from strie.utils import metrics
+from strie.utils import profile
+from strie.utils import tracer
+from strie.utils import tracing
+
+
+class test_trace(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        pass
+
+    @classmethod
+    def tearDownClass(cls):
+        pass
+
+    def setUp(self):
+        self.tracer = tracer()
+
+    def tearDown(self):
+        pass
+
+    def op(self):
+        with self.tracer.span("get", root=True, slow=1e-9):
+            with self.tracer.span("route"):
+                with self.tracer.span("replay"):
+                    pass
+            for _ in range(2):
+                with self.tracer.span("disk"):
+                    pass
+
+    def test_disabled(self):
+        self.assertIs(self.tracer.span("get", root=True), NOTIMER)
+        self.assertIs(self.tracer.span("disk"), NOTIMER)
+        hook = metrics()
+        inner = hook.timer("op_seconds")
+        self.assertIs(self.tracer.span("get", inner, root=True), inner)
+        self.assertIsInstance(self.tracer.span("get", root=True, slow=1.0),
+                              tracing)
+
+    def test_slowlog(self):
+        with self.assertLogs("strie", level="WARNING") as logs:
+            self.op()
+        self.assertEqual(len(logs.output), 1)
+        self.assertIn("slow get", logs.output[0])
+        self.assertIn("route", logs.output[0])
+        self.assertIn("[replay", logs.output[0])
+        self.assertIn("x2", logs.output[0])
+        self.assertEqual(self.tracer.stack, [])
+
+    def test_profile(self):
+        with profile(self.tracer) as prof:
+            with self.assertLogs("strie", level="WARNING"):
+                self.op()
+                self.op()
+        with self.assertLogs("strie", level="WARNING"):
+            self.op()
+        report = prof.report()
+        self.assertEqual(set(report), {"get", "get/route",
+                                       "get/route/replay", "get/disk"})
+        self.assertEqual(report["get"]["count"], 2)
+        self.assertEqual(report["get/disk"]["count"], 4)
+        self.assertLessEqual(report["get"]["self"], report["get"]["total"])
+        self.assertIn("get/route/replay", str(prof))
+
+    def test_metrics(self):
+        hook = metrics()
+        with profile(self.tracer) as prof:
+            with self.tracer.span("get", hook.timer("op_seconds"), root=True):
+                pass
+        self.assertEqual(hook.histogram("op_seconds").count, 1)
+        self.assertEqual(prof.report()["get"]["count"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
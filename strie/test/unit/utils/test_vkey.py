@@ -2,7 +2,11 @@
 
 import unittest
 
+from strie.utils import bintokey
+from strie.utils import keytobin
 from strie.utils import seqtokey
+from strie.utils import seqtokey_many
+from strie.utils import testakey
 from strie.utils import testvkey
 
 
@@ -34,3 +38,33 @@ class test_vkey(unittest.TestCase):
         self.assertEqual(seqtokey("123".encode()), "313233")
         self.assertEqual(seqtokey("测试".encode()), "e6b58be8af95")
         self.assertEqual(seqtokey((4, 5, 6), reverse=True), "060504")
+
+    def test_check_many(self):
+        keys = ["0123456789abcdef", "test_key", "0", "", 1, "ab", "AB"]
+        self.assertEqual(testvkey.check_many(keys),
+                         [testvkey.check(k) for k in keys])
+        self.assertEqual(testvkey.check_many(["00", "ff"]), [True, True])
+        test = testakey(length_limit=4)
+        keys = ["abcd", "abcde", "a\nb", "a b"]
+        self.assertEqual(test.check_many(keys), [True, False, False, False])
+
+    def test_binary(self):
+        test = testakey(allowed_char=testakey.bin)
+        self.assertTrue(test.binary)
+        self.assertFalse(testvkey.binary)
+        datas = bytes(range(256))
+        self.assertEqual(keytobin(bintokey(datas)), datas)
+        self.assertTrue(test.check(bintokey(datas)))
+        self.assertFalse(test.check(chr(256)))
+        keys = [bintokey(b"\n\x00"), bintokey(b"\xff"), "\u0100"]
+        self.assertEqual(test.check_many(keys), [True, True, False])
+
+    def test_seqtokey_many(self):
+        rows = [b"123", bytearray("测".encode()), (4, 5, 6)]
+        self.assertEqual(seqtokey_many(rows), ["313233", "e6b58b", "040506"])
+        self.assertEqual(seqtokey_many(rows, reverse=True),
+                         ["333231", "8bb5e6", "060504"])
+        matrix = memoryview(b"\x00\x01\x02\xfd\xfe\xff").cast("B", [2, 3])
+        self.assertEqual(seqtokey_many(matrix), ["000102", "fdfeff"])
+        self.assertEqual(seqtokey_many(matrix, reverse=True),
+                         ["020100", "fffefd"])
@@ -1,7 +1,10 @@
 # coding:utf-8
 
 from .ctree import ctrie
+from .ftree import frozen_radix
 from .htree import htrie
+from .htree import testbin
 from .htree import testhex
 from .rtree import radix
 from .rtree import testalnum
+from .stree import sindex
@@ -1,72 +1,297 @@
 # coding:utf-8
 
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import as_completed
+import json
+from multiprocessing import get_context
+import operator
 import os
+from queue import Empty
+from queue import Full
+from queue import Queue
+import sys
 from tempfile import TemporaryDirectory
+from threading import Event
+from threading import Thread
+from time import monotonic
+from typing import Any
+from typing import Callable
 from typing import Dict
 from typing import Generic
+from typing import Iterable
+from typing import Iterator
 from typing import List
 from typing import Optional
 from typing import Sequence
 from typing import Set
+from typing import Tuple
 from typing import TypeVar
+from typing import Union
 
-from cachetools import LFUCache
-from cachetools import LRUCache
-
+from ..store import bloom
 from ..store import dhdl
 from ..store import didx
+from ..store import idxcodec
 from ..store import ihdl
 from ..store import mhdl
 from ..store import nhdl
+from ..store import recorder
+from ..utils import TRACER
+from ..utils import bintokey
+from ..utils import keytobin
+from ..utils import metrics
+from ..utils import notimer
+from ..utils import pattern
 from ..utils import testakey
+from ..utils import timer
+from ..utils import tracing
+from .htree import testbin
+from .rtree import editrow
 from .rtree import radix
 from .rtree import testalnum
+from .stree import sindex
 
 KT = TypeVar("KT")  # Key type.
 VT = TypeVar("VT")  # Value type.
 
 
+class sketch:
+    """Count-min sketch of access frequencies with periodic aging
+
+    Four rows of 4-bit counters, all counters are halved once the number
+    of increments reaches the sample size, so old popularity fades.
+    """
+
+    DEPTH = 4
+    LIMIT = 15
+    HALF = bytes(i >> 1 for i in range(256))
+
+    def __init__(self, width: int):
+        assert isinstance(width, int), f"unexpected type: {type(width)}"
+        width = 1 << max(width - 1, 15).bit_length()
+        self.__mask: int = width - 1
+        self.__rows: List[bytearray] = [
+            bytearray(width) for _ in range(self.DEPTH)
+        ]
+        self.__sample: int = 10 * width
+        self.__added: int = 0
+
+    def __index(self, key) -> List[int]:
+        # spread the hash, small integers hash to themselves
+        h: int = (hash(key) * 0x9e3779b97f4a7c15) & 0xffffffffffffffff
+        step: int = (h >> 32) | 1
+        h >>= 7
+        return [(h + i * step) & self.__mask for i in range(self.DEPTH)]
+
+    def estimate(self, key) -> int:
+        return min(row[i] for row, i in zip(self.__rows, self.__index(key)))
+
+    def increment(self, key):
+        for row, i in zip(self.__rows, self.__index(key)):
+            if row[i] < self.LIMIT:
+                row[i] += 1
+        self.__added += 1
+        if self.__added >= self.__sample:
+            self.__added //= 2
+            for row in self.__rows:
+                row[:] = row.translate(self.HALF)
+
+    def clear(self):
+        for row in self.__rows:
+            row[:] = bytes(len(row))
+        self.__added = 0
+
+
 class cache(Generic[KT, VT]):
+    """W-TinyLFU cache with a size budget
+
+    New entries enter a small LRU window, entries leaving the window
+    compete with the LRU victim of the main segmented LRU (probation and
+    protected) by estimated frequency. The budget is counted by sizeof,
+    one per entry by default, so it can be a byte budget.
+    """
 
     MINIMUM = 100
+    WINDOW = 0.01
+    PROTECTED = 0.8
 
-    def __init__(self, cachemax: int):
+    def __init__(self,
+                 cachemax: int,
+                 sizeof: Optional[Callable[[VT], int]] = None):
         assert isinstance(cachemax, int), f"unexpected type: {type(cachemax)}"
         assert cachemax >= self.MINIMUM, f"{cachemax} less than {self.MINIMUM}"
-        nlru: int = int(cachemax * 40 / 100)
-        self.__clru: LRUCache[KT, VT] = LRUCache(maxsize=nlru)
-        self.__clfu: LFUCache[KT, VT] = LFUCache(maxsize=cachemax - nlru)
+        self.__maxsize: int = cachemax
+        self.__sizeof: Callable[[VT], int] = \
+            sizeof if sizeof is not None else (lambda value: 1)
+        self.__wmax: int = max(1, int(cachemax * self.WINDOW))
+        self.__pmax: int = int((cachemax - self.__wmax) * self.PROTECTED)
+        self.__window: OrderedDict[KT, VT] = OrderedDict()
+        self.__probation: OrderedDict[KT, VT] = OrderedDict()
+        self.__protected: OrderedDict[KT, VT] = OrderedDict()
+        self.__sizes: Dict[KT, int] = {}
+        self.__wsize: int = 0
+        self.__psize: int = 0  # protected
+        self.__msize: int = 0  # probation and protected
+        self.__hits: int = 0
+        self.__misses: int = 0
+        # entries are at least one unit, a byte budget tracks fewer keys
+        self.__sketch: sketch = sketch(min(cachemax, 2**16)
+                                       if sizeof is not None else cachemax)
+
+    @property
+    def maxsize(self) -> int:
+        return self.__maxsize
+
+    @property
+    def currsize(self) -> int:
+        return self.__wsize + self.__msize
+
+    def __len__(self) -> int:
+        return len(self.__sizes)
+
+    @property
+    def hits(self) -> int:
+        return self.__hits
+
+    @property
+    def misses(self) -> int:
+        return self.__misses
 
     def __contains__(self, key: KT) -> bool:
-        return key in self.__clru or key in self.__clfu
+        if key in self.__sizes:
+            self.__hits += 1
+            return True
+        self.__misses += 1
+        return False
 
     def __getitem__(self, key: KT) -> VT:
-        if key in self.__clru:
-            value = self.__clru[key]
-            if key not in self.__clfu:
-                self.__clfu[key] = value
-            assert self.__clfu[key] is value
-        elif key in self.__clfu:
-            value = self.__clfu[key]
-            self.__clru[key] = value
-        return self.__clfu[key]
+        self.__sketch.increment(key)
+        if key in self.__window:
+            self.__window.move_to_end(key)
+            return self.__window[key]
+        if key in self.__protected:
+            self.__protected.move_to_end(key)
+            return self.__protected[key]
+        # promote from probation, demote protected overflow
+        value: VT = self.__probation.pop(key)
+        self.__protected[key] = value
+        self.__psize += self.__sizes[key]
+        while self.__psize > self.__pmax and len(self.__protected) > 1:
+            k, v = self.__protected.popitem(last=False)
+            self.__psize -= self.__sizes[k]
+            self.__probation[k] = v
+        return value
 
     def __setitem__(self, key: KT, value: VT):
-        if key in self.__clfu:
-            self.__clfu[key] = value
-        self.__clru[key] = value
+        size: int = self.__sizeof(value)
+        if self.__sizes.get(key) == size:
+            # same size, update in place and keep the segment
+            self.__sketch.increment(key)
+            for segment in (self.__window, self.__protected,
+                            self.__probation):
+                if key in segment:
+                    segment[key] = value
+                    segment.move_to_end(key)
+                    return
+        if key in self.__sizes:
+            del self[key]
+        if size > self.__maxsize - self.__wmax:
+            return  # never fits the main segment
+        self.__sketch.increment(key)
+        self.__window[key] = value
+        self.__sizes[key] = size
+        self.__wsize += size
+        while self.__wsize > self.__wmax and len(self.__window) > 0:
+            k, v = self.__window.popitem(last=False)
+            self.__wsize -= self.__sizes[k]
+            self.__admit(k, v)
+
+    def __admit(self, key: KT, value: VT):
+        """Candidate from the window enters probation if it fits, or if it
+        is more frequent than the victims it would evict
+        """
+        size: int = self.__sizes[key]
+        limit: int = self.__maxsize - self.__wmax
+        if self.__msize + size > limit:
+            freq: int = self.__sketch.estimate(key)
+            victims: List[KT] = []
+            free: int = limit - self.__msize
+            for victim in self.__probation:
+                if free >= size:
+                    break
+                if self.__sketch.estimate(victim) >= freq:
+                    del self.__sizes[key]
+                    return
+                victims.append(victim)
+                free += self.__sizes[victim]
+            if free < size:
+                del self.__sizes[key]
+                return
+            for victim in victims:
+                del self.__probation[victim]
+                self.__msize -= self.__sizes.pop(victim)
+        self.__probation[key] = value
+        self.__msize += size
 
     def __delitem__(self, key: KT):
-        if key in self.__clfu:
-            del self.__clfu[key]
-        if key in self.__clru:
-            del self.__clru[key]
-        assert key not in self.__clfu, f"delete key '{key}',error"
-        assert key not in self.__clru, f"delete key '{key}',error"
+        size: int = self.__sizes.pop(key)
+        if key in self.__window:
+            del self.__window[key]
+            self.__wsize -= size
+            return
+        if key in self.__protected:
+            del self.__protected[key]
+            self.__psize -= size
+        else:
+            del self.__probation[key]
+        self.__msize -= size
+
+    def hottest(self, count: Optional[int] = None) -> List[KT]:
+        """Keys from the most to the least likely to stay: protected, then
+        window, then probation, each most recently used first
+        """
+        keys: List[KT] = []
+        for segment in (self.__protected, self.__window, self.__probation):
+            for key in reversed(segment):
+                if count is not None and len(keys) >= count:
+                    return keys
+                keys.append(key)
+        return keys
+
+    def peek(self, key: KT, default: Optional[VT] = None) -> Optional[VT]:
+        """Lookup without updating recency or frequency
+        """
+        for segment in (self.__window, self.__protected, self.__probation):
+            if key in segment:
+                return segment[key]
+        return default
+
+    def admit(self, key: KT, value: VT) -> bool:
+        """Scan-resistant insertion, only fill free room and never evict
+        """
+        if key in self.__sizes:
+            return True
+        size: int = self.__sizeof(value)
+        if self.__msize + size > self.__maxsize - self.__wmax:
+            return False
+        # first in line for eviction
+        self.__probation[key] = value
+        self.__probation.move_to_end(key, last=False)
+        self.__sizes[key] = size
+        self.__msize += size
+        return True
 
     def clear(self):
-        self.__clru.clear()
-        self.__clfu.clear()
+        self.__window.clear()
+        self.__probation.clear()
+        self.__protected.clear()
+        self.__sizes.clear()
+        self.__wsize = 0
+        self.__psize = 0
+        self.__msize = 0
+        self.__sketch.clear()
 
 
 class store(Dict[str, bytes]):
@@ -84,14 +309,21 @@ class store(Dict[str, bytes]):
                  dpath: str,
                  test: testakey,
                  readonly: bool = True,
-                 icache: Optional[cache[str, radix[didx]]] = None):
+                 icache: Optional[cache[str, radix[didx]]] = None,
+                 admit: bool = True,
+                 hook: Optional[metrics] = None):
+        """Without admit a cached index is reused but not promoted, and a
+        loaded index is never put into the cache, as scans need
+        """
         assert isinstance(name, str), f"unexpected type: {type(name)}"
         assert isinstance(readonly, bool), f"unexpected type: {type(readonly)}"
         assert isinstance(icache, cache) or icache is None, \
             f"unexpected type: {type(icache)}"
-        assert self.restore(ipath, dpath)
+        self.__metrics: Optional[metrics] = hook
+        with self.__timer("restore"):
+            assert self.restore(ipath, dpath)
         if icache is not None and name in icache:
-            index: radix[didx] = icache[name]
+            index: radix[didx] = icache[name] if admit else icache.peek(name)
             reload: bool = False
         else:
             if icache is not None:
@@ -106,9 +338,18 @@ class store(Dict[str, bytes]):
         self.__count: int = 0
         self.__readonly: bool = readonly
         self.__index: radix[didx] = index
-        self.__cache: Optional[cache[str, radix[didx]]] = icache
-        self.__ihdl: ihdl = ihdl(path=ipath, readonly=readonly)
-        self.__dhdl: dhdl = dhdl(path=dpath, readonly=readonly)
+        self.__cache: Optional[cache[str, radix[didx]]] = \
+            icache if admit else None
+        with self.__timer("open"):
+            self.__ihdl: ihdl = ihdl(path=ipath, readonly=readonly)
+        self.__dpath: str = dpath
+        self.__dhdl: Optional[dhdl] = None  # opened by the first value read
+        self.__sindex: Optional[sindex] = None
+        self.__sstamp: int = 0  # stamp of the loaded or dumped sindex
+        self.__bloom: Optional[bloom] = None
+        self.__bstamp: int = 0  # stamp of the dumped filter
+        # stamp of the index file as replayed, unknown for a cached index
+        self.__stamp: int = bloom.stamp(ipath) if reload else 0
         if reload is True:
             assert self.__load_index()
 
@@ -121,13 +362,109 @@ class store(Dict[str, bytes]):
         if self.__cache is None:
             return self.__index
         if self.__name not in self.__cache:
+            # the cache may turn it down, never read it back
             self.__cache[self.__name] = self.__index
+            return self.__index
         return self.__cache[self.__name]
 
     @property
     def readonly(self) -> bool:
         return self.__readonly
 
+    @property
+    def __datas(self) -> dhdl:
+        """Datas file handle, key-only access never opens it
+        """
+        if self.__dhdl is None:
+            with self.__timer("open"):
+                self.__dhdl = dhdl(path=self.__dpath, readonly=self.readonly)
+        return self.__dhdl
+
+    @property
+    def bloom(self) -> Optional[bloom]:
+        return self.__bloom
+
+    @bloom.setter
+    def bloom(self, value: Optional[bloom]):
+        """Filter of keys maintained by put, the caller owns it
+        """
+        assert isinstance(value, bloom) or value is None, \
+            f"unexpected type: {type(value)}"
+        self.__bloom = value
+        self.__rebloom(force=False)
+
+    def __rebloom(self, force: bool = True):
+        """Rebuild the filter from the index, when forced or full
+        """
+        if self.__bloom is not None and (force or self.__bloom.full):
+            self.__bloom.reset(self.index, capacity=len(self.index) * 2)
+
+    def dump_bloom(self) -> bool:
+        """Write the filter stamped with the index file it matches
+        """
+        return self.__dump_bloom(self.__istamp(exact=True))
+
+    def __dump_bloom(self, stamp: int) -> bool:
+        if self.__bloom is None or stamp == 0:
+            return False
+        try:
+            assert self.__bloom.dump(stamp=stamp)
+        except OSError:
+            return False  # such as a read-only directory
+        self.__bstamp = stamp
+        return True
+
+    @property
+    def sindex(self) -> sindex:
+        """Suffix and substring index, loaded from its file or built from
+        the shard index on first use, then maintained by put and pop
+        """
+        if self.__sindex is None:
+            path: str = f"{os.path.splitext(self.__ihdl.path)[0]}.six"
+            stamp: int = self.__istamp(exact=False)
+            self.__sindex = sindex.load(path, stamp, test=self.index.test)
+            if self.__sindex is not None:
+                self.__sstamp = stamp
+            else:
+                self.__sindex = sindex(test=self.index.test).build(self.index)
+                self.__dump_sindex(self.__istamp(exact=True))
+        return self.__sindex
+
+    def __istamp(self, exact: bool = True) -> int:
+        """Stamp of the index file matching the index in memory, 0 if
+        unknown, a cached index of a read-only store matches the current
+        file unless exact
+        """
+        if not self.readonly:
+            self.__ihdl.flush()
+        elif self.__stamp != 0 or exact:
+            return self.__stamp
+        return bloom.stamp(self.__ihdl.path)
+
+    def __dump_sindex(self, stamp: int) -> bool:
+        assert self.__sindex is not None
+        if stamp == 0:
+            return False
+        path: str = f"{os.path.splitext(self.__ihdl.path)[0]}.six"
+        try:
+            assert self.__sindex.dump(path, stamp)
+        except OSError:
+            return False  # such as a read-only directory
+        self.__sstamp = stamp
+        return True
+
+    def flush(self) -> bool:
+        """Write buffered index records and refresh stale side files
+        """
+        if self.readonly:
+            return True
+        stamp: int = self.__istamp()
+        if self.__sindex is not None and self.__sstamp != stamp:
+            self.__dump_sindex(stamp)
+        if self.__bloom is not None and self.__bstamp != stamp:
+            self.__dump_bloom(stamp)
+        return True
+
     def __len__(self) -> int:
         return len(self.index)
 
@@ -146,7 +483,26 @@ class store(Dict[str, bytes]):
     def __delitem__(self, key: str):
         assert self.pop(key=key)
 
+    def __timer(self, layer: str) -> Union[tracing, timer, notimer]:
+        if self.__metrics is None:
+            return TRACER.span(layer)
+        return TRACER.span(
+            layer, self.__metrics.timer("strie_layer_seconds", layer=layer))
+
+    def __inc(self, name: str, value: int = 1, **labels):
+        if self.__metrics is not None:
+            self.__metrics.inc(name, value, **labels)
+
     def __load_index(self) -> bool:
+        with self.__timer("replay"):
+            assert self.__replay_index()
+        if not self.readonly:
+            # gc after load index
+            assert self.__gc(force=False)
+        return True
+
+    def __replay_index(self) -> bool:
+        count: int = self.__count
         prefix: str = self.index.prefix
         for k, v in self.__ihdl:
             if k is None:
@@ -159,10 +515,10 @@ class store(Dict[str, bytes]):
                 del self.index[key]
                 continue
             assert isinstance(v, didx), f"unexpected type: {type(v)}"
-            self.index[key] = v
-        if not self.readonly:
-            # gc after load index
-            assert self.__gc(force=False)
+            # keys were validated before written
+            assert self.index.put(key=key, value=v, checked=True)
+        self.__inc("strie_index_replays_total")
+        self.__inc("strie_index_records_total", self.__count - count)
         return True
 
     def __dump_index(self, key: str, delete: bool = False) -> bool:
@@ -170,12 +526,15 @@ class store(Dict[str, bytes]):
         assert isinstance(key, str), f"unexpected type: {type(key)}"
         assert isinstance(delete, bool), f"unexpected type: {type(delete)}"
         self.__count += 1
+        begin: int = self.__ihdl.endpos
         if delete is True:
             # delete key
             assert self.__ihdl.dump(self.index.nick(key), None)
         else:
             # create or update key
             assert self.__ihdl.dump(self.index.nick(key), self.index[key])
+        self.__inc("strie_write_bytes_total", self.__ihdl.endpos - begin,
+                   file="idx")
         return True
 
     def __gc(self, force: bool = False) -> bool:
@@ -185,7 +544,7 @@ class store(Dict[str, bytes]):
         def test_gc_datas(force: bool = False) -> bool:
             if not force:
                 realsize: int = 0
-                datasize: int = self.__dhdl.dsize
+                datasize: int = self.__datas.dsize
                 for key in self.index:
                     idx: didx = self.index[key]
                     realsize += idx.length
@@ -211,11 +570,12 @@ class store(Dict[str, bytes]):
             return True
 
         if test_gc_index(force=force):
-            with TemporaryDirectory(dir=None) as tempdir:
+            self.__inc("strie_gc_total")
+            with self.__timer("gc"), TemporaryDirectory(dir=None) as tempdir:
                 assert not os.path.exists(self.__ihdl.bakpath), \
                     f"Index backup {self.__ihdl.bakpath} already exists"
-                assert not os.path.exists(self.__dhdl.bakpath), \
-                    f"Datas backup {self.__dhdl.bakpath} already exists"
+                assert not os.path.exists(mhdl.get_bakpath(self.__dpath)), \
+                    f"Datas backup of {self.__dpath} already exists"
                 if test_gc_datas(force=force):
                     # gc index and data
                     stor: store = store(name=self.index.prefix,
@@ -228,16 +588,16 @@ class store(Dict[str, bytes]):
                         datas: bytes = self.get(key)
                         assert isinstance(datas, bytes), \
                             f"unexpected type: {type(datas)}"
-                        assert stor.put(key, datas)
+                        assert stor.put(key, datas, checked=True)
                     # backup and update
                     assert self.__ihdl.backup(), \
                         f"Create index bcakup {self.__ihdl.bakpath} failed"
-                    assert self.__dhdl.backup(), \
-                        f"Create datas bcakup {self.__dhdl.bakpath} failed"
+                    assert self.__datas.backup(), \
+                        f"Create datas bcakup {self.__datas.bakpath} failed"
                     assert stor.__ihdl.rename(self.__ihdl.path), \
                         f"Rename to index {self.__ihdl.path} failed"
-                    assert stor.__dhdl.rename(self.__dhdl.path), \
-                        f"Rename to datas {self.__dhdl.path} failed"
+                    assert stor.__datas.rename(self.__dpath), \
+                        f"Rename to datas {self.__dpath} failed"
                     # data overwritten, update index
                     self.__ihdl = stor.__ihdl
                     self.__dhdl = stor.__dhdl
@@ -248,7 +608,7 @@ class store(Dict[str, bytes]):
                         assert self.__name not in self.__cache
                         self.__cache[self.__name] = stor.index
                     os.remove(self.__ihdl.bakpath)
-                    os.remove(self.__dhdl.bakpath)
+                    os.remove(self.__datas.bakpath)
                 else:
                     # only gc index
                     hidx: ihdl = ihdl(path=os.path.join(tempdir, "idx.gc"),
@@ -267,18 +627,72 @@ class store(Dict[str, bytes]):
                     os.remove(self.__ihdl.bakpath)
                 assert not os.path.exists(self.__ihdl.bakpath), \
                     f"Index backup {self.__ihdl.bakpath} still exists"
-                assert not os.path.exists(self.__dhdl.bakpath), \
-                    f"Datas backup {self.__dhdl.bakpath} still exists"
+                assert not os.path.exists(mhdl.get_bakpath(self.__dpath)), \
+                    f"Datas backup of {self.__dpath} still exists"
+            # drop deleted keys from the filter
+            self.__rebloom(force=True)
 
         return True
 
     def force_gc(self) -> bool:
         return self.__gc(force=True)
 
+    @classmethod
+    def dumps_index(cls, task: Tuple[str, str, str, testakey]) -> bytes:
+        """Replay a shard index read-only and dump it in the packed radix
+        format, which loads several times faster than a replay, so worker
+        processes can do the replay (name, ipath, dpath, test)
+        """
+        name, ipath, dpath, test = task
+        stor: store = store(name=name,
+                            ipath=ipath,
+                            dpath=dpath,
+                            test=test,
+                            readonly=True)
+        return stor.index.dumps(codec=idxcodec())
+
+    @classmethod
+    def apply(cls, task: Tuple[str, str, str, testakey, Callable[
+            [Iterator[Any]], Any], bool, bool, int]) -> Any:
+        """Call fn with the keys, or (key, value) pairs with values, of a
+        shard opened read-only, so worker processes can scan (name,
+        ipath, dpath, test, fn, values, binary, batch)
+
+        Values are streamed in file order, a batch of coalesced reads at
+        a time.
+        """
+        name, ipath, dpath, test, fn, values, binary, batch = task
+        stor: store = store(name=name,
+                            ipath=ipath,
+                            dpath=dpath,
+                            test=test,
+                            readonly=True)
+
+        def output(key: str) -> Union[str, bytes]:
+            return keytobin(key) if binary else key
+
+        def items() -> Iterator[Any]:
+            keys: List[str] = list(stor.index)
+            if not values:
+                yield from (output(key) for key in keys)
+                return
+            infos: List[didx] = stor.index.get_many(keys)
+            order: List[int] = sorted(range(len(keys)),
+                                      key=lambda i: infos[i].offset)
+            for i in range(0, len(order), batch):
+                chunk: List[int] = order[i:i + batch]
+                datas: List[bytes] = stor.read_many(
+                    [keys[j] for j in chunk], [infos[j] for j in chunk])
+                yield from zip((output(keys[j]) for j in chunk), datas)
+
+        return fn(items())
+
     def clear(self) -> None:
+        self.__sindex = None
         self.__index.clear()
+        self.__rebloom(force=True)
         assert self.__ihdl.clear(), f"clear '{self.__name}' index file failed"
-        assert self.__dhdl.clear(), f"clear '{self.__name}' datas file failed"
+        assert self.__datas.clear(), f"clear '{self.__name}' datas file failed"
 
     @classmethod
     def restore(cls, ipath: str, dpath: str) -> bool:
@@ -404,33 +818,84 @@ class store(Dict[str, bytes]):
         assert dat.close()
         return ret
 
-    def put(self, key: str, value: bytes) -> bool:
+    def put(self, key: str, value: bytes, checked: bool = False) -> bool:
         assert not self.readonly, "Read-only object"
         assert isinstance(key, str), f"unexpected type: {type(key)}"
         assert isinstance(value, bytes), f"unexpected type: {type(value)}"
-        info: didx = didx.new(offset=self.__dhdl.dump(value), value=value)
-        self.__dhdl.sync()
+        with self.__timer("disk"):
+            info: didx = didx.new(offset=self.__datas.dump(value), value=value)
+            self.__datas.sync()
         assert isinstance(info, didx), f"unexpected type: {type(info)}"
-        self.index[key] = info
+        with self.__timer("index"):
+            assert self.index.put(key=key, value=info, checked=checked)
+        if self.__sindex is not None:
+            self.__sindex.add(key)
+        if self.__bloom is not None:
+            self.__bloom.add(key)
+            self.__rebloom(force=False)
+        self.__inc("strie_write_bytes_total", len(value), file="dat")
+        self.__inc("strie_fsync_total")
         return self.__dump_index(key)
 
+    def read_many(self, keys: Sequence[str],
+                  infos: Sequence[didx]) -> List[bytes]:
+        """Read datas of resolved indexes with coalesced reads, only
+        touches the datas file
+        """
+        with self.__timer("disk"):
+            datas: List[bytes] = self.__datas.load_many(
+                [(inf.offset, inf.length) for inf in infos])
+        with self.__timer("verify"):
+            for key, inf, dat in zip(keys, infos, datas):
+                chk: int = inf.calc(dat)
+                assert inf.chksum == chk, "Data validation error "\
+                    f"{key}({self.__dpath}:{inf.offset}+{inf.length}) "\
+                    f"{chk} != {inf.chksum}"
+        self.__inc("strie_read_bytes_total", sum(len(d) for d in datas),
+                   file="dat")
+        return datas
+
+    def get_many(self, keys: Sequence[str]) -> List[bytes]:
+        with self.__timer("index"):
+            infos: List[didx] = self.index.get_many(keys)
+        return self.read_many(keys, infos)
+
     def get(self, key: str) -> bytes:
         assert isinstance(key, str), f"unexpected type: {type(key)}"
-        inf: didx = self.index[key]
+        with self.__timer("index"):
+            inf: didx = self.index[key]
         assert isinstance(inf, didx), f"unexpected type: {type(inf)}"
         off: int = inf.offset
         len: int = inf.length
-        dat = self.__dhdl.load(offset=off, length=len)
-        chk: int = inf.calc(dat)
+        with self.__timer("disk"):
+            dat = self.__datas.load(offset=off, length=len)
+        with self.__timer("verify"):
+            chk: int = inf.calc(dat)
         assert inf.chksum == chk, "Data validation error "\
-            f"{key}({self.__dhdl.path}:{off}+{len}) {chk} != {inf.chksum}"
+            f"{key}({self.__dpath}:{off}+{len}) {chk} != {inf.chksum}"
+        self.__inc("strie_read_bytes_total", len, file="dat")
         return dat
 
     def pop(self, key: str) -> bool:
         assert not self.readonly, "Read-only object"
         del self.index[key]
+        if self.__sindex is not None:
+            self.__sindex.discard(key)
         return self.__dump_index(key, True)
 
+    def fuzzy(self, key: str,
+              max_distance: int) -> Iterator[Tuple[str, int]]:
+        return self.index.fuzzy(key=key, max_distance=max_distance)
+
+    def match(self, expr: Union[str, pattern]) -> Iterator[str]:
+        return self.index.match(expr=expr)
+
+    def find_suffix(self, suffix: str) -> Iterator[str]:
+        return self.sindex.find_suffix(suffix)
+
+    def find_substring(self, text: str) -> Iterator[str]:
+        return self.sindex.find_substring(text)
+
 
 class ctrie:
     """Caching and persisting radix trees
@@ -438,6 +903,10 @@ class ctrie:
 
     MAX_NODES = int(10**3 / 2)  # TODO: OSError: [Errno 24] Too many open files
     MIN_NODES = int(10**2 / 2)
+    HOT_KEYS = 10**5  # saved at most
+    HOT_CHECK = 1024  # operations between clock checks
+    PREFETCH_BATCH = 64  # handed over per operation
+    SCAN_READAHEAD = 4  # batches read ahead by full scans that opt in
 
     def __init__(self,
                  path: str = ".",
@@ -445,11 +914,39 @@ class ctrie:
                  test: testakey = testalnum,
                  cacheidx: int = 10**4,
                  cachemax: int = 10**6,
-                 readonly: bool = True):
+                 readonly: bool = True,
+                 bloom_fpr: float = bloom.FPR,
+                 bloom_prefix: int = 0,
+                 cachebytes: int = 0,
+                 hook: Optional[metrics] = None,
+                 slowlog: float = 0.0,
+                 trace: Optional[recorder] = None,
+                 prefetch: int = 0,
+                 hotsave: float = 0.0,
+                 preload: bool = False):
+        """Set bloom_fpr to 0 to disable the per-shard Bloom filters,
+        bloom_prefix adds a filter of key prefixes of that length.
+        Cached values are limited to cachebytes if set, otherwise counted
+        by cachemax. Counters and latencies go to the metrics hook if set.
+        Operations slower than slowlog seconds log a time breakdown of
+        their internal stages to the "strie" logger. Lookups and writes
+        are appended to the trace recorder if set.
+
+        Hot shards and keys are saved every hotsave seconds and when the
+        object is deleted. With prefetch, a background thread reads the
+        indexes of the saved hot shards and up to prefetch bytes of hot
+        values, operations then admit a batch of them into free cache
+        room. Shards written meanwhile are skipped. With preload, all shard
+        indexes are loaded in parallel before returning, see warm.
+        """
         assert isinstance(path, str), f"unexpected type: {type(path)}"
         assert isinstance(cacheidx, int), f"unexpected type: {type(cacheidx)}"
         assert isinstance(cachemax, int), f"unexpected type: {type(cachemax)}"
         assert isinstance(readonly, bool), f"unexpected type: {type(readonly)}"
+        assert 0.0 <= bloom_fpr < 1.0, f"false positive rate {bloom_fpr}"
+        assert slowlog >= 0.0, f"slow threshold {slowlog} error"
+        assert prefetch >= 0, f"prefetch budget {prefetch} error"
+        assert hotsave >= 0.0, f"hot save interval {hotsave} error"
         assert self.init(path=path, word=word, test=test)
         self.__path: str = path
         self.__names: nhdl = nhdl.load(path=self.__path, readonly=readonly)
@@ -458,35 +955,428 @@ class ctrie:
             max(int(nodes / 2), self.MIN_NODES), self.MAX_NODES)
         self.__icache: cache[str, radix] = cache(max(cacheidx, cache.MINIMUM))
         self.__scache: cache[str, store] = cache(max(cacheobj, cache.MINIMUM))
-        self.__dcache: cache[str, bytes] = cache(max(cachemax, cache.MINIMUM))
+        self.__dcache: cache[str, bytes] = cache(
+            max(cachemax, cache.MINIMUM)) if cachebytes <= 0 else cache(
+                max(cachebytes, cache.MINIMUM), sizeof=sys.getsizeof)
         self.__readonly: bool = readonly
-        self.__iter_name: List[str] = []
-        self.__iter_curr: Optional[radix[didx]] = None
+        self.__bloom_fpr: float = bloom_fpr
+        self.__bloom_prefix: int = bloom_prefix
+        self.__blooms: Dict[str, bloom] = {}
+        self.__bstamps: Dict[str, int] = {}  # index stamps of the filters
+        self.__metrics: Optional[metrics] = hook
+        self.__slowlog: float = slowlog
+        self.__recorder: Optional[recorder] = trace
+        self.__iter_scan: Optional[Iterator[Any]] = None
+        self.__hotsave: float = hotsave
+        self.__hotnext: float = monotonic() + hotsave
+        self.__ops: int = 0
+        self.__written: Set[str] = set()  # shards written while prefetching
+        self.__prefetched: Optional[Queue] = None
+        self.__prefetcher: Optional[Thread] = None
+        self.__stop: Event = Event()
+        self.__pool: Optional[ThreadPoolExecutor] = None  # get_many reads
+        self.__poolsize: int = 0
+        if hook is not None:
+            hook.register(self.__collect)
+        if preload:
+            self.warm()  # before starting any thread
+        if prefetch > 0:
+            self.__start_prefetch(prefetch)
 
-    def __iter__(self):
-        self.__iter_name = [i for i in self.__names]
-        if len(self.__iter_name) > 0:
-            self.__iter_name.sort(reverse=True)
-            self.__iter_curr = iter(self.__route(self.__iter_name.pop()))
-        return self
+    def __del__(self):
+        self.__stop.set()
+        if self.__pool is not None:
+            self.__pool.shutdown(wait=False)
+        if self.__hotsave > 0.0:
+            self.save_hot()
+
+    def close(self):
+        """Flush the cached shards and refresh their side files, the
+        object stays usable
+        """
+        for name in self.__scache.hottest():
+            stor: Optional[store] = self.__scache.peek(name)
+            if stor is not None:
+                assert stor.flush()
+        if self.__readonly:
+            return
+        for name, filt in self.__blooms.items():
+            if filt.modify:  # the store was evicted before a flush
+                path: str = self.__names[name]
+                try:
+                    filt.dump(stamp=bloom.stamp(f"{path}.idx"))
+                except OSError:
+                    pass
 
-    def __next__(self):
-        while self.__iter_curr is not None:
-            try:
-                return next(self.__iter_curr)
-            except StopIteration:
-                if len(self.__iter_name) == 0:
-                    self.__iter_curr = None
+    @property
+    def hotfile(self) -> str:
+        return f"{nhdl.file(self.__path)}.hot"
+
+    def save_hot(self) -> int:
+        """Save the hottest shards and keys for prefetch at the next open,
+        return the number of keys saved
+        """
+        shards: List[str] = self.__scache.hottest()
+        shards += [n for n in self.__icache.hottest() if n not in shards]
+        keys: List[str] = self.__dcache.hottest(self.HOT_KEYS)
+        data: Dict[str, Any] = {
+            "length": self.__names.length,
+            "binary": self.binary,
+            "shards": shards,
+            "keys": keys,
+        }
+        temp: str = f"{self.hotfile}.tmp"
+        with open(temp, "w") as hdl:
+            json.dump(data, hdl)
+        os.replace(temp, self.hotfile)
+        return len(keys)
+
+    def __load_hot(self) -> Optional[Dict[str, Any]]:
+        """Saved hot lists, None if missing, broken or of another layout
+        """
+        try:
+            with open(self.hotfile) as hdl:
+                data: Dict[str, Any] = json.load(hdl)
+        except (OSError, ValueError):
+            return None
+        if not isinstance(data, dict) or \
+                data.get("length") != self.__names.length or \
+                data.get("binary") != self.binary:
+            return None
+        return data
+
+    def __start_prefetch(self, budget: int):
+        data: Optional[Dict[str, Any]] = self.__load_hot()
+        if data is None:
+            return
+        length: int = self.__names.length
+        paths: Dict[str, str] = {}
+        for name in data.get("shards", []):
+            if name in self.__names:
+                paths[name] = self.__names[name]
+        groups: Dict[str, List[str]] = {}
+        for key in data.get("keys", []):
+            name = key[:length]
+            if name in self.__names:
+                groups.setdefault(name, []).append(key)
+                paths.setdefault(name, self.__names[name])
+        self.__prefetched = Queue()
+        # the thread holds no reference to self, so deletion stops it
+        self.__prefetcher = Thread(target=self.__prefetch,
+                                   args=(paths, groups, self.__names.test,
+                                         budget, self.__prefetched,
+                                         self.__stop),
+                                   name="strie-prefetch",
+                                   daemon=True)
+        self.__prefetcher.start()
+
+    @classmethod
+    def __prefetch(cls, paths: Dict[str, str], groups: Dict[str, List[str]],
+                   test: testakey, budget: int, out: Queue, stop: Event):
+        """Read shard indexes, then values within budget bytes, on private
+        read-only stores, the caches are only touched by the owner
+        """
+        stores: Dict[str, store] = {}
+        try:
+            for name, path in paths.items():
+                ipath: str = f"{path}.idx"
+                dpath: str = f"{path}.dat"
+                if stop.is_set():
+                    return
+                if not os.path.isfile(ipath) or \
+                        os.path.exists(mhdl.get_bakpath(ipath)) or \
+                        os.path.exists(mhdl.get_bakpath(dpath)):
+                    continue  # leave recovery to the owner
+                stor: store = store(name=name,
+                                    ipath=ipath,
+                                    dpath=dpath,
+                                    test=test,
+                                    readonly=True)
+                stores[name] = stor
+                out.put((name, None, stor.index))
+            for name, keys in groups.items():
+                if stop.is_set() or budget <= 0 or name not in stores:
                     continue
-                self.__iter_curr = iter(self.__route(self.__iter_name.pop()))
-        raise StopIteration
+                stor = stores[name]
+                keys = [key for key in keys if key in stor.index]
+                infos: List[didx] = stor.index.get_many(keys)
+                count: int = 0
+                for inf in infos:
+                    if budget <= 0:
+                        break
+                    budget -= inf.length
+                    count += 1
+                datas: List[bytes] = stor.read_many(keys[:count],
+                                                    infos[:count])
+                for key, value in zip(keys, datas):
+                    out.put((name, key, value))
+        finally:
+            out.put(None)
+
+    def __drain(self, limit: int = PREFETCH_BATCH):
+        """Admit prefetched indexes and values, only into free room
+        """
+        assert self.__prefetched is not None
+        for _ in range(limit):
+            try:
+                item = self.__prefetched.get_nowait()
+            except Empty:
+                return
+            if item is None:
+                self.__prefetched = None
+                self.__written.clear()
+                return
+            name, key, value = item
+            if name in self.__written:
+                continue
+            if key is None:
+                if self.__scache.peek(name) is None and \
+                        self.__icache.peek(name) is None:
+                    self.__icache.admit(name, value)
+            elif self.__dcache.peek(key) is None:
+                self.__dcache.admit(key, value)
+
+    def warm(self,
+             prefixes: Optional[Iterable[str]] = None,
+             workers: int = os.cpu_count() or 1) -> int:
+        """Load the indexes of all shards, or of shards whose names share
+        a prefix with one of prefixes, into free index cache room
+
+        Worker processes replay the index logs and send them back packed,
+        so parsing runs on every core. Return the number of loaded shards.
+        """
+        assert isinstance(workers, int), f"unexpected type: {type(workers)}"
+        selects: Optional[List[str]] = None if prefixes is None else [
+            self.__key(prefix) for prefix in prefixes
+        ]
+        tasks: List[Tuple[str, str, str, testakey]] = []
+        for name in sorted(self.__names):
+            if selects is not None and not any(
+                    name.startswith(p) or p.startswith(name)
+                    for p in selects):
+                continue
+            if self.__scache.peek(name) is not None or \
+                    self.__icache.peek(name) is not None:
+                continue
+            path: str = self.__names[name]
+            ipath: str = f"{path}.idx"
+            dpath: str = f"{path}.dat"
+            if not os.path.isfile(ipath) or \
+                    os.path.exists(mhdl.get_bakpath(ipath)) or \
+                    os.path.exists(mhdl.get_bakpath(dpath)):
+                continue  # leave recovery to the owner
+            tasks.append((name, ipath, dpath, self.__names.test))
+        tasks = tasks[:max(self.__icache.maxsize - len(self.__icache), 0)]
+        count: int = 0
+        if workers > 1 and len(tasks) > 1:
+            with self.__processes(workers) as pool:
+                chunk: int = max(1, len(tasks) // (workers * 4))
+                for task, datas in zip(
+                        tasks,
+                        pool.map(store.dumps_index, tasks, chunksize=chunk)):
+                    index: radix[didx] = radix.loads(datas,
+                                                     test=self.__names.test,
+                                                     codec=idxcodec())
+                    count += self.__icache.admit(task[0], index)
+        else:
+            for name, ipath, dpath, test in tasks:
+                stor: store = store(name=name,
+                                    ipath=ipath,
+                                    dpath=dpath,
+                                    test=test,
+                                    readonly=True)
+                count += self.__icache.admit(name, stor.index)
+        return count
 
-    def __contains__(self, key: str) -> bool:
-        assert isinstance(key, str), f"unexpected type: {type(key)}"
-        return key in self.__route(key)
+    @classmethod
+    def __processes(cls, workers: int) -> ProcessPoolExecutor:
+        """Spawned, not forked, workers, a fork copies the locks held by
+        the prefetch, readahead and read pool threads
+        """
+        return ProcessPoolExecutor(max_workers=workers,
+                                   mp_context=get_context("spawn"))
+
+    def parallel_map(self,
+                     fn: Callable[[Iterator[Any]], Any],
+                     workers: int = os.cpu_count() or 1,
+                     values: bool = True,
+                     batch: int = 1024) -> Iterator[Any]:
+        """Yield fn of the items of every shard, in no particular order
+
+        Shards are split across worker processes, each opens its shards
+        read-only and calls fn once per shard with an iterator of (key,
+        value) in file order, or of keys without values. fn and its
+        results must be picklable, and it only sees what is on disk.
+        """
+        assert isinstance(workers, int), f"unexpected type: {type(workers)}"
+        assert isinstance(batch, int) and batch > 0, f"batch {batch} error"
+        tasks: List[Tuple[str, str, str, testakey, Callable[[Iterator[Any]],
+                                                             Any], bool,
+                          bool, int]] = []
+        for name in sorted(self.__names):
+            path: str = self.__names[name]
+            if os.path.isfile(f"{path}.idx"):
+                tasks.append((name, f"{path}.idx", f"{path}.dat",
+                              self.__names.test, fn, values, self.binary,
+                              batch))
+        if workers > 1 and len(tasks) > 1:
+            with self.__processes(workers) as pool:
+                for future in as_completed(
+                    [pool.submit(store.apply, task) for task in tasks]):
+                    yield future.result()
+        else:
+            for task in tasks:
+                yield store.apply(task)
+
+    def parallel_scan(self,
+                      fn: Callable[[Iterator[Any]], Any],
+                      reduce: Callable[[Any, Any], Any] = operator.add,
+                      workers: int = os.cpu_count() or 1,
+                      values: bool = True,
+                      initial: Any = None) -> Any:
+        """Run fn over every shard as parallel_map does and merge the
+        partial results with reduce, initial if there is no shard
+
+        >>> root.parallel_scan(count_bytes, workers=8)
+        """
+        res: Any = initial
+        first: bool = True
+        for part in self.parallel_map(fn, workers=workers, values=values):
+            res = part if first and initial is None else reduce(res, part)
+            first = False
+        return res
+
+    def wait_prefetch(self, timeout: Optional[float] = None) -> bool:
+        """Wait for the prefetch to finish and admit everything, return
+        False on timeout
+        """
+        if self.__prefetcher is not None:
+            self.__prefetcher.join(timeout)
+            if self.__prefetcher.is_alive():
+                return False
+        while self.__prefetched is not None:
+            self.__drain(limit=sys.maxsize)
+        return True
 
-    def __setitem__(self, key: str, value: bytes):
+    @property
+    def __plain(self) -> bool:
+        """No hook, recorder, tracing or background work to feed, so an
+        operation skips its span, tick and record
+        """
+        return self.__metrics is None and self.__recorder is None and \
+            self.__slowlog <= 0.0 and self.__hotsave <= 0.0 and \
+            self.__prefetched is None and not TRACER.active
+
+    def __tick(self):
+        if self.__prefetched is not None:
+            self.__drain()
+        if self.__hotsave > 0.0:
+            self.__ops += 1
+            if self.__ops % self.HOT_CHECK == 0 and \
+                    monotonic() >= self.__hotnext:
+                self.__hotnext = monotonic() + self.__hotsave
+                self.save_hot()
+
+    def __write(self, key: str):
+        if self.__prefetched is not None:
+            self.__written.add(self.__names.get_name(key))
+
+    def __timer(self, op: str) -> Union[tracing, timer, notimer]:
+        """Root span of an operation
+        """
+        inner: Optional[timer] = None if self.__metrics is None else \
+            self.__metrics.timer("strie_op_seconds", op=op)
+        return TRACER.span(op, inner, root=True, slow=self.__slowlog)
+
+    def __layer(self, layer: str) -> Union[tracing, timer, notimer]:
+        inner: Optional[timer] = None if self.__metrics is None else \
+            self.__metrics.timer("strie_layer_seconds", layer=layer)
+        return TRACER.span(layer, inner)
+
+    def __record(self, op: int, key: str, size: int = recorder.MISSING):
+        if self.__recorder is not None:
+            self.__recorder.add(op, key, size)
+
+    def __caches(self) -> Dict[str, cache]:
+        return {
+            "icache": self.__icache,
+            "scache": self.__scache,
+            "dcache": self.__dcache,
+        }
+
+    def __collect(self, hook: metrics):
+        for name, obj in self.__caches().items():
+            hook.set("strie_cache_hits_total", obj.hits, cache=name)
+            hook.set("strie_cache_misses_total", obj.misses, cache=name)
+            hook.set("strie_cache_entries", len(obj), cache=name)
+            hook.set("strie_cache_size", obj.currsize, cache=name)
+            hook.set("strie_cache_maxsize", obj.maxsize, cache=name)
+        hook.set("strie_shards", len(self.__names))
+
+    def stats(self) -> Dict[str, Any]:
+        """Snapshot of cache statistics, plus all metrics if hooked
+        """
+        res: Dict[str, Any] = {"shards": len(self.__names)}
+        for name, obj in self.__caches().items():
+            lookups: int = obj.hits + obj.misses
+            res[name] = {
+                "entries": len(obj),
+                "size": obj.currsize,
+                "maxsize": obj.maxsize,
+                "hits": obj.hits,
+                "misses": obj.misses,
+                "ratio": obj.hits / lookups if lookups > 0 else 0.0,
+            }
+        if self.__metrics is not None:
+            res["metrics"] = self.__metrics.snapshot()
+        return res
+
+    @property
+    def binary(self) -> bool:
+        return self.__names.test.binary
+
+    def __key(self, key: Union[str, bytes]) -> str:
+        """Binary keys are kept as latin-1 strings, one character per byte
+        """
+        if isinstance(key, bytes):
+            assert self.binary, "bytes key in non-binary mode"
+            return bintokey(key)
         assert isinstance(key, str), f"unexpected type: {type(key)}"
+        return key
+
+    def __iter__(self):
+        self.__iter_scan = self.scan()
+        return self
+
+    def __next__(self):
+        if self.__iter_scan is None:
+            raise StopIteration
+        return next(self.__iter_scan)
+
+    def __contains__(self, key: Union[str, bytes]) -> bool:
+        if self.__plain:
+            key = self.__key(key)
+            return self.__maybe(key) and key in self.__route(key)
+        with self.__timer("contains"):
+            self.__tick()
+            key = self.__key(key)
+            hit: bool = self.__maybe(key) and key in self.__route(key)
+            self.__record(recorder.CONTAINS, key,
+                          0 if hit else recorder.MISSING)
+            return hit
+
+    def __setitem__(self, key: Union[str, bytes], value: bytes):
+        if self.__plain:
+            self.__set(self.__key(key), value)
+            return
+        with self.__timer("set"):
+            self.__tick()
+            key = self.__key(key)
+            self.__write(key)
+            self.__set(key, value)
+            self.__record(recorder.SET, key, len(value))
+
+    def __set(self, key: str, value: bytes):
         assert isinstance(value, bytes), f"unexpected type: {type(value)}"
 
         if key in self.__dcache:
@@ -496,46 +1386,375 @@ class ctrie:
                 return
 
         try:
-            assert self.__route(key).put(key=key, value=value)
+            # key validated by route
+            stor: store = self.__route(key)
+            if self.__bloom_fpr > 0.0 and stor.bloom is None:
+                self.__get_bloom(self.__names.get_name(key))
+            assert stor.put(key=key, value=value, checked=True)
             self.__dcache[key] = value  # cache value
         except Exception as e:
             if key in self.__dcache:
                 del self.__dcache[key]
             raise e
 
-    def __getitem__(self, key: str) -> bytes:
-        assert isinstance(key, str), f"unexpected type: {type(key)}"
-        if key not in self.__dcache:
-            self.__dcache[key] = self.__route(key).get(key=key)
-        value: bytes = self.__dcache[key]
+    def __getitem__(self, key: Union[str, bytes]) -> bytes:
+        if self.__plain:
+            return self.__get(self.__key(key))
+        with self.__timer("get"):
+            self.__tick()
+            key = self.__key(key)
+            try:
+                value: bytes = self.__get(key)
+            except KeyError:
+                self.__record(recorder.GET, key)
+                raise
+            self.__record(recorder.GET, key, len(value))
+            return value
+
+    def __get(self, key: str) -> bytes:
+        if key in self.__dcache:
+            value: bytes = self.__dcache[key]
+        else:
+            if not self.__maybe(key):
+                raise KeyError(key)
+            value = self.__route(key).get(key=key)
+            self.__dcache[key] = value  # may be turned down by the budget
         assert isinstance(value, bytes), f"unexpected type: {type(value)}"
         return value
 
-    def __delitem__(self, key: str):
-        assert isinstance(key, str), f"unexpected type: {type(key)}"
+    def __delitem__(self, key: Union[str, bytes]):
+        if self.__plain:
+            self.__pop(self.__key(key))
+            return
+        with self.__timer("pop"):
+            self.__tick()
+            key = self.__key(key)
+            self.__write(key)
+            self.__pop(key)
+            self.__record(recorder.POP, key)
+
+    def __pop(self, key: str):
         if key in self.__dcache:
             del self.__dcache[key]
         assert self.__route(key).pop(key=key)
 
+    def get_many(self, keys: Sequence[Union[str, bytes]],
+                 workers: int = 4) -> List[bytes]:
+        """Get a batch of keys, aligned to input
+
+        Uncached keys are grouped by shard and their indexes resolved here,
+        then the shards read their datas in a thread pool. Caches are only
+        touched by the calling thread.
+        """
+        assert isinstance(workers, int), f"unexpected type: {type(workers)}"
+        if self.__plain:
+            return self.__get_many(keys, workers)
+        with self.__timer("get_many"):
+            self.__tick()
+            return self.__get_many(keys, workers)
+
+    def __get_many(self, keys: Sequence[Union[str, bytes]],
+                   workers: int) -> List[bytes]:
+        items: List[str] = [self.__key(key) for key in keys]
+        res: Dict[int, bytes] = {}
+        groups: Dict[str, List[int]] = {}
+        for i, key in enumerate(items):
+            if key in self.__dcache:
+                res[i] = self.__dcache[key]
+                continue
+            if not self.__maybe(key):
+                self.__record(recorder.GET, key)
+                raise KeyError(key)
+            groups.setdefault(self.__names.get_name(key), []).append(i)
+
+        tasks: List[Tuple[store, List[str], List[didx]]] = []
+        for name in sorted(groups):
+            stor: store = self.__route(name)
+            names: List[str] = [items[i] for i in groups[name]]
+            try:
+                infos: List[didx] = stor.index.get_many(names)
+            except KeyError:
+                found: List[bool] = stor.index.contains_many(names)
+                key = names[found.index(False)]
+                self.__record(recorder.GET, key)
+                raise KeyError(key) from None
+            tasks.append((stor, names, infos))
+
+        def read(task: Tuple[store, List[str], List[didx]]) -> List[bytes]:
+            return task[0].read_many(task[1], task[2])
+
+        if workers > 1 and len(tasks) > 1:
+            datas: List[List[bytes]] = list(
+                self.__readers(workers).map(read, tasks))
+        else:
+            datas = [read(task) for task in tasks]
+
+        for name, values in zip(sorted(groups), datas):
+            for i, value in zip(groups[name], values):
+                self.__dcache[items[i]] = value
+                res[i] = value
+        for i, key in enumerate(items):
+            self.__record(recorder.GET, key, len(res[i]))
+        return [res[i] for i in range(len(items))]
+
+    def __readers(self, workers: int) -> ThreadPoolExecutor:
+        """Thread pool of batch reads, kept for the object and only
+        replaced to grow
+        """
+        if self.__pool is None or self.__poolsize < workers:
+            if self.__pool is not None:
+                self.__pool.shutdown(wait=False)
+            self.__pool = ThreadPoolExecutor(max_workers=workers,
+                                             thread_name_prefix="strie-read")
+            self.__poolsize = workers
+        return self.__pool
+
     def __get_store(self, name: str) -> store:
         path: str = self.__names[name]
         ipath: str = f"{path}.idx"
         dpath: str = f"{path}.dat"
+        stor: store = store(name=name,
+                            ipath=ipath,
+                            dpath=dpath,
+                            test=self.__names.test,
+                            readonly=self.__readonly,
+                            icache=self.__icache,
+                            hook=self.__metrics)
+        if name in self.__blooms:
+            stor.bloom = self.__blooms[name]
+        return stor
+
+    def __scan_store(self, name: str) -> store:
+        """Store of a shard for scans, cached stores and indexes are used
+        without promotion, others are opened read-only and not admitted
+        """
+        stor: Optional[store] = self.__scache.peek(name)
+        if stor is not None:
+            return stor
+        path: str = self.__names[name]
         return store(name=name,
-                     ipath=ipath,
-                     dpath=dpath,
+                     ipath=f"{path}.idx",
+                     dpath=f"{path}.dat",
                      test=self.__names.test,
-                     readonly=self.__readonly,
-                     icache=self.__icache)
+                     readonly=True,
+                     icache=self.__icache,
+                     admit=False,
+                     hook=self.__metrics)
+
+    def scan(self,
+             values: bool = False,
+             batch: int = 1024,
+             readahead: int = 0) -> Iterator[Any]:
+        """Iterate keys, or (key, value) with values, in order, leaving
+        the caches to the online path
+
+        Values are read a batch at a time in offset order with coalesced
+        reads, cached values are used but none are added. With readahead,
+        a background thread opens the uncached shards on private read-only
+        stores and stays up to readahead batches ahead of the consumer,
+        it is stopped when the scan ends or is closed.
+        """
+        assert isinstance(batch, int) and batch > 0, f"batch {batch} error"
+        assert readahead >= 0, f"readahead {readahead} error"
+        names: List[str] = sorted(self.__names)
+        ahead: List[str] = [
+            name for name in names if self.__scache.peek(name) is None
+            and self.__icache.peek(name) is None
+        ] if readahead > 0 else []
+        if len(ahead) == 0:
+            for name in names:
+                yield from self.__scan_shard(name, values, batch)
+            return
+        out: Queue = Queue(maxsize=readahead)
+        stop: Event = Event()
+        reader: Thread = Thread(target=self.__readahead,
+                                args=({n: self.__names[n]
+                                       for n in ahead}, self.__names.test,
+                                      values, batch, out, stop),
+                                name="strie-scan",
+                                daemon=True)
+        reader.start()
+        try:
+            private: Set[str] = set(ahead)
+            for name in names:
+                if name not in private:
+                    yield from self.__scan_shard(name, values, batch)
+                    continue
+                while True:
+                    item = out.get()
+                    if isinstance(item, BaseException):
+                        raise item
+                    chunk, datas = item
+                    if chunk is None:
+                        break  # end of shard
+                    outs: List[Union[str, bytes]] = [
+                        keytobin(key) for key in chunk
+                    ] if self.binary else chunk
+                    if not values:
+                        yield from outs
+                        continue
+                    yield from zip(outs, datas)
+        finally:
+            stop.set()
+            reader.join()
 
-    def __route(self, key: str) -> store:
+    @classmethod
+    def __readahead(cls, paths: Dict[str, str], test: testakey, values: bool,
+                    batch: int, out: Queue, stop: Event):
+        """Send (keys, values) batches of each shard in order, then
+        (None, None), the caches are only touched by the consumer
+        """
+
+        def put(item: Any) -> bool:
+            while not stop.is_set():
+                try:
+                    out.put(item, timeout=0.1)
+                    return True
+                except Full:
+                    continue
+            return False
+
+        try:
+            for name, path in paths.items():
+                stor: store = store(name=name,
+                                    ipath=f"{path}.idx",
+                                    dpath=f"{path}.dat",
+                                    test=test,
+                                    readonly=True)
+                keys: List[str] = list(stor)
+                for i in range(0, len(keys), batch):
+                    chunk: List[str] = keys[i:i + batch]
+                    datas: Optional[List[bytes]] = stor.get_many(
+                        chunk) if values else None
+                    if not put((chunk, datas)):
+                        return
+                if not put((None, None)):
+                    return
+        except Exception as error:  # raised again by the consumer
+            put(error)
+
+    def __scan_shard(self, name: str, values: bool,
+                     batch: int) -> Iterator[Any]:
+        stor: store = self.__scan_store(name)
+        keys: List[str] = list(stor)
+        for i in range(0, len(keys), batch):
+            chunk: List[str] = keys[i:i + batch]
+            outs: List[Union[str, bytes]] = [
+                keytobin(key) for key in chunk
+            ] if self.binary else chunk
+            if not values:
+                yield from outs
+                continue
+            yield from zip(outs, self.__scan_values(stor, chunk))
+
+    def __scan_values(self, stor: store, keys: List[str]) -> List[bytes]:
+        res: Dict[str, bytes] = {}
+        miss: List[str] = []
+        for key in keys:
+            value: Optional[bytes] = self.__dcache.peek(key)
+            if value is None:
+                miss.append(key)
+            else:
+                res[key] = value
+        if len(miss) > 0:
+            datas = stor.read_many(miss, stor.index.get_many(miss))
+            res.update(zip(miss, datas))
+        return [res[key] for key in keys]
+
+    def __get_bloom(self, name: str) -> bloom:
+        """Load the shard filter if fresh, otherwise build it from the
+        shard index, the store keeps it up to date
+
+        Read-only, a cached filter is checked against the index file, as
+        another process may have written the shard since.
+        """
+        if name in self.__blooms and not self.__readonly:
+            return self.__blooms[name]
+        path: str = self.__names[name]
+        stamp: int = bloom.stamp(f"{path}.idx")
+        if name in self.__blooms:
+            if self.__bstamps[name] == stamp:
+                return self.__blooms[name]
+            del self.__blooms[name]  # stale
+        filt: Optional[bloom] = bloom.load(path=f"{path}.blm",
+                                           stamp=stamp,
+                                           fpr=self.__bloom_fpr,
+                                           prefix=self.__bloom_prefix)
+        if filt is None:
+            stor: store = self.__route(name)
+            filt = bloom(path=f"{path}.blm",
+                         fpr=self.__bloom_fpr,
+                         prefix=self.__bloom_prefix)
+            stor.bloom = filt
+            filt.reset(stor.index, capacity=len(stor.index) * 2)
+            stor.dump_bloom()
+        else:
+            if name in self.__scache:
+                self.__scache[name].bloom = filt
+        self.__blooms[name] = filt
+        self.__bstamps[name] = stamp
+        return filt
+
+    def __maybe(self, key: str) -> bool:
+        """False if key is surely absent, without opening its shard
+        """
         name: str = self.__names.get_name(key)
-        stor: store = self.__scache[
-            name] if name in self.__scache else self.__get_store(name)
-        assert isinstance(stor, store), f"unexpected type: {type(stor)}"
-        if name not in self.__scache:
-            self.__scache[name] = stor
-        return stor
+        if name not in self.__names:
+            return False  # never create a shard for a lookup
+        if self.__bloom_fpr <= 0.0:
+            return True
+        if self.__scache.peek(name) is not None or \
+                self.__icache.peek(name) is not None:
+            return True  # the index in memory answers as fast
+        return key in self.__get_bloom(name)
+
+    def __route(self, key: str) -> store:
+        with self.__layer("route"):
+            name: str = self.__names.get_name(key)
+            if name in self.__scache:
+                stor: store = self.__scache[name]
+            else:
+                stor = self.__get_store(name)
+                self.__scache[name] = stor
+            assert isinstance(stor, store), f"unexpected type: {type(stor)}"
+            return stor
+
+    def fuzzy(self, key: str,
+              max_distance: int) -> Iterator[Tuple[str, int]]:
+        """Approximate match across shards, skip shards by name distance
+        """
+        assert isinstance(key, str), f"unexpected type: {type(key)}"
+        init: List[int] = list(range(len(key) + 1))
+        for name in sorted(self.__names):
+            if min(editrow(init, key, name)) > max_distance:
+                continue
+            yield from self.__scan_store(name).fuzzy(
+                key=key, max_distance=max_distance)
+
+    def match(self, expr: Union[str, pattern]) -> Iterator[str]:
+        """Match keys across shards, skip shards by name prefix
+        """
+        if isinstance(expr, str):
+            expr = pattern.glob(expr)
+        assert isinstance(expr, pattern), f"unexpected type: {type(expr)}"
+        for name in sorted(self.__names):
+            if len(expr.feed(expr.start(), name)) == 0:
+                continue
+            yield from self.__scan_store(name).match(expr=expr)
+
+    def find_suffix(self, suffix: str) -> Iterator[str]:
+        """Keys ending with suffix, via each shard's suffix index
+        """
+        assert isinstance(suffix, str), f"unexpected type: {type(suffix)}"
+        for name in sorted(self.__names):
+            yield from sorted(self.__scan_store(name).find_suffix(suffix))
+
+    def find_substring(self, text: str) -> Iterator[str]:
+        """Keys containing text, via each shard's n-gram index
+        """
+        assert isinstance(text, str), f"unexpected type: {type(text)}"
+        for name in sorted(self.__names):
+            yield from self.__scan_store(name).find_substring(text)
 
     @classmethod
     def init(cls, path: str, word: Sequence[int], test: testakey) -> bool:
@@ -544,6 +1763,25 @@ class ctrie:
             assert nhdl.init(path=path, word=word, test=test)
         return os.path.isfile(file)
 
+    @classmethod
+    def hextobin(cls, src: str, dst: str, word: Sequence[int] = (1, )) -> int:
+        """Convert a hex-keyed store into a new binary-keyed store
+
+        Every key is decoded from hex, values are copied as they are.
+        Return the number of converted keys.
+        """
+        assert isinstance(src, str), f"unexpected type: {type(src)}"
+        assert isinstance(dst, str), f"unexpected type: {type(dst)}"
+        assert not os.path.exists(nhdl.file(dst)), f"'{dst}' already exists"
+        source = cls(path=src, readonly=True)
+        assert not source.binary, f"'{src}' is already binary"
+        target = cls(path=dst, word=word, test=testbin, readonly=False)
+        count: int = 0
+        for key in source:
+            target[bytes.fromhex(key)] = source[key]
+            count += 1
+        return count
+
     def clear(self):
         self.__scache.clear()
         self.__icache.clear()
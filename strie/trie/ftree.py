@@ -0,0 +1,204 @@
+# coding:utf-8
+
+from array import array
+from bisect import bisect_left
+from ctypes import Structure
+from ctypes import addressof
+from ctypes import c_char
+from ctypes import c_uint8
+from ctypes import c_uint64
+from ctypes import memmove
+from ctypes import sizeof
+import mmap
+import os
+from typing import Iterable
+from typing import Iterator
+from typing import Optional
+from typing import Sequence
+from typing import Tuple
+from typing import Union
+
+from ..utils import bintokey
+from ..utils import keytobin
+
+uint8_t = c_uint8
+uint64_t = c_uint64
+
+
+class frozen_radix:
+    """Read-only radix tree compiled into packed sorted arrays
+
+    Layout: magic, head, key offsets (uint32 * (count + 1)), value offsets
+    (uint64 * (count + 1), only with values), key bytes, value bytes.
+    Offsets use native byte order, keys are sorted so lookups are binary
+    searches straight over the buffer, which may be a memory-mapped file.
+    """
+
+    MAGIC = b"\x3a\x46\xc5\x52\x7a\x5c\x01\xa3"
+    SIZE_MAGIC = len(MAGIC)
+
+    class head(Structure):
+
+        _fields_ = [
+            ("count", uint64_t),
+            ("ksize", uint64_t),
+            ("vsize", uint64_t),
+            ("values", uint8_t),
+        ]
+
+    SIZE_HEAD = sizeof(head)
+
+    class keyseq(Sequence[bytes]):
+
+        def __init__(self, frozen: "frozen_radix"):
+            self.__frozen: frozen_radix = frozen
+
+        def __len__(self) -> int:
+            return len(self.__frozen)
+
+        def __getitem__(self, index) -> bytes:
+            return self.__frozen.rawkey(index)
+
+    def __init__(self, buffer: Union[bytes, mmap.mmap]):
+        view: memoryview = memoryview(buffer)
+        assert bytes(view[:self.SIZE_MAGIC]) == self.MAGIC, "magic error"
+        head = self.head()
+        begin: int = self.SIZE_MAGIC
+        end: int = begin + self.SIZE_HEAD
+        ptr = (c_char * self.SIZE_HEAD).from_buffer(bytearray(view[begin:end]))
+        memmove(addressof(head), ptr, self.SIZE_HEAD)
+        count: int = head.count
+        begin, end = end, end + 4 * (count + 1)
+        self.__koffs: memoryview = view[begin:end].cast("I")
+        if head.values:
+            begin, end = end, end + 8 * (count + 1)
+            self.__voffs: Optional[memoryview] = view[begin:end].cast("Q")
+        else:
+            self.__voffs = None
+        begin, end = end, end + head.ksize
+        self.__kdata: memoryview = view[begin:end]
+        begin, end = end, end + head.vsize
+        self.__vdata: memoryview = view[begin:end]
+        assert end == len(view), f"size {len(view)} != {end}"
+        self.__count: int = count
+        self.__buffer: Union[bytes, mmap.mmap] = buffer
+        self.__view: memoryview = view
+
+    def __len__(self) -> int:
+        return self.__count
+
+    def __iter__(self) -> Iterator[str]:
+        for i in range(self.__count):
+            yield self.key(i)
+
+    def __contains__(self, key: str) -> bool:
+        return self.__find(key) >= 0
+
+    def __getitem__(self, key: str) -> bytes:
+        index: int = self.__find(key)
+        if index < 0:
+            raise KeyError(key)
+        return self.value(index)
+
+    @property
+    def nbytes(self) -> int:
+        return len(self.__view)
+
+    def __find(self, key: str) -> int:
+        assert isinstance(key, str), f"unexpected type: {type(key)}"
+        raw: bytes = keytobin(key)
+        index: int = bisect_left(self.keyseq(self), raw)
+        if index < self.__count and self.rawkey(index) == raw:
+            return index
+        return -1
+
+    def rawkey(self, index: int) -> bytes:
+        assert 0 <= index < self.__count, f"index {index} out of range"
+        begin: int = self.__koffs[index]
+        return bytes(self.__kdata[begin:self.__koffs[index + 1]])
+
+    def key(self, index: int) -> str:
+        return bintokey(self.rawkey(index))
+
+    def value(self, index: int) -> bytes:
+        assert 0 <= index < self.__count, f"index {index} out of range"
+        if self.__voffs is None:
+            raise KeyError(self.key(index))
+        begin: int = self.__voffs[index]
+        return bytes(self.__vdata[begin:self.__voffs[index + 1]])
+
+    def get(self, key: str,
+            default: Optional[bytes] = None) -> Optional[bytes]:
+        index: int = self.__find(key)
+        return self.value(index) if index >= 0 else default
+
+    def rank(self, key: str) -> int:
+        """Number of keys less than key
+        """
+        assert isinstance(key, str), f"unexpected type: {type(key)}"
+        return bisect_left(self.keyseq(self), keytobin(key))
+
+    def prefix(self, prefix: str) -> Iterator[str]:
+        """Keys starting with prefix, in order
+        """
+        raw: bytes = keytobin(prefix)
+        index: int = self.rank(prefix)
+        while index < self.__count:
+            key: bytes = self.rawkey(index)
+            if key[:len(raw)] != raw:
+                break
+            yield bintokey(key)
+            index += 1
+
+    def close(self):
+        for view in (self.__koffs, self.__voffs, self.__kdata, self.__vdata,
+                     self.__view):
+            if view is not None:
+                view.release()
+        if isinstance(self.__buffer, mmap.mmap):
+            self.__buffer.close()
+
+    def dump(self, path: str) -> int:
+        assert isinstance(path, str), f"unexpected type: {type(path)}"
+        with open(path, "wb") as hdl:
+            return hdl.write(self.__view)
+
+    @classmethod
+    def load(cls, path: str) -> "frozen_radix":
+        """Memory-map a dumped file, nothing is read up front
+        """
+        assert os.path.isfile(path), f"'{path}' is not a regular file"
+        with open(path, "rb") as hdl:
+            buffer = mmap.mmap(hdl.fileno(), 0, access=mmap.ACCESS_READ)
+        return frozen_radix(buffer)
+
+    @classmethod
+    def build(cls, items: Iterable[Tuple[str, Optional[bytes]]],
+              values: bool = True) -> "frozen_radix":
+        """Compile sorted (key, value) pairs, value is ignored if not values
+        """
+        koffs: array = array("I", [0])
+        voffs: array = array("Q", [0])
+        kdata: bytearray = bytearray()
+        vdata: bytearray = bytearray()
+        last: Optional[bytes] = None
+        for key, value in items:
+            raw: bytes = keytobin(key)
+            assert last is None or last < raw, f"unsorted key '{key}'"
+            last = raw
+            kdata += raw
+            koffs.append(len(kdata))
+            if values:
+                assert isinstance(value, bytes), \
+                    f"unexpected type: {type(value)}"
+                vdata += value
+                voffs.append(len(vdata))
+        assert len(kdata) < 2**32, f"keys size {len(kdata)} overflow"
+        head = cls.head()
+        head.count = len(koffs) - 1
+        head.ksize = len(kdata)
+        head.vsize = len(vdata)
+        head.values = values
+        buffer: bytes = cls.MAGIC + bytes(head) + koffs.tobytes() + \
+            (voffs.tobytes() if values else b"") + bytes(kdata) + bytes(vdata)
+        return frozen_radix(buffer)
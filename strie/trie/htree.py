@@ -11,12 +11,16 @@ def checkhkey(key: str, len: int) -> bool:
 
 
 testhex = testakey(allowed_char=testakey.hex, inspection=checkhkey)
+testbin = testakey(allowed_char=testakey.bin, inspection=checkhkey)
 
 
-def htrie(prefix: str = "") -> radix:
+def htrie(prefix: str = "", binary: bool = False) -> radix:
     """Hash-based radix tree
+
+    Binary keys are raw hash bytes as latin-1 strings (see bintokey), half
+    the length of hex keys, the first byte selects the pinned fanout node.
     """
-    root = radix(prefix=prefix, test=testhex)
+    root = radix(prefix=prefix, test=testbin if binary else testhex)
     for i in range(256):
-        root.pin(prefix=f"{i:02x}")
+        root.pin(prefix=chr(i) if binary else f"{i:02x}")
     return root
@@ -1,25 +1,111 @@
 # coding:utf-8
 
+from ctypes import Structure
+from ctypes import c_double
+from ctypes import c_uint8
+from ctypes import c_uint32
+from ctypes import c_uint64
+from ctypes import sizeof
+import heapq
+from io import BytesIO
+from typing import BinaryIO
+from typing import Callable
 from typing import Dict
+from typing import FrozenSet
+from typing import Generic
+from typing import Iterator
 from typing import List
 from typing import Optional
+from typing import Sequence
 from typing import Tuple
 from typing import TypeVar
-
+from typing import Union
+import weakref
+
+from ..utils import bintokey
+from ..utils import codec
+from ..utils import keytobin
+from ..utils import pattern
+from ..utils import pklcodec
 from ..utils import testakey
+from .ftree import frozen_radix
 
 VT = TypeVar("VT")  # Value type.
 VTT = TypeVar("VTT")  # Value type.
 
+uint8_t = c_uint8
+uint32_t = c_uint32
+uint64_t = c_uint64
+double_t = c_double
+
 testalnum = testakey(allowed_char=testakey.alnum)
 
 
+def editrow(row: List[int], key: str, text: str) -> List[int]:
+    """Extend a Levenshtein DP row of key by each character of text
+    """
+    for char in text:
+        prev: List[int] = row
+        row = [prev[0] + 1]
+        for i in range(1, len(prev)):
+            row.append(min(row[i - 1] + 1, prev[i] + 1,
+                           prev[i - 1] + (key[i - 1] != char)))
+    return row
+
+
 class radix(Dict[str, VT]):
     """Radix tree
     """
 
     LEAFS = 128
     NODES = 256
+    WEIGHT = 0.0  # default weight of keys
+
+    MAGIC = b"\x3a\x52\xc5\x44\x6d\x5c\x5e\xa3"
+    SIZE_MAGIC = len(MAGIC)
+    VERSION = 3
+
+    class head(Structure):
+
+        _fields_ = [
+            ("version", uint8_t),
+            ("codec", uint8_t),
+            ("weighted", uint8_t),
+            ("nodes", uint64_t),
+        ]
+
+    class nodehead(Structure):
+
+        _fields_ = [
+            ("prefix", uint32_t),  # keys may be 65536 characters
+            ("tack", uint8_t),
+            ("upper", uint32_t),
+            ("lower", uint64_t),
+            ("leafs", uint32_t),
+            ("child", uint32_t),
+            ("count", uint64_t),
+        ]
+
+    class leafhead(Structure):
+
+        _fields_ = [
+            ("keylen", uint32_t),
+            ("vallen", uint32_t),
+        ]
+
+    SIZE_HEAD = sizeof(head)
+    SIZE_NODE = sizeof(nodehead)
+    SIZE_LEAF = sizeof(leafhead)
+    SIZE_WEIGHT = sizeof(double_t)
+
+    class share:
+        """State shared by all nodes of a tree
+        """
+
+        def __init__(self):
+            self.weighted: bool = False
+            self.views: weakref.WeakSet = weakref.WeakSet()
+            self.epoch: int = 0  # bumped on every structural change
 
     class store(Dict[str, VTT]):
 
@@ -28,9 +114,10 @@ class radix(Dict[str, VT]):
                 f"unexpected type: {type(threshold)}"
             assert threshold > 0, f"threshold {threshold} error"
             self.__upper: int = min(threshold, radix.LEAFS)
-            self.__lower: int = int(threshold / 2)
+            self.__lower: int = threshold // 2  # huge for long prefixes
             self.__stats: List[int] = [0] * radix.NODES
             self.__items: Dict[str, VTT] = {}
+            self.__weight: Dict[str, float] = {}
 
         @property
         def stats(self) -> List[int]:
@@ -44,6 +131,33 @@ class radix(Dict[str, VT]):
         def upper(self) -> int:
             return self.__upper
 
+        def limit(self, upper: int, lower: int):
+            """Restore the thresholds of a dumped node, which depend on
+            the prefix lengths at creation rather than the current ones
+            """
+            assert 0 < upper <= radix.LEAFS, f"upper {upper} error"
+            assert lower >= 0, f"lower {lower} error"
+            self.__upper = upper
+            self.__lower = lower
+
+        @property
+        def maximum(self) -> Optional[float]:
+            """Maximum weight of leafs, None if empty
+            """
+            if len(self.__items) == 0:
+                return None
+            maxw = max(self.__weight.values(), default=None)
+            if len(self.__weight) < len(self.__items):
+                maxw = radix.WEIGHT if maxw is None else \
+                    max(maxw, radix.WEIGHT)
+            return maxw
+
+        def weight(self, key: str) -> Optional[float]:
+            return self.__weight.get(key)
+
+        def copy(self) -> Dict[str, VTT]:
+            return dict(self.__items)
+
         def keys(self) -> List[str]:
             return list(self.__items.keys())
 
@@ -66,14 +180,21 @@ class radix(Dict[str, VT]):
             if key in self.__items and key != "":
                 self.__stats[ord(key[0])] -= 1
             del self.__items[key]
+            if key in self.__weight:
+                del self.__weight[key]
 
-        def put(self, key: str, value: VTT) -> bool:
+        def put(self,
+                key: str,
+                value: VTT,
+                weight: Optional[float] = None) -> bool:
             split = False
             if key not in self.__items and key != "":
                 index = ord(key[0])
                 self.__stats[index] += 1
                 split = self.__stats[index] >= self.__upper
             self.__items[key] = value
+            if weight is not None:
+                self.__weight[key] = weight
             return split
 
     def __init__(self,
@@ -88,6 +209,7 @@ class radix(Dict[str, VT]):
 
         assert (isinstance(root, radix) and length > 0) or root is None
         maximum: int = 1 if root is None else root.__leafs.upper * 2**length
+        share: radix.share = radix.share() if root is None else root.__share
 
         self.__prefix: str = prefix
         self.__length: int = length
@@ -98,6 +220,8 @@ class radix(Dict[str, VT]):
         self.__leafs: radix.store[VT] = radix.store(threshold=maximum)
         self.__nodes: Dict[str, radix] = {}
         self.__count: int = 0
+        self.__share: radix.share = share
+        self.__maxw: Optional[float] = None
         self.__iter_objs: List[Tuple[str, radix]] = []
         self.__iter_keys: List[str] = []
 
@@ -121,6 +245,8 @@ class radix(Dict[str, VT]):
         assert isinstance(value, str), f"unexpected type: {type(value)}"
         length = len(value)
         assert length > 0
+        self.__cow()
+        self.__share.epoch += 1
         self.__prefix = value
         self.__length = length
 
@@ -215,9 +341,11 @@ class radix(Dict[str, VT]):
                 if prev.__tack is False:
                     # recycle child node with fewer leaves
                     if prev.__count <= curr.__leafs.lower:
+                        curr.__cow()
                         for key in prev:
                             assert key not in curr.__leafs
-                            curr.__leafs[key] = prev[key]
+                            curr.__leafs.put(key, prev[key],
+                                             prev.__weight(key))
                         prev.__count = 0
                     # trim empty child node
                     if prev.__count == 0:
@@ -309,6 +437,9 @@ class radix(Dict[str, VT]):
         assert len(value.prefix) > 0, f"prefix '{value.prefix}' error"
         assert value.prefix not in self.__nodes
         assert isinstance(modify, bool), f"unexpected type: {type(modify)}"
+        self.__cow()
+        value.__cow()
+        self.__share.epoch += 1
         # check root node
         if value.__root is not self:
             value.__root = self
@@ -317,7 +448,8 @@ class radix(Dict[str, VT]):
             if key[:value.__length] == value.prefix:
                 newkey = key[value.__length:]
                 assert newkey not in value.__leafs
-                value.__leafs[newkey] = self.__leafs[key]
+                value.__leafs.put(newkey, self.__leafs[key],
+                                  self.__leafs.weight(key))
                 value.__count += 1
                 del self.__leafs[key]
                 if modify is True:
@@ -332,6 +464,9 @@ class radix(Dict[str, VT]):
                 value.__nodes[newkey] = self.__nodes[key]
                 del self.__nodes[key]
         self.__nodes[value.prefix] = value
+        if self.__share.weighted:
+            value.__maxw = value.__maxweight()
+            self.__reweigh()
         return True
 
     def __get_node(self, prefix: str) -> Optional["radix"]:
@@ -351,13 +486,94 @@ class radix(Dict[str, VT]):
         assert isinstance(prefix, str), f"unexpected type: {type(prefix)}"
         assert len(prefix) > 0, f"prefix length {len(prefix)} error"
         assert prefix in self.__nodes and self.__nodes[prefix].__tack is False
+        self.__cow()
+        self.__share.epoch += 1
         del self.__nodes[prefix]
+        if self.__share.weighted:
+            self.__reweigh()
         return True
 
+    def __cow(self):
+        """Copy node state into live snapshots before modification
+        """
+        if len(self.__share.views) == 0:
+            return
+        for view in self.__share.views:
+            if not view.saved(self):
+                view.save(self, self.__prefix, self.__leafs.copy(),
+                          dict(self.__nodes))
+
+    def __state(self) -> Tuple[str, Dict[str, VT], Dict[str, "radix"]]:
+        return self.__prefix, self.__leafs.copy(), self.__nodes
+
+    def snapshot(self) -> "snapshot[VT]":
+        """Immutable view of the current tree in O(1)
+
+        Writers copy a node into live views before its first change, so
+        readers of the view never see later modifications.
+        """
+        view: snapshot[VT] = snapshot(self, len(self), radix.__state)
+        self.__share.views.add(view)
+        return view
+
+    def freeze(self) -> frozen_radix:
+        """Compile into a read-only, array-backed frozen radix
+
+        Values must be bytes, or all None for a plain key set.
+        """
+        keys: List[str] = sorted(self)
+        values: bool = any(self.get(k) is not None for k in keys)
+        return frozen_radix.build(((k, self.get(k)) for k in keys), values)
+
+    def __maxweight(self) -> Optional[float]:
+        maxw: Optional[float] = self.__leafs.maximum
+        for node in self.__nodes.values():
+            if node.__maxw is not None and (maxw is None or
+                                            node.__maxw > maxw):
+                maxw = node.__maxw
+        return maxw
+
+    def __reweigh(self):
+        """Recompute maximum weight upwards until unchanged
+        """
+        curr: Optional[radix] = self
+        while curr is not None:
+            maxw: Optional[float] = curr.__maxweight()
+            if maxw == curr.__maxw:
+                break
+            curr.__maxw = maxw
+            curr = curr.__root
+
+    def __raise(self, weight: float):
+        """Raise maximum weight upwards until already not less
+        """
+        curr: Optional[radix] = self
+        while curr is not None:
+            if curr.__maxw is not None and curr.__maxw >= weight:
+                break
+            curr.__maxw = weight
+            curr = curr.__root
+
+    def __weigh_all(self):
+        """Enable weights and compute maximum weight of the whole tree
+        """
+        top: radix = self
+        while top.__root is not None:
+            top = top.__root
+        objs: List[radix] = [top]
+        order: List[radix] = []
+        while len(objs) > 0:
+            obj = objs.pop()
+            order.append(obj)
+            objs.extend(obj.__nodes.values())
+        for obj in reversed(order):
+            obj.__maxw = obj.__maxweight()
+        self.__share.weighted = True
+
     def pin(self, prefix: str) -> bool:
         assert isinstance(prefix, str), f"unexpected type: {type(prefix)}"
         assert len(prefix) > 0, f"prefix length {len(prefix)} error"
-        obj = radix(prefix=prefix, root=self)
+        obj = radix(prefix=prefix, test=self.test, root=self)
         obj.__tack = True
         tmp = self
         while tmp is not None:
@@ -365,9 +581,21 @@ class radix(Dict[str, VT]):
             tmp = tmp.__root
         return self.__set_node(obj)
 
-    def put(self, key: str, value: VT, modify: bool = True) -> bool:
-        assert self.__test.check(key) and self.__check(key)
+    def put(self,
+            key: str,
+            value: VT,
+            modify: bool = True,
+            weight: Optional[float] = None,
+            checked: bool = False) -> bool:
+        """Put key, set checked if the key has already been validated
+        """
+        assert (checked or self.__test.check(key)) and self.__check(key)
         assert isinstance(modify, bool), f"unexpected type: {type(modify)}"
+        assert weight is None or isinstance(weight, (int, float)), \
+            f"unexpected type: {type(weight)}"
+
+        if weight is not None and not self.__share.weighted:
+            self.__weigh_all()
 
         obj: radix[VT] = self
 
@@ -380,19 +608,34 @@ class radix(Dict[str, VT]):
                 obj = tmp
                 continue
 
-            # count inc if key not exist
-            if key in obj.__leafs:
-                assert modify is True
+            return obj.__put_leaf(key, value, modify, weight)
+
+    def __put_leaf(self, key: str, value: VT, modify: bool,
+                   weight: Optional[float]) -> bool:
+        # count inc if key not exist
+        older: Optional[float] = None
+        if key in self.__leafs:
+            assert modify is True
+            older = self.__leafs.weight(key)
+        else:
+            assert self.__inc() == 1
+
+        # mark node leaf modify
+        if modify is True:
+            assert self.__chg() is True
+
+        self.__cow()
+        split = self.__leafs.put(key=key, value=value, weight=weight)
+        if self.__share.weighted:
+            newer = self.__leafs.weight(key)
+            newer = radix.WEIGHT if newer is None else newer
+            if older is not None and newer < older:
+                self.__reweigh()
             else:
-                assert obj.__inc() == 1
-
-            # mark node leaf modify
-            if modify is True:
-                assert obj.__chg() is True
-
-            if obj.__leafs.put(key=key, value=value):
-                obj.__split_node(key=key, modify=modify)
-            return True
+                self.__raise(newer)
+        if split:
+            self.__split_node(key=key, modify=modify)
+        return True
 
     def get(self, key: str) -> VT:
         assert isinstance(key, str), f"unexpected type: {type(key)}"
@@ -406,6 +649,23 @@ class radix(Dict[str, VT]):
                 continue
             return obj.__leafs[key]
 
+    def __weight(self, key: str) -> Optional[float]:
+        obj: radix[VT] = self
+        while True:
+            assert obj.__check(key), f"check key '{key}' error"
+            key = obj.__nickname(key)
+            tmp = obj.__get_node(key)
+            if isinstance(tmp, radix):
+                obj = tmp
+                continue
+            assert key in obj.__leafs, f"key '{key}' not exist"
+            return obj.__leafs.weight(key)
+
+    def weight(self, key: str) -> float:
+        assert isinstance(key, str), f"unexpected type: {type(key)}"
+        weight: Optional[float] = self.__weight(key)
+        return radix.WEIGHT if weight is None else weight
+
     def pop(self, key: str) -> bool:
         assert isinstance(key, str), f"unexpected type: {type(key)}"
         assert self.__check(key), f"check key '{key}' error"
@@ -420,15 +680,98 @@ class radix(Dict[str, VT]):
                 obj = tmp
                 continue
 
-            # failure if key not exist
-            if key not in obj.__leafs:
-                return False
+            return obj.__pop_leaf(key)
 
-            # delete leaf and mark node leaf modify
-            assert obj.__chg() is True
-            del obj.__leafs[key]
-            assert obj.__dec() == 1
-            return True
+    def __pop_leaf(self, key: str) -> bool:
+        # failure if key not exist
+        if key not in self.__leafs:
+            return False
+
+        # delete leaf and mark node leaf modify
+        assert self.__chg() is True
+        self.__cow()
+        del self.__leafs[key]
+        if self.__share.weighted:
+            self.__reweigh()
+        assert self.__dec() == 1
+        return True
+
+    def __locate(self, key: str, stack: List[Tuple[str, "radix"]]
+                 ) -> Tuple["radix", str]:
+        """Find the node holding key and its nickname there
+
+        The stack holds (path, node) of the previous lookup, ancestors
+        shared with key are reused and only the rest is walked.
+        """
+        assert isinstance(key, str), f"unexpected type: {type(key)}"
+        while len(stack) > 1 and key[:len(stack[-1][0])] != stack[-1][0]:
+            stack.pop()
+        path, obj = stack[-1]
+        assert key[:len(path)] == path, f"check key '{key}' error"
+        key = key[len(path):]
+        while True:
+            tmp = obj.__get_node(key)
+            if not isinstance(tmp, radix):
+                return obj, key
+            obj = tmp
+            key = obj.__nickname(key)
+            path += obj.prefix
+            stack.append((path, obj))
+
+    def __batch(self, keys: Sequence[str]) -> List[int]:
+        """Indexes of keys in sorted order, neighbours share ancestors
+        """
+        return sorted(range(len(keys)), key=keys.__getitem__)
+
+    def get_many(self, keys: Sequence[str]) -> List[VT]:
+        """Get a batch of keys in one sorted walk, aligned to input
+        """
+        stack: List[Tuple[str, radix]] = [(self.prefix, self)]
+        res: Dict[int, VT] = {}
+        for i in self.__batch(keys):
+            obj, key = self.__locate(keys[i], stack)
+            res[i] = obj.__leafs[key]
+        return [res[i] for i in range(len(keys))]
+
+    def contains_many(self, keys: Sequence[str]) -> List[bool]:
+        stack: List[Tuple[str, radix]] = [(self.prefix, self)]
+        res: List[bool] = [False] * len(keys)
+        for i in self.__batch(keys):
+            obj, key = self.__locate(keys[i], stack)
+            res[i] = key in obj.__leafs
+        return res
+
+    def put_many(self,
+                 items: Sequence[Tuple[str, VT]],
+                 modify: bool = True,
+                 checked: bool = False) -> bool:
+        """Put a batch of (key, value), later items of a key win
+        """
+        assert isinstance(modify, bool), f"unexpected type: {type(modify)}"
+        keys: List[str] = [item[0] for item in items]
+        assert checked or all(self.__test.check_many(keys))
+        stack: List[Tuple[str, radix]] = [(self.prefix, self)]
+        epoch: int = self.__share.epoch
+        for i in self.__batch(keys):
+            # ancestors on the stack are stale after a split or recycle
+            if self.__share.epoch != epoch:
+                del stack[1:]
+                epoch = self.__share.epoch
+            obj, key = self.__locate(keys[i], stack)
+            assert obj.__put_leaf(key, items[i][1], modify, None)
+        return True
+
+    def pop_many(self, keys: Sequence[str]) -> List[bool]:
+        stack: List[Tuple[str, radix]] = [(self.prefix, self)]
+        epoch: int = self.__share.epoch
+        res: List[bool] = [False] * len(keys)
+        for i in self.__batch(keys):
+            if self.__share.epoch != epoch:
+                del stack[1:]
+                epoch = self.__share.epoch
+            obj, key = self.__locate(keys[i], stack)
+            res[i] = obj.__pop_leaf(key)
+        return res
 
     def trim(self, key: str) -> int:
         assert isinstance(key, str), f"unexpected type: {type(key)}"
@@ -469,12 +812,308 @@ class radix(Dict[str, VT]):
         for k in obj.__leafs:
             if k[:length] == key:
                 delete.append(k)
+        if len(delete) > 0:
+            obj.__cow()
         for k in delete:
             assert k in obj.__leafs
             del obj.__leafs[k]
             assert k not in obj.__leafs
             sumdec += 1
 
+        if sumdec > 0 and obj.__share.weighted:
+            obj.__reweigh()
         if sumdec > 0:
             sum += obj.__dec(sumdec)
         return sum
+
+    def fuzzy(self, key: str,
+              max_distance: int) -> Iterator[Tuple[str, int]]:
+        """Approximate match by Levenshtein distance
+
+        Walk the tree with an incrementally computed DP row and prune
+        subtrees whose row minimum already exceeds max_distance.
+        """
+        assert isinstance(key, str), f"unexpected type: {type(key)}"
+        assert isinstance(max_distance, int), \
+            f"unexpected type: {type(max_distance)}"
+        assert max_distance >= 0, f"distance {max_distance} error"
+        init: List[int] = list(range(len(key) + 1))
+        objs: List[Tuple[str, List[int], radix]] = [("", init, self)]
+        while len(objs) > 0:
+            name, row, obj = objs.pop()
+            row = editrow(row, key, obj.prefix)
+            if min(row) > max_distance:
+                continue
+            name += obj.prefix
+            for k in sorted(obj.__leafs.keys()):
+                end: List[int] = editrow(row, key, k)
+                if end[-1] <= max_distance:
+                    yield name + k, end[-1]
+            for k in sorted(obj.__nodes.keys(), reverse=True):
+                objs.append((name, row, obj.__nodes[k]))
+
+    def match(self, expr: Union[str, pattern]) -> Iterator[str]:
+        """Match keys by glob (str) or compiled pattern
+
+        The pattern automaton is intersected with the tree, only branches
+        that still have live states are explored.
+        """
+        if isinstance(expr, str):
+            expr = pattern.glob(expr)
+        assert isinstance(expr, pattern), f"unexpected type: {type(expr)}"
+        objs: List[Tuple[str, FrozenSet[int], radix]] = [
+            ("", expr.start(), self)
+        ]
+        while len(objs) > 0:
+            name, states, obj = objs.pop()
+            states = expr.feed(states, obj.prefix)
+            if len(states) == 0:
+                continue
+            name += obj.prefix
+            for k in sorted(obj.__leafs.keys()):
+                if expr.accept(expr.feed(states, k)):
+                    yield name + k
+            for k in sorted(obj.__nodes.keys(), reverse=True):
+                objs.append((name, states, obj.__nodes[k]))
+
+    def top_k(self, prefix: str, k: int) -> List[Tuple[str, float]]:
+        """Heaviest k keys starting with prefix, ties in key order
+
+        Best-first search over subtree maximum weights, only the nodes on
+        the way to the k results are expanded.
+        """
+        assert isinstance(prefix, str), f"unexpected type: {type(prefix)}"
+        assert isinstance(k, int), f"unexpected type: {type(k)}"
+        weighted: bool = self.__share.weighted
+        heap: List[Tuple[float, str, int, Optional[radix]]] = []
+
+        def push_node(name: str, node: radix):
+            maxw = node.__maxw if weighted else (
+                radix.WEIGHT if len(node) > 0 else None)
+            if maxw is not None:
+                heapq.heappush(heap, (-maxw, name, 0, node))
+
+        def push_leaf(key: str, weight: Optional[float]):
+            weight = radix.WEIGHT if weight is None else weight
+            heapq.heappush(heap, (-weight, key, 1, None))
+
+        # locate the nodes and leafs covering prefix
+        obj: radix[VT] = self
+        name: str = ""
+        rest: str = prefix
+        while True:
+            if len(rest) <= obj.__length:
+                if obj.prefix[:len(rest)] == rest:
+                    push_node(name + obj.prefix, obj)
+                break
+            if rest[:obj.__length] != obj.prefix:
+                break
+            name += obj.prefix
+            rest = rest[obj.__length:]
+            tmp = obj.__get_node(rest)
+            if isinstance(tmp, radix):
+                obj = tmp
+                continue
+            for key, node in obj.__nodes.items():
+                if key[:len(rest)] == rest:
+                    push_node(name + key, node)
+            for key in obj.__leafs:
+                if key[:len(rest)] == rest:
+                    push_leaf(name + key, obj.__leafs.weight(key))
+            break
+
+        # best-first expansion
+        res: List[Tuple[str, float]] = []
+        while len(heap) > 0 and len(res) < k:
+            weight, name, kind, node = heapq.heappop(heap)
+            if node is None:
+                res.append((name, -weight))
+                continue
+            for key in node.__leafs:
+                push_leaf(name + key, node.__leafs.weight(key))
+            for key, child in node.__nodes.items():
+                push_node(name + key, child)
+        return res
+
+    def __reduce__(self):
+        codec: pklcodec = pklcodec()
+        return (radix.loads, (self.dumps(codec), self.test, codec))
+
+    def dump(self, fileobj: BinaryIO, codec: codec = pklcodec()) -> int:
+        """Write the tree in versioned binary format, nodes in pre-order
+        """
+        objs: List[radix] = [self]
+        order: List[radix] = []
+        while len(objs) > 0:
+            obj = objs.pop()
+            order.append(obj)
+            objs.extend(reversed(list(obj.__nodes.values())))
+        head = radix.head()
+        head.version = radix.VERSION
+        head.codec = codec.IDENT
+        head.weighted = self.__share.weighted
+        head.nodes = len(order)
+        size: int = fileobj.write(radix.MAGIC + bytes(head))
+        for obj in order:
+            node = radix.nodehead()
+            prefix: bytes = keytobin(obj.__prefix)
+            node.prefix = len(prefix)
+            node.tack = obj.__tack
+            node.upper = obj.__leafs.upper
+            # no node holds more keys than a count can represent
+            node.lower = min(obj.__leafs.lower, 2**64 - 1)
+            node.leafs = len(obj.__leafs)
+            node.child = len(obj.__nodes)
+            node.count = obj.__count
+            chunks: List[bytes] = [bytes(node), prefix]
+            for key in obj.__leafs:
+                leaf = radix.leafhead()
+                datas: bytes = keytobin(key)
+                value: bytes = codec.encode(obj.__leafs[key])
+                leaf.keylen = len(datas)
+                leaf.vallen = len(value)
+                chunks.extend((bytes(leaf), datas, value))
+                if head.weighted:
+                    weight = obj.__leafs.weight(key)
+                    chunks.append(bytes(double_t(
+                        radix.WEIGHT if weight is None else weight)))
+            size += fileobj.write(b"".join(chunks))
+        return size
+
+    def dumps(self, codec: codec = pklcodec()) -> bytes:
+        buffer = BytesIO()
+        self.dump(buffer, codec)
+        return buffer.getvalue()
+
+    @classmethod
+    def load(cls,
+             fileobj: BinaryIO,
+             test: testakey = testalnum,
+             codec: codec = pklcodec()) -> "radix":
+        """Rebuild a dumped tree in one linear pass without split logic
+        """
+        def read(length: int) -> bytes:
+            datas: bytes = fileobj.read(length)
+            assert len(datas) == length, f"read {length} error"
+            return datas
+
+        assert read(radix.SIZE_MAGIC) == radix.MAGIC, "magic error"
+        head = radix.head.from_buffer_copy(read(radix.SIZE_HEAD))
+        assert head.version == radix.VERSION, f"version {head.version} error"
+        assert head.codec == codec.IDENT, \
+            f"codec {head.codec} != {codec.IDENT}"
+        root: Optional[radix] = None
+        stack: List[Tuple[radix, int]] = []  # (node, remaining child)
+        for _ in range(head.nodes):
+            node = radix.nodehead.from_buffer_copy(read(radix.SIZE_NODE))
+            prefix: str = bintokey(read(node.prefix)) if node.prefix else ""
+            while len(stack) > 0 and stack[-1][1] == 0:
+                stack.pop()
+            if len(stack) == 0:
+                assert root is None, "multiple roots"
+                obj: radix = radix(prefix=prefix, test=test)
+                root = obj
+            else:
+                parent, remain = stack[-1]
+                stack[-1] = (parent, remain - 1)
+                obj = radix(prefix=prefix, test=test, root=parent)
+                parent.__nodes[prefix] = obj
+            obj.__tack = bool(node.tack)
+            obj.__count = node.count
+            obj.__leafs.limit(upper=node.upper, lower=node.lower)
+            for _ in range(node.leafs):
+                leaf = radix.leafhead.from_buffer_copy(read(radix.SIZE_LEAF))
+                key: str = bintokey(read(leaf.keylen)) if leaf.keylen else ""
+                value = codec.decode(read(leaf.vallen) if leaf.vallen else b"")
+                weight: Optional[float] = None
+                if head.weighted:
+                    weight = double_t.from_buffer_copy(
+                        read(radix.SIZE_WEIGHT)).value
+                obj.__leafs.put(key=key, value=value, weight=weight)
+            stack.append((obj, node.child))
+        assert isinstance(root, radix), "empty tree"
+        if head.weighted:
+            root.__weigh_all()
+        return root
+
+    @classmethod
+    def loads(cls,
+              datas: bytes,
+              test: testakey = testalnum,
+              codec: codec = pklcodec()) -> "radix":
+        return cls.load(BytesIO(datas), test=test, codec=codec)
+
+
+class snapshot(Generic[VT]):
+    """Copy-on-write view of a radix tree
+    """
+
+    def __init__(self, root: radix, count: int, state: Callable[
+            [radix], Tuple[str, Dict[str, VT], Dict[str, radix]]]):
+        assert isinstance(root, radix), f"unexpected type: {type(root)}"
+        assert isinstance(count, int), f"unexpected type: {type(count)}"
+        self.__root: radix = root
+        self.__count: int = count
+        self.__state = state
+        self.__saved: Dict[int, Tuple[radix, str, Dict[str, VT],
+                                      Dict[str, radix]]] = {}
+
+    def saved(self, node: radix) -> bool:
+        return id(node) in self.__saved
+
+    def save(self, node: radix, prefix: str, leafs: Dict[str, VT],
+             nodes: Dict[str, radix]):
+        assert id(node) not in self.__saved
+        # hold node reference, the id must not be reused
+        self.__saved[id(node)] = (node, prefix, leafs, nodes)
+
+    def __node(self,
+               node: radix) -> Tuple[str, Dict[str, VT], Dict[str, radix]]:
+        if id(node) in self.__saved:
+            _, prefix, leafs, nodes = self.__saved[id(node)]
+            return prefix, leafs, nodes
+        return self.__state(node)
+
+    def __len__(self) -> int:
+        return self.__count
+
+    def __iter__(self) -> Iterator[str]:
+        objs: List[Tuple[str, radix]] = []
+        prev: List[Tuple[str, radix]] = [("", self.__root)]
+        while len(prev) > 0:
+            curr: List[Tuple[str, radix]] = []
+            for name, node in prev:
+                prefix, _, nodes = self.__node(node)
+                objs.append((name + prefix, node))
+                curr.extend((name + prefix, n) for n in nodes.values())
+            prev = curr
+        objs.sort(key=lambda t: t[0])
+        for name, node in objs:
+            _, leafs, _ = self.__node(node)
+            for key in sorted(leafs):
+                yield name + key
+
+    def __contains__(self, key: str) -> bool:
+        try:
+            self.get(key)
+            return True
+        except KeyError:
+            return False
+
+    def __getitem__(self, key: str) -> VT:
+        return self.get(key)
+
+    def get(self, key: str) -> VT:
+        assert isinstance(key, str), f"unexpected type: {type(key)}"
+        node: radix = self.__root
+        while True:
+            prefix, leafs, nodes = self.__node(node)
+            if key[:len(prefix)] != prefix:
+                raise KeyError(key)
+            key = key[len(prefix):]
+            for i in range(1, len(key) + 1):
+                if key[:i] in nodes:
+                    node = nodes[key[:i]]
+                    break
+            else:
+                return leafs[key]
@@ -0,0 +1,211 @@
+# coding:utf-8
+
+from array import array
+from ctypes import Structure
+from ctypes import c_uint32
+from ctypes import c_uint64
+from ctypes import sizeof
+from io import BytesIO
+import os
+from typing import Dict
+from typing import Iterable
+from typing import Iterator
+from typing import List
+from typing import Optional
+from typing import Set
+
+from ..utils import bintokey
+from ..utils import keytobin
+from ..utils import nilcodec
+from ..utils import pattern
+from ..utils import testakey
+from .rtree import radix
+from .rtree import testalnum
+
+
+class sindex:
+    """Suffix and substring index of keys
+
+    Keeps a radix tree of reversed keys for suffix queries and an n-gram
+    posting table for substring queries, both updated incrementally. The
+    dumped file carries a stamp of the index file it was built from, like
+    the Bloom filter, a file whose stamp no longer matches is stale.
+    """
+
+    GRAM = 3
+    MAGIC = b"\x3a\x53\xc5\x49\x6e\x5c\x78\xa3"
+    SIZE_MAGIC = len(MAGIC)
+
+    class head(Structure):
+
+        _fields_ = [
+            ("stamp", c_uint64),
+            ("gram", c_uint32),
+            ("keys", c_uint64),
+            ("grams", c_uint64),
+            ("rkeys", c_uint64),  # bytes of the dumped reversed keys
+        ]
+
+    SIZE_HEAD = sizeof(head)
+
+    def __init__(self, test: testakey = testalnum, gram: int = GRAM):
+        assert isinstance(test, testakey), f"unexpected type: {type(test)}"
+        assert isinstance(gram, int), f"unexpected type: {type(gram)}"
+        assert gram > 0, f"gram {gram} error"
+        self.__gram: int = gram
+        self.__rkeys: radix[None] = radix(test=test)
+        self.__grams: Dict[str, Set[str]] = {}
+        self.__short: Set[str] = set()  # keys shorter than gram
+
+    @property
+    def gram(self) -> int:
+        return self.__gram
+
+    def __len__(self) -> int:
+        return len(self.__rkeys)
+
+    def __contains__(self, key: str) -> bool:
+        return key[::-1] in self.__rkeys
+
+    def __ngrams(self, key: str) -> Set[str]:
+        n: int = self.__gram
+        return {key[i:i + n] for i in range(len(key) - n + 1)}
+
+    def add(self, key: str) -> bool:
+        assert isinstance(key, str), f"unexpected type: {type(key)}"
+        if key in self:
+            return False
+        self.__rkeys[key[::-1]] = None
+        if len(key) < self.__gram:
+            self.__short.add(key)
+        for g in self.__ngrams(key):
+            if g not in self.__grams:
+                self.__grams[g] = set()
+            self.__grams[g].add(key)
+        return True
+
+    def discard(self, key: str) -> bool:
+        assert isinstance(key, str), f"unexpected type: {type(key)}"
+        if key not in self:
+            return False
+        assert self.__rkeys.pop(key[::-1])
+        self.__short.discard(key)
+        for g in self.__ngrams(key):
+            keys: Set[str] = self.__grams[g]
+            keys.discard(key)
+            if len(keys) == 0:
+                del self.__grams[g]
+        return True
+
+    def build(self, keys: Iterable[str]) -> "sindex":
+        for key in keys:
+            self.add(key)
+        return self
+
+    def dump(self, path: str, stamp: int) -> bool:
+        """Write the index, replacing the file atomically
+
+        Keys are numbered in a table, postings are arrays of key numbers.
+        """
+        assert isinstance(stamp, int), f"unexpected type: {type(stamp)}"
+        keys: List[str] = [rkey[::-1] for rkey in self.__rkeys]
+        ids: Dict[str, int] = {key: i for i, key in enumerate(keys)}
+        grams: List[str] = list(self.__grams)
+        rkeys: bytes = self.__rkeys.dumps(codec=nilcodec())
+        head = self.head()
+        head.stamp = stamp
+        head.gram = self.__gram
+        head.keys = len(keys)
+        head.grams = len(grams)
+        head.rkeys = len(rkeys)
+        datas: List[bytes] = [keytobin(key) for key in keys]
+        names: List[bytes] = [keytobin(g) for g in grams]
+        counts: array = array("Q", (len(self.__grams[g]) for g in grams))
+        postings: array = array("Q")
+        for g in grams:
+            postings.extend(ids[key] for key in self.__grams[g])
+        temp: str = f"{path}.tmp"
+        with open(temp, "wb") as hdl:
+            hdl.write(self.MAGIC + bytes(head) + rkeys)
+            hdl.write(array("Q", map(len, datas)).tobytes() + b"".join(datas))
+            hdl.write(array("Q", map(len, names)).tobytes() + b"".join(names))
+            hdl.write(counts.tobytes() + postings.tobytes())
+        os.replace(temp, path)
+        return True
+
+    @classmethod
+    def load(cls,
+             path: str,
+             stamp: int,
+             test: testakey = testalnum,
+             gram: int = GRAM) -> Optional["sindex"]:
+        """Load an index, None if missing, stale, broken or built with
+        another gram length
+        """
+        if stamp == 0 or not os.path.isfile(path):
+            return None
+        with open(path, "rb") as hdl:
+            buffer = BytesIO(hdl.read())
+
+        def read(code: str, count: int) -> array:
+            items: array = array(code)
+            items.frombytes(buffer.read(items.itemsize * count))
+            assert len(items) == count, "truncated"
+            return items
+
+        def texts(count: int) -> List[str]:
+            sizes: array = read("Q", count)
+            return [bintokey(buffer.read(size)) for size in sizes]
+
+        try:
+            if buffer.read(cls.SIZE_MAGIC) != cls.MAGIC:
+                return None
+            head = cls.head.from_buffer_copy(buffer.read(cls.SIZE_HEAD))
+            if head.stamp != stamp or head.gram != gram:
+                return None
+            obj: sindex = sindex(test=test, gram=gram)
+            obj.__rkeys = radix.loads(buffer.read(head.rkeys),
+                                      test=test,
+                                      codec=nilcodec())
+            keys: List[str] = texts(head.keys)
+            grams: List[str] = texts(head.grams)
+            counts: array = read("Q", head.grams)
+            postings: array = read("Q", sum(counts))
+        except (AssertionError, ValueError):
+            return None
+        begin: int = 0
+        for g, count in zip(grams, counts):
+            obj.__grams[g] = {keys[i] for i in postings[begin:begin + count]}
+            begin += count
+        obj.__short = {key for key in keys if len(key) < gram}
+        return obj
+
+    def find_suffix(self, suffix: str) -> Iterator[str]:
+        """Keys ending with suffix
+        """
+        assert isinstance(suffix, str), f"unexpected type: {type(suffix)}"
+        for rkey in self.__rkeys.match(pattern.prefix(suffix[::-1])):
+            yield rkey[::-1]
+
+    def find_substring(self, text: str) -> Iterator[str]:
+        """Keys containing text
+        """
+        assert isinstance(text, str), f"unexpected type: {type(text)}"
+        if len(text) >= self.__gram:
+            grams = sorted(self.__ngrams(text),
+                           key=lambda g: len(self.__grams.get(g, ())))
+            if grams[0] not in self.__grams:
+                return
+            keys: Set[str] = set(self.__grams[grams[0]])
+            for g in grams[1:]:
+                keys &= self.__grams.get(g, set())
+                if len(keys) == 0:
+                    return
+        else:
+            keys = {k for k in self.__short if text in k}
+            for g, posting in self.__grams.items():
+                if text in g:
+                    keys |= posting
+        for key in sorted(keys):
+            if text in key:
+                yield key
@@ -9,7 +9,25 @@ from .attribute import __url_code__
 from .attribute import __url_docs__
 from .attribute import __url_home__
 from .attribute import __version__
+from .codec import codec
+from .codec import nilcodec
+from .codec import pklcodec
+from .codec import rawcodec
+from .metric import NOTIMER
+from .metric import histogram
+from .metric import metrics
+from .metric import notimer
+from .metric import timer
+from .pattern import pattern
+from .trace import TRACER
+from .trace import profile
+from .trace import span
+from .trace import tracer
+from .trace import tracing
+from .vkey import bintokey
+from .vkey import keytobin
 from .vkey import seqtokey
+from .vkey import seqtokey_many
 from .vkey import testakey
 from .vkey import testvkey
 
@@ -19,4 +37,5 @@ __prog_list__ = f"{__prog__}-list"
 __prog_set__ = f"{__prog__}-set"
 __prog_get__ = f"{__prog__}-get"
 __prog_del__ = f"{__prog__}-del"
+__prog_bench__ = f"{__prog__}-bench"
 __base__ = f".{__prog__}"
@@ -0,0 +1,65 @@
+# coding:utf-8
+
+import pickle
+from typing import Any
+from typing import Generic
+from typing import TypeVar
+
+VT = TypeVar("VT")  # Value type.
+
+
+class codec(Generic[VT]):
+    """Value codec for binary serialization
+
+    IDENT is written into dumped files and checked when loading.
+    """
+
+    IDENT = 0
+
+    def encode(self, value: VT) -> bytes:
+        raise NotImplementedError
+
+    def decode(self, datas: bytes) -> VT:
+        raise NotImplementedError
+
+
+class rawcodec(codec[bytes]):
+    """Values are bytes already
+    """
+
+    IDENT = 1
+
+    def encode(self, value: bytes) -> bytes:
+        assert isinstance(value, bytes), f"unexpected type: {type(value)}"
+        return value
+
+    def decode(self, datas: bytes) -> bytes:
+        return datas
+
+
+class pklcodec(codec[Any]):
+    """Any picklable values
+    """
+
+    IDENT = 2
+
+    def encode(self, value: Any) -> bytes:
+        return pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+
+    def decode(self, datas: bytes) -> Any:
+        return pickle.loads(datas)
+
+
+class nilcodec(codec[None]):
+    """No values, for trees used as key sets
+    """
+
+    IDENT = 3
+
+    def encode(self, value: None) -> bytes:
+        assert value is None, f"unexpected value: {value}"
+        return b""
+
+    def decode(self, datas: bytes) -> None:
+        assert datas == b"", f"unexpected datas: {datas!r}"
+        return None
@@ -0,0 +1,235 @@
+# coding:utf-8
+
+from bisect import bisect_left
+import os
+from threading import Lock
+from time import perf_counter
+from typing import Any
+from typing import Callable
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Sequence
+from typing import Tuple
+from typing import Union
+import weakref
+
+label = Tuple[Tuple[str, str], ...]
+series = Tuple[str, label]  # (name, labels)
+
+
+class histogram:
+    """Cumulative latency histogram with fixed upper bounds in seconds
+    """
+
+    BUCKETS: Sequence[float] = (0.0001, 0.00025, 0.0005, 0.001, 0.0025,
+                                0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+                                1.0, 2.5, 5.0)
+
+    def __init__(self, buckets: Sequence[float] = BUCKETS):
+        self.__bounds: Sequence[float] = tuple(sorted(buckets))
+        self.__counts: List[int] = [0] * (len(self.__bounds) + 1)
+        self.__sum: float = 0.0
+
+    @property
+    def count(self) -> int:
+        return sum(self.__counts)
+
+    @property
+    def sum(self) -> float:
+        return self.__sum
+
+    def observe(self, value: float):
+        self.__counts[bisect_left(self.__bounds, value)] += 1
+        self.__sum += value
+
+    def buckets(self) -> List[Tuple[float, int]]:
+        """Cumulative (upper bound, count), the last bound is infinity
+        """
+        res: List[Tuple[float, int]] = []
+        total: int = 0
+        for bound, count in zip(list(self.__bounds) + [float("inf")],
+                                self.__counts):
+            total += count
+            res.append((bound, total))
+        return res
+
+    def quantile(self, q: float) -> float:
+        """Upper bound of the bucket holding the q quantile
+        """
+        assert 0.0 <= q <= 1.0, f"quantile {q} error"
+        rank: float = q * self.count
+        for bound, total in self.buckets():
+            if total >= rank and total > 0:
+                return bound
+        return 0.0
+
+
+class timer:
+
+    def __init__(self, hook: "metrics", name: str, labels: label):
+        self.__hook: metrics = hook
+        self.__name: str = name
+        self.__labels: label = labels
+        self.__begin: float = 0.0
+
+    def __enter__(self) -> "timer":
+        self.__begin = perf_counter()
+        return self
+
+    def __exit__(self, *args):
+        self.__hook.observe_series((self.__name, self.__labels),
+                                   perf_counter() - self.__begin)
+
+
+class notimer:
+    """Shared no-op timer, used when no metrics hook is set
+    """
+
+    def __enter__(self) -> "notimer":
+        return self
+
+    def __exit__(self, *args):
+        pass
+
+
+NOTIMER = notimer()
+
+
+class metrics:
+    """Counters, gauges and latency histograms keyed by name and labels
+
+    Objects being measured take an optional hook, without one they skip
+    all bookkeeping. Collectors registered by them refresh gauges before
+    every snapshot or export.
+    """
+
+    def __init__(self, buckets: Sequence[float] = histogram.BUCKETS):
+        self.__buckets: Sequence[float] = buckets
+        self.__counters: Dict[series, float] = {}
+        self.__gauges: Dict[series, float] = {}
+        self.__histograms: Dict[series, histogram] = {}
+        self.__collectors: List[weakref.WeakMethod] = []
+        self.__lock: Lock = Lock()  # stores may report from worker threads
+
+    @classmethod
+    def __series(cls, name: str, labels: Dict[str, Any]) -> series:
+        return name, tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+    def inc(self, name: str, value: float = 1, **labels):
+        key: series = self.__series(name, labels)
+        with self.__lock:
+            self.__counters[key] = self.__counters.get(key, 0) + value
+
+    def set(self, name: str, value: float, **labels):
+        self.__gauges[self.__series(name, labels)] = value
+
+    def observe(self, name: str, value: float, **labels):
+        self.observe_series(self.__series(name, labels), value)
+
+    def observe_series(self, key: series, value: float):
+        with self.__lock:
+            if key not in self.__histograms:
+                self.__histograms[key] = histogram(self.__buckets)
+            self.__histograms[key].observe(value)
+
+    def timer(self, name: str, **labels) -> timer:
+        """Context manager observing the elapsed seconds of its block
+        """
+        return timer(self, name, self.__series(name, labels)[1])
+
+    def register(self, collect: Callable[["metrics"], None]):
+        """Register a bound method called before snapshot and export, it
+        does not keep its object alive
+        """
+        self.__collectors.append(weakref.WeakMethod(collect))
+
+    def collect(self):
+        alive: List[weakref.WeakMethod] = []
+        for ref in self.__collectors:
+            collect = ref()
+            if collect is not None:
+                collect(self)
+                alive.append(ref)
+        self.__collectors = alive
+
+    def counter(self, name: str, **labels) -> float:
+        return self.__counters.get(self.__series(name, labels), 0)
+
+    def gauge(self, name: str, **labels) -> Optional[float]:
+        return self.__gauges.get(self.__series(name, labels))
+
+    def histogram(self, name: str, **labels) -> Optional[histogram]:
+        return self.__histograms.get(self.__series(name, labels))
+
+    @classmethod
+    def __format(cls, name: str, labels: label) -> str:
+        if len(labels) == 0:
+            return name
+        items: str = ",".join(f'{k}="{v}"' for k, v in labels)
+        return f"{name}{{{items}}}"
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Plain dict of all series, histograms as count, sum, p50, p99
+        """
+        self.collect()
+        res: Dict[str, Any] = {}
+        for (name, labels), value in sorted(self.__counters.items()):
+            res[self.__format(name, labels)] = value
+        for (name, labels), value in sorted(self.__gauges.items()):
+            res[self.__format(name, labels)] = value
+        for (name, labels), hist in sorted(self.__histograms.items(),
+                                           key=lambda item: item[0]):
+            res[self.__format(name, labels)] = {
+                "count": hist.count,
+                "sum": hist.sum,
+                "p50": hist.quantile(0.5),
+                "p99": hist.quantile(0.99),
+            }
+        return res
+
+    def prometheus(self) -> str:
+        """Prometheus text exposition format
+        """
+        self.collect()
+        lines: List[str] = []
+        typed: Dict[str, str] = {}
+
+        def head(name: str, kind: str):
+            if name not in typed:
+                typed[name] = kind
+                lines.append(f"# TYPE {name} {kind}")
+
+        for (name, labels), value in sorted(self.__counters.items()):
+            head(name, "counter")
+            lines.append(f"{self.__format(name, labels)} {value}")
+        for (name, labels), value in sorted(self.__gauges.items()):
+            head(name, "counter" if name.endswith("_total") else "gauge")
+            lines.append(f"{self.__format(name, labels)} {value}")
+        for (name, labels), hist in sorted(self.__histograms.items(),
+                                           key=lambda item: item[0]):
+            head(name, "histogram")
+            for bound, total in hist.buckets():
+                le: str = "+Inf" if bound == float("inf") else repr(bound)
+                bucket = self.__format(f"{name}_bucket",
+                                       labels + (("le", le), ))
+                lines.append(f"{bucket} {total}")
+            lines.append(f"{self.__format(f'{name}_sum', labels)} "
+                         f"{hist.sum}")
+            lines.append(f"{self.__format(f'{name}_count', labels)} "
+                         f"{hist.count}")
+        return "\n".join(lines) + "\n"
+
+    def export(self, target: Union[str, Callable[[str], Any]]) -> bool:
+        """Write Prometheus text to a file, replaced atomically for the
+        node exporter textfile collector, or pass it to a callback
+        """
+        text: str = self.prometheus()
+        if not isinstance(target, str):
+            target(text)
+            return True
+        temp: str = f"{target}.tmp"
+        with open(temp, "w") as hdl:
+            hdl.write(text)
+        os.replace(temp, target)
+        return True
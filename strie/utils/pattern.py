@@ -0,0 +1,170 @@
+# coding:utf-8
+
+from typing import FrozenSet
+from typing import List
+from typing import Tuple
+
+charset = Tuple[FrozenSet[str], bool]  # (characters, negate)
+
+
+class pattern:
+    """Key pattern compiled into a nondeterministic automaton
+
+    Each state is the position of the next atom, an atom is a character
+    set with a quantifier "1", "?" or "*". Traversal feeds characters and
+    stops as soon as no state survives.
+    """
+
+    ANY: charset = (frozenset(), True)
+
+    def __init__(self, atoms: List[Tuple[charset, str]]):
+        assert isinstance(atoms, list), f"unexpected type: {type(atoms)}"
+        for chars, quant in atoms:
+            assert quant in ("1", "?", "*"), f"quantifier '{quant}' error"
+            assert isinstance(chars[0], frozenset), \
+                f"unexpected type: {type(chars[0])}"
+        self.__atoms: List[Tuple[charset, str]] = atoms
+        self.__start: FrozenSet[int] = self.__closure({0})
+
+    @property
+    def atoms(self) -> List[Tuple[charset, str]]:
+        return self.__atoms
+
+    def __closure(self, states) -> FrozenSet[int]:
+        res = set(states)
+        todo = list(states)
+        while len(todo) > 0:
+            i = todo.pop()
+            if i < len(self.__atoms) and self.__atoms[i][1] != "1":
+                if i + 1 not in res:
+                    res.add(i + 1)
+                    todo.append(i + 1)
+        return frozenset(res)
+
+    def start(self) -> FrozenSet[int]:
+        return self.__start
+
+    def step(self, states: FrozenSet[int], char: str) -> FrozenSet[int]:
+        nexts = set()
+        for i in states:
+            if i >= len(self.__atoms):
+                continue
+            (chars, negate), quant = self.__atoms[i]
+            if (char in chars) is negate:
+                continue
+            nexts.add(i if quant == "*" else i + 1)
+        return self.__closure(nexts) if len(nexts) > 0 else frozenset()
+
+    def feed(self, states: FrozenSet[int], text: str) -> FrozenSet[int]:
+        for char in text:
+            if len(states) == 0:
+                break
+            states = self.step(states, char)
+        return states
+
+    def accept(self, states: FrozenSet[int]) -> bool:
+        return len(self.__atoms) in states
+
+    def match(self, text: str) -> bool:
+        return self.accept(self.feed(self.start(), text))
+
+    @classmethod
+    def __charset(cls, text: str, index: int) -> Tuple[charset, int]:
+        """Parse "[...]" starting after "[", return charset and next index
+        """
+        negate: bool = False
+        if index < len(text) and text[index] in ("!", "^"):
+            negate = True
+            index += 1
+        chars = set()
+        first: bool = True
+        while index < len(text) and (text[index] != "]" or first):
+            first = False
+            char = text[index]
+            if char == "\\" and index + 1 < len(text):
+                index += 1
+                char = text[index]
+            if index + 2 < len(text) and text[index + 1] == "-" \
+                    and text[index + 2] != "]":
+                for c in range(ord(char), ord(text[index + 2]) + 1):
+                    chars.add(chr(c))
+                index += 3
+                continue
+            chars.add(char)
+            index += 1
+        assert index < len(text), f"unterminated character class: '{text}'"
+        return (frozenset(chars), negate), index + 1
+
+    @classmethod
+    def prefix(cls, text: str) -> "pattern":
+        """Literal prefix followed by any sequence
+        """
+        assert isinstance(text, str), f"unexpected type: {type(text)}"
+        atoms: List[Tuple[charset, str]] = [
+            ((frozenset(char), False), "1") for char in text
+        ]
+        atoms.append((cls.ANY, "*"))
+        return pattern(atoms)
+
+    @classmethod
+    def glob(cls, text: str) -> "pattern":
+        """Glob pattern: "?" any character, "*" any sequence, "[a-z]",
+        "[!a-z]" character classes and "\\" escapes
+        """
+        assert isinstance(text, str), f"unexpected type: {type(text)}"
+        atoms: List[Tuple[charset, str]] = []
+        index: int = 0
+        while index < len(text):
+            char = text[index]
+            index += 1
+            if char == "?":
+                atoms.append((cls.ANY, "1"))
+            elif char == "*":
+                if len(atoms) == 0 or atoms[-1] != (cls.ANY, "*"):
+                    atoms.append((cls.ANY, "*"))
+            elif char == "[":
+                chars, index = cls.__charset(text, index)
+                atoms.append((chars, "1"))
+            else:
+                if char == "\\" and index < len(text):
+                    char = text[index]
+                    index += 1
+                atoms.append(((frozenset(char), False), "1"))
+        return pattern(atoms)
+
+    @classmethod
+    def regex(cls, text: str) -> "pattern":
+        """Restricted regular expression matching the whole key: literals,
+        ".", "[...]" classes, "\\" escapes and the "?", "*", "+" quantifiers
+        on a single atom, optional "^" and "$" anchors, no groups
+        """
+        assert isinstance(text, str), f"unexpected type: {type(text)}"
+        if text[:1] == "^":
+            text = text[1:]
+        if text[-1:] == "$" and text[-2:] != "\\$":
+            text = text[:-1]
+        atoms: List[Tuple[charset, str]] = []
+        index: int = 0
+        while index < len(text):
+            char = text[index]
+            index += 1
+            assert char not in "()|{}", f"unsupported regex '{char}': {text}"
+            if char in "?*+":
+                assert len(atoms) > 0 and atoms[-1][1] == "1", \
+                    f"nothing to repeat at {index - 1}: '{text}'"
+                chars = atoms[-1][0]
+                if char == "+":
+                    atoms.append((chars, "*"))
+                else:
+                    atoms[-1] = (chars, char)
+            elif char == ".":
+                atoms.append((cls.ANY, "1"))
+            elif char == "[":
+                chars, index = cls.__charset(text, index)
+                atoms.append((chars, "1"))
+            else:
+                if char == "\\" and index < len(text):
+                    char = text[index]
+                    index += 1
+                atoms.append(((frozenset(char), False), "1"))
+        return pattern(atoms)
@@ -0,0 +1,196 @@
+# coding:utf-8
+
+import logging
+from threading import Lock
+from threading import local
+from time import perf_counter
+from typing import Any
+from typing import Callable
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Tuple
+from typing import Union
+
+from .metric import NOTIMER
+from .metric import notimer
+from .metric import timer
+
+logger = logging.getLogger("strie")
+
+
+class span:
+    """Elapsed seconds of a named stage and its nested stages
+    """
+
+    __slots__ = ("name", "elapsed", "children")
+
+    def __init__(self, name: str):
+        self.name: str = name
+        self.elapsed: float = 0.0
+        self.children: List["span"] = []
+
+    def breakdown(self) -> str:
+        """One line summary, repeated stages are merged with a count
+        """
+        merged: Dict[str, Tuple[float, int, List[span]]] = {}
+        for child in self.children:
+            total, count, spans = merged.get(child.name, (0.0, 0, []))
+            spans.append(child)
+            merged[child.name] = (total + child.elapsed, count + 1, spans)
+        items: List[str] = []
+        for name, (total, count, spans) in merged.items():
+            text: str = f"{name} {total:.6f}s"
+            if count > 1:
+                text += f" x{count}"
+            nested: List[str] = [s.breakdown() for s in spans if s.children]
+            if len(nested) > 0:
+                text += f" [{'; '.join(nested)}]"
+            items.append(text)
+        return ", ".join(items)
+
+
+class tracing:
+
+    def __init__(self, tracer: "tracer", name: str,
+                 inner: Union[timer, notimer], slow: float):
+        self.__tracer: tracer = tracer
+        self.__inner: Union[timer, notimer] = inner
+        self.__slow: float = slow
+        self.__span: span = span(name)
+        self.__begin: float = 0.0
+
+    def __enter__(self) -> "tracing":
+        stack: List[span] = self.__tracer.stack
+        if len(stack) > 0:
+            stack[-1].children.append(self.__span)
+        stack.append(self.__span)
+        self.__inner.__enter__()
+        self.__begin = perf_counter()
+        return self
+
+    def __exit__(self, *args):
+        self.__span.elapsed = perf_counter() - self.__begin
+        self.__inner.__exit__(*args)
+        stack: List[span] = self.__tracer.stack
+        stack.pop()
+        if len(stack) == 0:
+            self.__tracer.finish(self.__span, self.__slow)
+
+
+class tracer:
+    """Per-thread trees of spans around internal stages
+
+    Only an operation opens a root span, and only when a sink is attached
+    or the operation has a slow threshold, otherwise spans fall back to
+    their metrics timer and cost one thread-local lookup. Stages run on
+    other threads, such as pooled reads, are not traced.
+    """
+
+    def __init__(self):
+        self.__local: local = local()
+        self.__sinks: List[Callable[[span], Any]] = []
+        self.__lock: Lock = Lock()
+
+    @property
+    def stack(self) -> List[span]:
+        try:
+            return self.__local.stack
+        except AttributeError:
+            self.__local.stack = []
+            return self.__local.stack
+
+    @property
+    def active(self) -> bool:
+        """Any sink attached, operations without a slow threshold are
+        only traced then
+        """
+        return len(self.__sinks) > 0
+
+    def attach(self, sink: Callable[[span], Any]):
+        with self.__lock:
+            self.__sinks = self.__sinks + [sink]
+
+    def detach(self, sink: Callable[[span], Any]):
+        with self.__lock:
+            self.__sinks = [s for s in self.__sinks if s is not sink]
+
+    def span(self,
+             name: str,
+             inner: Optional[timer] = None,
+             root: bool = False,
+             slow: float = 0.0) -> Union[tracing, timer, notimer]:
+        """Context manager of a stage, timing into inner as well
+        """
+        if len(getattr(self.__local, "stack", ())) == 0 and not (
+                root and (slow > 0.0 or len(self.__sinks) > 0)):
+            return NOTIMER if inner is None else inner
+        return tracing(self, name, NOTIMER if inner is None else inner, slow)
+
+    def finish(self, root: span, slow: float):
+        if 0.0 < slow <= root.elapsed:
+            logger.warning("slow %s %.6fs: %s", root.name, root.elapsed,
+                           root.breakdown() or "no stages")
+        for sink in self.__sinks:
+            sink(root)
+
+
+TRACER = tracer()
+
+
+class profile:
+    """Aggregate where time went over a block of operations
+
+    >>> with profile() as prof:
+    ...     root[key]
+    >>> print(prof)
+
+    Stages are keyed by their path from the operation, such as
+    "get/route/replay", self time excludes nested stages.
+    """
+
+    def __init__(self, tracer: tracer = TRACER):
+        self.__tracer: tracer = tracer
+        self.__stages: Dict[str, List[float]] = {}  # count, total, self
+        self.__lock: Lock = Lock()
+        self.__sink: Callable[[span], Any] = self.add  # same to detach
+
+    def __enter__(self) -> "profile":
+        self.__tracer.attach(self.__sink)
+        return self
+
+    def __exit__(self, *args):
+        self.__tracer.detach(self.__sink)
+
+    def __str__(self) -> str:
+        lines: List[str] = [f"{'count':>10} {'total':>12} {'self':>12}  stage"]
+        for path, stage in sorted(self.report().items(),
+                                  key=lambda item: -item[1]["total"]):
+            lines.append(f"{stage['count']:>10} {stage['total']:>12.6f} "
+                         f"{stage['self']:>12.6f}  {path}")
+        return "\n".join(lines)
+
+    def add(self, root: span):
+        with self.__lock:
+            self.__add(root, root.name)
+
+    def __add(self, node: span, path: str):
+        stage: List[float] = self.__stages.setdefault(path, [0, 0.0, 0.0])
+        stage[0] += 1
+        stage[1] += node.elapsed
+        stage[2] += node.elapsed - sum(c.elapsed for c in node.children)
+        for child in node.children:
+            self.__add(child, f"{path}/{child.name}")
+
+    def report(self) -> Dict[str, Dict[str, float]]:
+        """Count, total and self seconds of every stage path
+        """
+        with self.__lock:
+            return {
+                path: {
+                    "count": int(count),
+                    "total": total,
+                    "self": own
+                }
+                for path, (count, total, own) in self.__stages.items()
+            }
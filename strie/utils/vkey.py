@@ -1,6 +1,8 @@
 # coding:utf-8
 
+from typing import Any
 from typing import Callable
+from typing import Dict
 from typing import List
 from typing import Optional
 from typing import Sequence
@@ -40,6 +42,9 @@ class testakey:
     """IP46 keys allowed characters: 0-9, a-f and ".", ":"
     """
     ip46: Set[str] = hex.union({".", ":"})
+    """binary keys allowed characters: every byte as a latin-1 character
+    """
+    bin: Set[str] = {chr(i) for i in range(256)}
 
     def __init__(self,
                  length_limit: int = MAX_CHARACTERS,
@@ -49,29 +54,75 @@ class testakey:
             f"unexpected type: {type(length_limit)}"
         assert length_limit > 0 and length_limit <= self.MAX_CHARACTERS, \
             f"{length_limit} not in (0, {self.MAX_CHARACTERS}]"
+        binary: bool = set(allowed_char) == self.bin
         for c in allowed_char:
             assert len(c) == 1
-            assert c.isascii()
-            assert c.isprintable()
+            assert binary or c.isascii()
+            assert binary or c.isprintable()
+        self.__bin: bool = binary
         self.__lim: int = length_limit
         self.__set: Set[str] = {c for c in allowed_char}
         self.__chk: Optional[Callable[[str, int], bool]] = inspection
+        # translate table deleting allowed characters
+        self.__tab: Dict[int, None] = {ord(c): None for c in self.__set}
 
     @property
     def characters(self) -> Set[str]:
         return self.__set
 
+    @property
+    def binary(self) -> bool:
+        return self.__bin
+
     def check(self, key: str) -> bool:
         if not isinstance(key, str):
             return False
         length = len(key)
         if length <= 0 or length > self.__lim:
             return False
-        for k in key:
-            if k not in self.characters:
-                return False
+        if not self.__valid(key):
+            return False
         return True if self.__chk is None else self.__chk(key, length)
 
+    def __valid(self, text: str) -> bool:
+        """All characters are allowed, binary keys only need to fit in a
+        byte each, which encoding tests without a per-character lookup
+        """
+        if self.__bin:
+            try:
+                text.encode("latin-1")
+            except UnicodeEncodeError:
+                return False
+            return True
+        return text.translate(self.__tab) == ""
+
+    def check_many(self, keys: Sequence[str]) -> List[bool]:
+        """Check a batch of keys, all characters are tested in one pass
+
+        Keys are joined without a separator, which keeps the buffer as
+        narrow as the keys, and only checked one by one if that fails.
+        """
+        res: List[bool] = [
+            isinstance(k, str) and 0 < len(k) <= self.__lim for k in keys
+        ]
+        if not all(res) or not self.__valid("".join(keys)):
+            res = [r and self.__valid(k) for r, k in zip(res, keys)]
+        if self.__chk is not None:
+            res = [r and self.__chk(k, len(k)) for r, k in zip(res, keys)]
+        return res
+
+
+def keytobin(key: str) -> bytes:
+    """Raw bytes of a key, one byte per character
+    """
+    return key.encode("latin-1")
+
+
+def bintokey(datas: bytes) -> str:
+    """Key of raw bytes, one character per byte
+    """
+    return datas.decode("latin-1")
+
 
 def checkvkey(key: str, len: int) -> bool:
     if len % 2 != 0:
@@ -85,6 +136,9 @@ testvkey = testakey(allowed_char=testakey.hex, inspection=checkvkey)
 def seqtokey(datas: Sequence[int], reverse: bool = False):
     assert isinstance(datas, Sequence), f"unexpected type: {type(datas)}"
     assert isinstance(reverse, bool), f"unexpected type: {type(reverse)}"
+    if isinstance(datas, (bytes, bytearray)):
+        assert len(datas) > 0, "empty sequence"
+        return (datas[::-1] if reverse else datas).hex()
     res: List[str] = []
     for i in datas:
         assert isinstance(i, int), f"unexpected type: {type(i)}"
@@ -95,3 +149,32 @@ def seqtokey(datas: Sequence[int], reverse: bool = False):
     key = "".join(res).lower()
     assert testvkey.check(key), f"check key '{key}' error"
     return key
+
+
+def seqtokey_many(matrix: Any, reverse: bool = False) -> List[str]:
+    """Hex-encode each row of a uint8 matrix
+
+    Accepts a sequence of bytes-like rows, or any 2-D C-contiguous uint8
+    buffer (e.g. a NumPy array) which is encoded in a single pass.
+    """
+    assert isinstance(reverse, bool), f"unexpected type: {type(reverse)}"
+    shape = getattr(matrix, "shape", None)
+    if shape is not None and len(shape) == 2:
+        assert getattr(matrix, "itemsize", 1) == 1, "matrix is not uint8"
+        rows, width = shape
+        assert width > 0, f"width {width} error"
+        flat: bytes = memoryview(matrix).tobytes()
+        if reverse:
+            return [
+                flat[i:i + width][::-1].hex()
+                for i in range(0, rows * width, width)
+            ]
+        datas: str = flat.hex()
+        step: int = width * 2
+        return [datas[i:i + step] for i in range(0, rows * step, step)]
+    res: List[str] = []
+    for row in matrix:
+        datas = bytes(row)
+        assert len(datas) > 0, "empty row"
+        res.append((datas[::-1] if reverse else datas).hex())
+    return res
@@ -0,0 +1,96 @@
+# coding:utf-8
+
+from bisect import bisect_left
+from itertools import accumulate
+from random import Random
+from time import time
+from typing import Generic
+from typing import List
+from typing import TypeVar
+
+from cachetools import LFUCache
+from cachetools import LRUCache
+
+from strie.trie.ctree import cache
+
+KT = TypeVar("KT")
+VT = TypeVar("VT")
+
+
+class legacy(Generic[KT, VT]):
+    """Previous cache: 40% LRU and 60% LFU, values kept in both
+    """
+
+    def __init__(self, cachemax: int):
+        nlru: int = int(cachemax * 40 / 100)
+        self.__clru: LRUCache[KT, VT] = LRUCache(maxsize=nlru)
+        self.__clfu: LFUCache[KT, VT] = LFUCache(maxsize=cachemax - nlru)
+
+    def __contains__(self, key: KT) -> bool:
+        return key in self.__clru or key in self.__clfu
+
+    def __getitem__(self, key: KT) -> VT:
+        if key in self.__clru:
+            value = self.__clru[key]
+            if key not in self.__clfu:
+                self.__clfu[key] = value
+        elif key in self.__clfu:
+            value = self.__clfu[key]
+            self.__clru[key] = value
+        return self.__clfu[key]
+
+    def __setitem__(self, key: KT, value: VT):
+        if key in self.__clfu:
+            self.__clfu[key] = value
+        self.__clru[key] = value
+
+
+def zipf(keys: int, length: int, alpha: float, seed: int = 0) -> List[int]:
+    weights = list(accumulate(1.0 / (i + 1)**alpha for i in range(keys)))
+    rand = Random(seed)
+    order = list(range(keys))
+    rand.shuffle(order)
+    return [
+        order[bisect_left(weights, rand.random() * weights[-1])]
+        for _ in range(length)
+    ]
+
+
+def scan(trace: List[int], keys: int, every: int = 50000) -> List[int]:
+    """Insert a full one-pass scan of new keys periodically
+    """
+    res: List[int] = []
+    for i, key in enumerate(trace):
+        res.append(key)
+        if i % every == every - 1:
+            res.extend(range(keys + i, keys + i + keys // 2))
+    return res
+
+
+def run(root, trace: List[int]) -> float:
+    hits: int = 0
+    for key in trace:
+        if key in root:
+            hits += 1
+            root[key]
+        else:
+            root[key] = key
+    return hits / len(trace)
+
+
+def bench(name: str, trace: List[int], size: int):
+    for kind, root in (("legacy", legacy(size)), ("tinylfu", cache(size))):
+        timestamp = time()
+        ratio = run(root, trace)
+        use = time() - timestamp
+        print(f"{name}\t{kind}\tsize {size}\thit {ratio:.2%}\tuse {use:.3}s")
+
+
+KEYS = 100000
+LENGTH = 500000
+
+for alpha in (0.8, 1.0, 1.2):
+    trace = zipf(KEYS, LENGTH, alpha)
+    for size in (1000, 10000):
+        bench(f"zipf {alpha}", trace, size)
+        bench(f"zipf {alpha} + scan", scan(trace, size * 2), size)
@@ -0,0 +1,42 @@
+# coding:utf-8
+
+from random import Random
+import string
+from time import time
+from typing import List
+
+from strie import testakey
+from strie import testalnum
+from strie import testbin
+from strie import testhex
+
+
+def keys(chars: str, count: int, length: int, seed: int = 0) -> List[str]:
+    rand = Random(seed)
+    return ["".join(rand.choices(chars, k=length)) for _ in range(count)]
+
+
+def bench(name: str, test: testakey, batch: List[str], rounds: int = 5):
+    timestamp = time()
+    for _ in range(rounds):
+        loop = [test.check(key) for key in batch]
+    use_loop = time() - timestamp
+    timestamp = time()
+    for _ in range(rounds):
+        many = test.check_many(batch)
+    use_many = time() - timestamp
+    assert loop == many
+    print(f"{name}\tkeys {len(batch)}\tloop {use_loop:.3}s\t"
+          f"check_many {use_many:.3}s\tspeedup {use_loop / use_many:.1f}x")
+
+
+COUNT = 100000
+LENGTH = 32
+
+bench("alnum", testalnum,
+      keys(string.ascii_letters + string.digits, COUNT, LENGTH))
+bench("hex", testhex, keys("0123456789abcdef", COUNT, LENGTH))
+bench("bin", testbin, keys("".join(map(chr, range(256))), COUNT, LENGTH))
+invalid = keys("0123456789abcdef", COUNT, LENGTH)
+invalid[COUNT // 2] = "xyz"
+bench("hex, one invalid", testhex, invalid)